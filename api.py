@@ -5,22 +5,45 @@ FastAPI API layer for Get JustDial.
 - /config         : returns available cities & searches from JSON
 - /scrape/manual  : structured scraping (cities + search)
 - /scrape/nl      : natural-language scraping (LLM → cities + search)
-- /download       : serves generated CSV files
+- /scrape/stream  : manual scraping with live progress + records (Server-Sent Events)
+- /scrape/jobs    : running scrape jobs; POST /scrape/jobs/{job_id}/cancel stops one
+- /scrape/cdp     : manual scraping on the asyncio Chrome DevTools Protocol engine (cities in parallel tabs)
+- /scrape/bulk    : upload many city/keyword pairs and URLs; poll /scrape/bulk/{batch_id}, stream .../download
+- /download       : serves generated CSV files (gzip when the client accepts it)
+- /preview        : one page of rows from a generated CSV file
+- /search         : ranked full-text search over everything scraped, with city/keyword facets
+- ?profile=1      : on /scrape/*, trace WebDriver commands and sleeps for the job (cpu/memory/all add cProfile/tracemalloc)
+- /metrics        : Prometheus metrics (phase timings, records, failures, browsers, queue depth)
 """
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse, HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import asyncio
 import os
+import sys
 import json
+import threading
+import time
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv
-from openai import OpenAI
 
-from main import run_single_scrape  # helper in main.py
-from batch_scraper import load_json_file
+# selenium (via main.py) and openai are slow to import; they load on first use, see run_scrape / get_client
+from json_files import load_json_file
+from storage import get_default_store
+from parquet_output import ParquetSink, output_formats
+from csv_preview import read_page
+from jobs import JobRegistry
+import search_index
+import metrics
+import profiling
+import records
+from bulk import BulkRunner, parse_text
 
 
 
@@ -30,9 +53,56 @@ from batch_scraper import load_json_file
 
 load_dotenv()
 
-client = OpenAI()  # uses OPENAI_API_KEY from environment
+# Browsers to launch in the background at startup, so the first scrapes skip the Chrome start
+PREWARM_BROWSERS = int(os.getenv('JD_PREWARM_BROWSERS', '0'))
 
-app = FastAPI(title="Get JustDial")
+client = None  # OpenAI client, created on the first natural-language request
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The OpenAI client (uses OPENAI_API_KEY from environment), created on first use."""
+    global client
+    with _client_lock:
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI()
+        return client
+
+
+def run_scrape(*args, **kwargs):
+    """main.run_scrape; importing main pulls in selenium, so that happens on the first scrape."""
+    from main import run_scrape as scrape
+    return scrape(*args, **kwargs)
+
+
+def _prewarm(count):
+    import main
+    main.prewarm_drivers(count)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if PREWARM_BROWSERS > 0:
+        threading.Thread(target=_prewarm, args=(PREWARM_BROWSERS,), name="prewarm", daemon=True).start()
+    yield
+    bulk_runner.shutdown()
+    if "cdp_engine" in sys.modules:
+        await sys.modules["cdp_engine"].close_shared_browser()
+    if PREWARM_BROWSERS > 0:
+        import main
+        main.close_warm_drivers()
+
+
+app = FastAPI(title="Get JustDial", lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Only files inside these folders can be downloaded or previewed
+OUTPUT_DIRS = ["Scrapped", "Clean Data"]
+
+# Running scrapes, so they can be cancelled from another request
+jobs = JobRegistry()
+metrics.RUNNING_JOBS.set_function(lambda: len(jobs.running()))
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -49,10 +119,20 @@ def serve_index():
 class ManualSearchRequest(BaseModel):
     cities: List[str]         # ["Jaipur"] or ["Jaipur", "Delhi"]
     search: str               # "builders"
+    max_results: Optional[int] = Field(None, ge=1)         # per city, e.g. 200 for a quick sample
+    deadline_seconds: Optional[float] = Field(None, gt=0)  # for the whole request
+    job_id: Optional[str] = None                            # pick an id to be able to cancel the request
+    shard: Optional[bool] = None                            # per-locality parallel scrape; None = JD_SHARDING
+    enrich: Optional[bool] = None                           # fetch hidden phones from detail pages; None = JD_ENRICH
 
 
 class NLSearchRequest(BaseModel):
     query: str                # natural language
+    max_results: Optional[int] = Field(None, ge=1)
+    deadline_seconds: Optional[float] = Field(None, gt=0)
+    job_id: Optional[str] = None
+    shard: Optional[bool] = None
+    enrich: Optional[bool] = None
 
 
 # ---------------------------------------------------------------------------
@@ -86,14 +166,20 @@ def interpret_nl_query(query: str) -> ManualSearchRequest:
         "Return the JSON object now."
     )
 
-    completion = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        temperature=0.1,
-    )
+    try:
+        with metrics.phase("llm"):
+            completion = get_client().chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                temperature=0.1,
+            )
+    except Exception:
+        metrics.LLM_REQUESTS.labels("failed").inc()
+        raise
+    metrics.LLM_REQUESTS.labels("ok").inc()
 
     raw = completion.choices[0].message.content.strip()
 
@@ -124,6 +210,12 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.latest()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/config")
 def config():
     cities = load_json_file("cities.json", key="cities")
@@ -131,47 +223,411 @@ def config():
     return {"cities": cities}
 
 
-@app.post("/scrape/manual")
-def scrape_manual(req: ManualSearchRequest):
+def scrape_cities(cities, search, on_event=None, cancel_event=None, max_results=None, deadline_seconds=None,
+                  shard=None, enrich=None, profiler=None):
     """
-    Scrape one or more cities for a structured search term.
+    Run the scraper for each city with the configured outputs.
+    Returns ([{"city", "csv_path", "records", "truncated", "stop_reason"}], skipped cities).
+    max_results applies per city; deadline_seconds covers all cities, and cities
+    not started before the deadline or a cancellation are skipped.
+    shard splits cities into parallel per-locality searches (see sharding.py);
+    enrich fills hidden phones from detail pages (see enrichment.py);
+    profiler (profiling.JobProfiler) traces every browser the scrapes open.
     """
     csv_files = []
-    for city in req.cities:
-        path = run_single_scrape(city, req.search)
-        csv_files.append({"city": city, "csv_path": path})
+    skipped = []
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+    store = get_default_store()
+    parquet_sink = ParquetSink() if "parquet" in output_formats() else None
+    waiting = len(cities)
+    metrics.QUEUE_DEPTH.inc(waiting)
+    try:
+        for i, city in enumerate(cities):
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if (cancel_event is not None and cancel_event.is_set()) or (remaining is not None and remaining <= 0):
+                skipped = list(cities[i:])
+                break
+            waiting -= 1
+            metrics.QUEUE_DEPTH.dec()
+            city_events = None
+            if on_event is not None:
+                city_events = lambda event, data, city=city: on_event(event, {"city": city, **data})
+            result = run_scrape(city, search, store=store, parquet_sink=parquet_sink,
+                                on_event=city_events, cancel_event=cancel_event,
+                                max_results=max_results, deadline_seconds=remaining, shard=shard,
+                                enrich=enrich, profiler=profiler)
+            csv_files.append({"city": city, **result})
+            if on_event is not None:
+                on_event("city_done", {"city": city, **result})
+    finally:
+        metrics.QUEUE_DEPTH.dec(waiting)
+        if parquet_sink is not None:
+            parquet_sink.close()
+    return csv_files, skipped
+
+
+def start_profiler(job_id, profile):
+    """A started profiling.JobProfiler for ?profile=..., or None when profiling is off."""
+    modes = profiling.parse_mode(profile)
+    if not modes:
+        return None
+    return profiling.JobProfiler(job_id, cpu="cpu" in modes, memory="memory" in modes).start()
 
-    return {
+
+@app.post("/scrape/manual")
+def scrape_manual(req: ManualSearchRequest, profile: Optional[str] = None):
+    """
+    Scrape one or more cities for a structured search term.
+    With max_results / deadline_seconds the scrape stops early and the
+    partial results are flagged as truncated. Passing a job_id lets another
+    request cancel it with POST /scrape/jobs/{job_id}/cancel.
+    ?profile=1 adds a "profile" summary (WebDriver calls, sleeps) and writes
+    the full report to Scrapped/job_profiles/<job_id>.json.
+    """
+    try:
+        job_id, cancel_event = jobs.start(req.job_id, cities=req.cities, search=req.search)
+    except ValueError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    profiler = start_profiler(job_id, profile)
+    try:
+        csv_files, skipped = scrape_cities(req.cities, req.search, cancel_event=cancel_event,
+                                           max_results=req.max_results, deadline_seconds=req.deadline_seconds,
+                                           shard=req.shard, enrich=req.enrich, profiler=profiler)
+    finally:
+        jobs.finish(job_id)
+        profile_summary = profiler.stop() if profiler is not None else None
+
+    response = {
         "mode": "manual",
+        "job_id": job_id,
         "search": req.search,
         "cities": req.cities,
         "results": csv_files,
+        "skipped_cities": skipped,
+        "truncated": bool(skipped) or any(r["truncated"] for r in csv_files),
+        "cancelled": cancel_event.is_set(),
     }
+    if profile_summary is not None:
+        response["profile"] = profile_summary
+    return response
 
 
 @app.post("/scrape/nl")
-def scrape_nl(req: NLSearchRequest):
+def scrape_nl(req: NLSearchRequest, profile: Optional[str] = None):
     """
     Natural-language search:
     - LLM parses query into (cities, search)
     - Then we call the same scraper as manual mode
     """
     interpreted = interpret_nl_query(req.query)
-    manual_response = scrape_manual(interpreted)
+    interpreted.max_results = req.max_results
+    interpreted.deadline_seconds = req.deadline_seconds
+    interpreted.job_id = req.job_id
+    interpreted.shard = req.shard
+    interpreted.enrich = req.enrich
+    manual_response = scrape_manual(interpreted, profile=profile)
+    if isinstance(manual_response, JSONResponse):
+        return manual_response
     manual_response["mode"] = "nl"
     manual_response["original_query"] = req.query
     return manual_response
 
 
+@app.post("/scrape/cdp")
+async def scrape_cdp(req: ManualSearchRequest):
+    """
+    Same request and response as /scrape/manual, run on the CDP engine
+    (cdp_engine.py): one shared Chrome, every city in its own tab, all driven
+    from the event loop. Sharding and enrichment are not available here.
+    """
+    if req.shard or req.enrich:
+        return JSONResponse(status_code=400, content={"error": "shard and enrich need /scrape/manual"})
+    try:
+        job_id, cancel_event = jobs.start(req.job_id, cities=req.cities, search=req.search, engine="cdp")
+    except ValueError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
+    parquet_sink = ParquetSink() if "parquet" in output_formats() else None
+    try:
+        import cdp_engine
+        browser = await cdp_engine.shared_browser()
+        csv_files, skipped = await cdp_engine.scrape_cities(browser, req.cities, req.search, store=get_default_store(),
+                                                            parquet_sink=parquet_sink, cancel_event=cancel_event,
+                                                            max_results=req.max_results,
+                                                            deadline_seconds=req.deadline_seconds)
+    finally:
+        jobs.finish(job_id)
+        if parquet_sink is not None:
+            parquet_sink.close()
+
+    return {
+        "mode": "cdp",
+        "job_id": job_id,
+        "search": req.search,
+        "cities": req.cities,
+        "results": csv_files,
+        "skipped_cities": skipped,
+        "truncated": bool(skipped) or any(r["truncated"] for r in csv_files),
+        "cancelled": cancel_event.is_set(),
+    }
+
+
+def resolve_output_path(csv_path: str):
+    """
+    Absolute path of csv_path if it points inside one of OUTPUT_DIRS, else None.
+    Symlinks and '..' are resolved first so they can't escape the output folders.
+    """
+    real_path = os.path.realpath(csv_path)
+    for directory in OUTPUT_DIRS:
+        base = os.path.realpath(directory)
+        if os.path.commonpath([real_path, base]) == base:
+            return real_path
+    return None
+
+
+def _checked_output_path(csv_path: str):
+    """(path, None) for an existing output file, or (None, error response)."""
+    path = resolve_output_path(csv_path)
+    if path is None:
+        return None, JSONResponse(status_code=403, content={"error": "path outside output directory"})
+    if not os.path.isfile(path):
+        return None, JSONResponse(status_code=404, content={"error": "file not found"})
+    return path, None
+
+
+@app.get("/scrape/stream")
+async def scrape_stream(
+    request: Request,
+    cities: str,
+    search: str,
+    max_results: Optional[int] = Query(None, ge=1),
+    deadline_seconds: Optional[float] = Query(None, gt=0),
+    shard: Optional[bool] = None,
+    enrich: Optional[bool] = None,
+    profile: Optional[str] = None,
+):
+    """
+    Same as /scrape/manual (cities comma-separated) but streams Server-Sent Events:
+    started (with the job_id), page_opened, scroll, cards_loaded, records (batches
+    of rows), city_done, error, done (with the profile summary when ?profile=1).
+    Closing the connection or cancelling the job stops the scrape; rows loaded
+    so far are still saved.
+    """
+    city_list = [c.strip() for c in cities.split(",") if c.strip()]
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    job_id, cancel_event = jobs.start(cities=city_list, search=search)
+
+    def emit(event, data):
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    def worker():
+        truncated = False
+        done = {}
+        profiler = start_profiler(job_id, profile)
+        try:
+            csv_files, skipped = scrape_cities(city_list, search, on_event=emit, cancel_event=cancel_event,
+                                               max_results=max_results, deadline_seconds=deadline_seconds,
+                                               shard=shard, enrich=enrich, profiler=profiler)
+            truncated = bool(skipped) or any(r["truncated"] for r in csv_files)
+        except Exception as e:
+            emit("error", {"message": str(e)})
+        finally:
+            jobs.finish(job_id)
+            if profiler is not None:
+                done["profile"] = profiler.stop()
+            emit("done", {"cancelled": cancel_event.is_set(), "truncated": truncated, **done})
+
+    # Selenium blocks, so the scrape runs on its own thread and feeds the event queue
+    threading.Thread(target=worker, daemon=True).start()
+
+    async def event_stream():
+        try:
+            started = {"job_id": job_id, "cities": city_list, "search": search}
+            yield f"event: started\ndata: {json.dumps(started)}\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(events.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event}\ndata: {json.dumps(data, default=records.jsonable)}\n\n"
+                if event == "done" or await request.is_disconnected():
+                    break
+        finally:
+            # Client went away (or we're done): stop scrolling as soon as possible
+            cancel_event.set()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _bulk_scrape(city, keyword, **options):
+    """One bulk search with the configured outputs (each task gets its own Parquet sink)."""
+    parquet_sink = ParquetSink() if "parquet" in output_formats() else None
+    try:
+        return run_scrape(city, keyword, store=get_default_store(), parquet_sink=parquet_sink, **options)
+    finally:
+        if parquet_sink is not None:
+            parquet_sink.close()
+
+
+# Bulk batches share one bounded pool of JD_BULK_WORKERS browsers
+bulk_runner = BulkRunner(scrape=_bulk_scrape, jobs=jobs)
+
+
+class BulkRequest(BaseModel):
+    pairs: List[List[str]] = []    # [["Jaipur", "builders"], ["Delhi", "plumbers"]]
+    cities: List[str] = []         # with keywords: every city x keyword
+    keywords: List[str] = []
+    urls: List[str] = []           # JustDial search URLs, e.g. locality pages
+
+
+@app.post("/scrape/bulk")
+async def scrape_bulk(
+    request: Request,
+    batch_id: Optional[str] = None,
+    max_results: Optional[int] = Query(None, ge=1),
+    shard: Optional[bool] = None,
+    enrich: Optional[bool] = None,
+):
+    """
+    Queue a large list of searches and return its batch_id right away.
+    The body is either JSON (BulkRequest: pairs, cities x keywords, urls) or an
+    uploaded text/CSV list with one "city,keyword" pair or URL per line
+    (curl --data-binary @list.csv -H "Content-Type: text/csv").
+    Duplicates are removed; the searches run JD_BULK_WORKERS at a time.
+    Poll GET /scrape/bulk/{batch_id}, cancel with POST /scrape/jobs/{batch_id}/cancel.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            req = BulkRequest(**json.loads(body or b"{}"))
+        except (ValueError, TypeError) as e:
+            return JSONResponse(status_code=400, content={"error": f"invalid JSON body: {e}"})
+        bad = [pair for pair in req.pairs if len(pair) != 2]
+        if bad:
+            return JSONResponse(status_code=400, content={"error": f"pairs must be [city, keyword]: {bad[:5]}"})
+        entries = [tuple(pair) for pair in req.pairs]
+        entries += [(city, keyword) for keyword in req.keywords for city in req.cities]
+        entries += req.urls
+    else:
+        entries, errors = parse_text(body.decode("utf-8-sig", errors="replace"))
+        if errors:
+            return JSONResponse(status_code=400, content={"error": "could not parse the list", "lines": errors[:20]})
+
+    from scrape_common import BASE_URL
+    options = {"max_results": max_results, "shard": shard, "enrich": enrich}
+    try:
+        batch = bulk_runner.submit(entries, batch_id=batch_id, allowed_hosts={urlsplit(BASE_URL).netloc.lower()},
+                                   **options)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return JSONResponse(status_code=202, content={
+        **batch.progress(),
+        "status_url": f"/scrape/bulk/{batch.batch_id}",
+        "download_url": f"/scrape/bulk/{batch.batch_id}/download",
+    })
+
+
+@app.get("/scrape/bulk/{batch_id}")
+def bulk_progress(batch_id: str, tasks: bool = False):
+    """Progress counts of a bulk batch; ?tasks=true adds every search with its status and CSV."""
+    batch = bulk_runner.get(batch_id)
+    if batch is None:
+        return JSONResponse(status_code=404, content={"error": "no bulk batch with this id"})
+    return batch.progress(include_tasks=tasks)
+
+
+@app.get("/scrape/bulk/{batch_id}/download")
+def bulk_download(batch_id: str, dedup: bool = True):
+    """
+    One CSV (Name, Address, Phone, City, Keyword) with the rows of every finished
+    search, streamed as it is read. While the batch still runs it holds what is
+    done so far (X-Bulk-Status: running). dedup=false keeps businesses that
+    several searches returned.
+    """
+    batch = bulk_runner.get(batch_id)
+    if batch is None:
+        return JSONResponse(status_code=404, content={"error": "no bulk batch with this id"})
+    return StreamingResponse(
+        batch.iter_csv(dedup=dedup),
+        media_type="text/csv",
+        headers={
+            "Content-Disposition": f'attachment; filename="bulk_{batch.batch_id}.csv"',
+            "X-Bulk-Status": "finished" if batch.finished else "running",
+        },
+    )
+
+
+@app.get("/scrape/jobs")
+def list_jobs():
+    return {"jobs": jobs.running()}
+
+
+@app.post("/scrape/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """
+    Stop a running scrape after the current scroll. The job still returns
+    (or streams) the records it loaded, flagged as cancelled.
+    """
+    if not jobs.cancel(job_id):
+        return JSONResponse(status_code=404, content={"error": "no running job with this id"})
+    return {"job_id": job_id, "cancelling": True}
+
+
 @app.get("/download")
 def download(csv_path: str):
     """
     csv_path is like: Scrapped/jaipur_builders.csv
     """
-    if not os.path.exists(csv_path):
-        return {"error": "file not found"}
+    path, error = _checked_output_path(csv_path)
+    if error:
+        return error
     return FileResponse(
-        csv_path,
+        path,
         media_type="text/csv",
-        filename=os.path.basename(csv_path),
+        filename=os.path.basename(path),
     )
+
+
+@app.get("/preview")
+def preview(
+    csv_path: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    columns: str = "",
+):
+    """
+    One page of rows from a CSV, read through a cached row-offset index.
+    columns is an optional comma-separated subset, e.g. "Name,Phone".
+    """
+    path, error = _checked_output_path(csv_path)
+    if error:
+        return error
+    selected = [c.strip() for c in columns.split(",") if c.strip()]
+    return read_page(path, offset=offset, limit=limit, columns=selected or None)
+
+
+@app.get("/search")
+def search(
+    q: str = "",
+    city: str = "",
+    keyword: str = "",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+    facets: bool = False,
+):
+    """
+    Full-text search over all scraped records (name + address), ranked by BM25.
+    e.g. /search?q=sharma builders&city=Jaipur — every word must match, the
+    last one as a prefix. facets=true adds city/keyword counts; for text
+    queries they cover the first JD_SEARCH_FACET_SCAN matches (see facets_exact).
+    New or appended files are picked up by a background index refresh.
+    """
+    search_index.refresh_in_background()
+    index = search_index.get_default_index()
+    return index.search(q, city=city or None, keyword=keyword or None,
+                        offset=offset, limit=limit, facets=facets)
@@ -1,54 +1,37 @@
 # batch_scraper.py
 
-import json
+import csv
 import os
 import time
 from main import (
     scrape_page_data, scroll_until_no_more_content, 
-    check_and_click_close_popup
+    check_and_click_close_popup, create_driver, save_page_snapshot, BASE_URL
 )
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import csv
+from dedup_index import DedupIndex, record_key as dedup_index_key
+from storage import get_default_store
+from parquet_output import ParquetSink, output_formats
+import sharding
+import enrichment
+import metrics
+from json_files import load_json_file
+from records import FIELDS as RECORD_FIELDS, RecordBatch
+from writer import BackgroundWriter
+from snapshots import snapshots_enabled
 
-def load_json_file(filename, key=None):
-    """Load data from JSON file - handles both array and object formats"""
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-            # If it's a list, return it directly
-            if isinstance(data, list):
-                return data
-            
-            # If it's a dict and key is provided, return that key's value
-            if isinstance(data, dict) and key:
-                return data.get(key, [])
-            
-            # If it's a dict without key, try common keys
-            if isinstance(data, dict):
-                # Try common keys
-                for common_key in ['cities', 'searches', 'keywords', 'data']:
-                    if common_key in data:
-                        return data[common_key]
-                # If no common key found, return empty list
-                return []
-            
-            return data
-    except FileNotFoundError:
-        print(f"Error: {filename} not found!")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in {filename}: {e}")
-        return []
+# Cross-run dedup index (see dedup_index.py). Empty path disables it.
+# JD_DEDUP_MODE: 'skip' writes first sightings only, 'tag' writes everything with a Duplicate column.
+DEDUP_INDEX_PATH = os.getenv('JD_DEDUP_INDEX', '')
+DEDUP_MODE = os.getenv('JD_DEDUP_MODE', 'skip')
 
-def scrape_city_keyword(driver, city, keyword, base_url="https://www.justdial.com/"):
-    """Scrape data for a specific city and keyword combination"""
+def scrape_city_keyword(driver, city, keyword, base_url=BASE_URL, raise_errors=False, cancel_event=None):
+    """
+    Scrape data for a specific city and keyword combination.
+    Errors are printed and give [] unless raise_errors (distributed.py retries them).
+    Setting cancel_event (threading.Event) stops the scrape and gives [].
+    """
     # Format city and keyword for URL (handle spaces, special chars)
     city_formatted = city.replace(' ', '-').replace('–', '-').replace('/', '-').lower()
     keyword_formatted = keyword.replace(' ', '-').lower()
@@ -58,69 +41,203 @@ def scrape_city_keyword(driver, city, keyword, base_url="https://www.justdial.co
     print(f"Processing: {city.upper()} - {keyword.upper()}")
     print(f"URL: {url}")
     print(f"{'='*80}")
+
+    include_link = enrichment.enrichment_enabled()
+    snapshot = {"city": city, "keyword": keyword} if snapshots_enabled() else None
+
+    if sharding.should_shard(city):
+        # Metros: one search per locality in parallel browsers, merged and deduplicated
+        try:
+            data, stop_reason, _ = sharding.scrape_sharded(city, keyword, include_link=include_link,
+                                                           snapshot=snapshot, cancel_event=cancel_event)
+            if stop_reason == "cancelled":
+                print(f"Scrape of {city} - {keyword} cancelled")
+                metrics.SCRAPES.labels("truncated").inc()
+                return []
+            if include_link:
+                with metrics.phase("enrichment"):
+                    enrichment.enrich_records(data)
+            metrics.SCRAPES.labels("complete").inc()
+            metrics.RECORDS.inc(len(data))
+            return data
+        except Exception as e:
+            print(f"Error scraping {city} - {keyword} by locality: {str(e)}")
+            metrics.SCRAPES.labels("failed").inc()
+            if raise_errors:
+                raise
+            return []
     
     try:
-        driver.get(url)
-        time.sleep(5)
+        with metrics.phase("navigation"):
+            driver.get(url)
+            time.sleep(5)
         
         # Handle popup
-        try:
-            maybe_later_button = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, 'maybelater'))
-            )
-            if maybe_later_button.is_displayed():
-                maybe_later_button.click()
-                print("Clicked 'Maybe Later' button.")
-        except:
-            pass
+        with metrics.phase("popups"):
+            try:
+                maybe_later_button = WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, 'maybelater'))
+                )
+                if maybe_later_button.is_displayed():
+                    maybe_later_button.click()
+                    print("Clicked 'Maybe Later' button.")
+            except:
+                pass
         
         # Scroll to load all content
         print("\nStarting to scroll and load all results...")
-        scroll_until_no_more_content(driver, scroll_pause=2, max_no_content_scrolls=5)
+        with metrics.phase("scrolling"):
+            stop_reason = scroll_until_no_more_content(driver, scroll_pause=2, max_no_content_scrolls=5,
+                                                       cancel_event=cancel_event)
+        if stop_reason == "cancelled":
+            print(f"Scrape of {city} - {keyword} cancelled")
+            metrics.SCRAPES.labels("truncated").inc()
+            return []
         
         # Extract data
         print("\nExtracting data from all loaded results...")
-        all_data = scrape_page_data(driver)
+        with metrics.phase("extraction"):
+            all_data = scrape_page_data(driver, include_link=include_link)
+
+        # JD_SNAPSHOTS=on: keep the scrolled page for offline re-extraction (snapshot_extract.py)
+        if snapshot is not None:
+            save_page_snapshot(driver, url, records=len(all_data), **snapshot)
+
+        # Fill hidden phones from detail pages (separate browsers, reported on their own)
+        if include_link:
+            with metrics.phase("enrichment"):
+                enrichment.enrich_records(all_data)
         
+        metrics.SCRAPES.labels("complete").inc()
+        metrics.RECORDS.inc(len(all_data))
         return all_data
         
     except Exception as e:
         print(f"Error scraping {city} - {keyword}: {str(e)}")
+        metrics.SCRAPES.labels("failed").inc()
+        if raise_errors:
+            raise
         import traceback
         traceback.print_exc()
         return []
 
-def append_data_to_csv(data, city, keyword, output_dir='Scrapped', is_first_write=False):
-    """Append scraped data to CSV file (one file per keyword, all cities combined)"""
+def keyword_csv_path(keyword, output_dir='Scrapped'):
+    """Scrapped/<keyword>.csv, the keyword sanitized for the filesystem."""
+    keyword_safe = keyword.replace(' ', '_').replace('/', '_').replace('-', '_').lower()
+    return os.path.join(output_dir, f"{keyword_safe}.csv")
+
+def _csv_header(path):
+    """Header row of an existing, non-empty CSV file, else None."""
+    try:
+        with open(path, newline='', encoding='utf-8') as f:
+            return next(csv.reader(f), None)
+    except FileNotFoundError:
+        return None
+
+def _remember_keys(keys, dedup_index, pending_keys):
+    """Record the keys of rows that were just written (or queue them in pending_keys)."""
+    if pending_keys is not None:
+        pending_keys.update(keys)
+        return
+    for key in keys:
+        dedup_index.add(key)
+    dedup_index.flush()
+
+def commit_pending_keys(dedup_index, pending_keys):
+    """Move keys whose rows are now published (see append_data_to_csv) into the dedup index."""
+    for key in pending_keys:
+        dedup_index.add(key)
+    dedup_index.flush()
+    pending_keys.clear()
+
+def append_data_to_csv(data, city, keyword, output_dir='Scrapped', is_first_write=False,
+                       dedup_index=None, dedup_mode='skip', store=None, parquet_sink=None, write_csv=True,
+                       writer=None, pending_keys=None):
+    """
+    Append scraped data to CSV file (one file per keyword, all cities combined).
+    With a dedup_index, businesses already seen in any earlier city/run are
+    skipped (dedup_mode='skip') or written with Duplicate=yes (dedup_mode='tag').
+    The keyword CSV is then always appended to, never started over, since
+    earlier runs' rows would not be written again, and new keys enter the
+    index only after their rows were written. With pending_keys (a set) they
+    are collected there instead, for rows that become durable later
+    (commit_pending_keys after the writer published them).
+    With a store (storage.SQLiteStore) the rows are upserted there instead of the CSV.
+    With a parquet_sink (parquet_output.ParquetSink) the rows are also streamed to Parquet;
+    write_csv=False makes Parquet the only file output.
+    With a writer (writer.BackgroundWriter) the CSV rows are queued for its
+    thread instead of written here; they reach the CSV when it publishes.
+    Returns the number of rows written.
+    """
     os.makedirs(output_dir, exist_ok=True)
     
-    # Create filename: keyword.csv (sanitize for filesystem)
-    keyword_safe = keyword.replace(' ', '_').replace('/', '_').replace('-', '_').lower()
-    filename = f"{keyword_safe}.csv"
-    csv_path = os.path.join(output_dir, filename)
+    csv_path = keyword_csv_path(keyword, output_dir)
+    filename = os.path.basename(csv_path)
     
     if data:
-        # Add city column to each record
-        data_with_city = []
+        fieldnames = ['Name', 'Address', 'Phone', 'City']
+        if dedup_index is not None and dedup_mode == 'tag':
+            fieldnames.append('Duplicate')
+        # Earlier runs' rows must survive when they can't be written again
+        truncate = is_first_write and dedup_index is None
+        # A writer follows the header of its own working copy, which the published file may not have yet
+        existing_header = None if truncate or writer is not None else _csv_header(csv_path)
+        if existing_header:
+            fieldnames = existing_header
+
+        # One column per field; City (and the keyword) are stored once for the whole batch
+        tag = dedup_index is not None and dedup_mode == 'tag'
+        batch = RecordBatch(city, keyword, columns=RECORD_FIELDS + (('Duplicate',) if tag else ()))
+        duplicates = 0
+        new_keys = []
+        seen = set()
         for record in data:
-            record_with_city = record.copy()
-            record_with_city['City'] = city
-            data_with_city.append(record_with_city)
-        
-        # Write mode: 'w' for first write (create new file), 'a' for append
-        mode = 'w' if is_first_write else 'a'
-        with open(csv_path, mode, newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Name', 'Address', 'Phone', 'City']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            # Write header only if it's the first write
-            if is_first_write:
-                writer.writeheader()
-            
-            writer.writerows(data_with_city)
-        
-        print(f"✓ Added {len(data)} records from {city} to {filename}")
-        return len(data)
+            is_duplicate = False
+            if dedup_index is not None:
+                key = dedup_index_key(record)
+                if key is not None:
+                    is_duplicate = (key in seen or (pending_keys is not None and key in pending_keys)
+                                    or key in dedup_index)
+                    if not is_duplicate:
+                        seen.add(key)
+                        new_keys.append(key)
+                if is_duplicate:
+                    duplicates += 1
+                    if dedup_mode == 'skip':
+                        continue
+            if tag:
+                batch.append(record, Duplicate='yes' if is_duplicate else '')
+            else:
+                batch.append(record)
+
+        if duplicates:
+            action = 'Skipped' if dedup_mode == 'skip' else 'Tagged'
+            print(f"{action} {duplicates} already seen businesses from {city}")
+        if not batch:
+            return 0
+
+        if parquet_sink is not None:
+            parquet_sink.write(batch, city, keyword)
+
+        if store is not None:
+            store.upsert_records(batch, city, keyword)
+            print(f"✓ Stored {len(batch)} records from {city} in {store.path}")
+        elif not write_csv:
+            print(f"✓ Added {len(batch)} records from {city} to {parquet_sink.root}")
+        elif writer is not None:
+            writer.append(csv_path, batch, fieldnames, truncate=truncate)
+            print(f"✓ Queued {len(batch)} records from {city} for {filename}")
+        else:
+            # Write mode: 'w' for first write (create new file), 'a' for append
+            # (header only when the file is started)
+            header = truncate or not existing_header
+            with open(csv_path, 'w' if truncate else 'a', newline='', encoding='utf-8') as csvfile:
+                batch.write_csv(csvfile, fieldnames, header=header)
+            print(f"✓ Added {len(batch)} records from {city} to {filename}")
+
+        if dedup_index is not None:
+            _remember_keys(new_keys, dedup_index, pending_keys)
+        return len(batch)
     else:
         print(f"⚠ No data to save for {city} - {keyword}")
         return 0
@@ -158,18 +275,29 @@ def main():
         print("Cancelled.")
         return
     
-    # Setup Chrome driver
-    chrome_options = Options()
-    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-    chrome_options.add_argument(f"user-agent={user_agent}")
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option("useAutomationExtension", False)
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    # Setup Chrome driver (persistent profile + disk cache when JD_PROFILE_ROOT is set)
+    driver = create_driver()
+
+    store = get_default_store()
+    if store is not None:
+        print(f"Writing records to SQLite database {store.path}")
+
+    formats = output_formats()
+    parquet_sink = ParquetSink() if 'parquet' in formats else None
+    if parquet_sink is not None:
+        print(f"Writing Parquet dataset to {parquet_sink.root}")
+
+    # CSV rows are written by a background thread and published by atomic rename
+    csv_writer = BackgroundWriter() if store is None and 'csv' in formats else None
+
+    dedup_index = None
+    pending_keys = None
+    if DEDUP_INDEX_PATH:
+        dedup_index = DedupIndex(DEDUP_INDEX_PATH)
+        print(f"Using dedup index {DEDUP_INDEX_PATH} ({len(dedup_index)} known businesses, mode: {DEDUP_MODE})")
+        if csv_writer is not None:
+            # Queued rows are only safe once published; their keys wait until then
+            pending_keys = set()
     
     # Statistics
     total_combinations = len(cities) * len(keywords)
@@ -191,19 +319,26 @@ def main():
             
             for city_idx, city in enumerate(cities, 1):
                 processed += 1
+                metrics.QUEUE_DEPTH.set(total_combinations - processed)
                 print(f"\n[{processed}/{total_combinations}] Keyword: {keyword} | City: {city} ({city_idx}/{len(cities)})")
                 
                 # Scrape data
                 data = scrape_city_keyword(driver, city, keyword)
                 
                 # Append data to keyword CSV file
-                records_count = append_data_to_csv(data, city, keyword, is_first_write=is_first_city)
+                with metrics.phase("write"):
+                    records_count = append_data_to_csv(data, city, keyword, is_first_write=is_first_city,
+                                                       dedup_index=dedup_index, dedup_mode=DEDUP_MODE,
+                                                       store=store, parquet_sink=parquet_sink,
+                                                       write_csv='csv' in formats, writer=csv_writer,
+                                                       pending_keys=pending_keys)
                 total_records += records_count
                 keyword_records += records_count
                 
-                if records_count > 0:
+                # With a dedup index a city can be fully scraped yet add no new rows
+                if data:
                     successful.append(f"{city} - {keyword} ({records_count} records)")
-                    print(f"✓ Successfully scraped {records_count} records")
+                    print(f"✓ Successfully scraped {len(data)} records ({records_count} written)")
                 else:
                     failed.append(f"{city} - {keyword}")
                     print(f"✗ No records found")
@@ -211,17 +346,24 @@ def main():
                 # Mark that we've written at least once
                 if is_first_city and records_count > 0:
                     is_first_city = False
+
+                # JD_METRICS_PUSHGATEWAY / JD_METRICS_FILE: progress is visible while the batch runs
+                metrics.export()
                 
                 # Small delay between requests to avoid rate limiting
                 if processed < total_combinations:  # Don't wait after last one
                     time.sleep(3)
             
             # Summary for this keyword
-            keyword_safe = keyword.replace(' ', '_').replace('/', '_').replace('-', '_').lower()
+            csv_path = keyword_csv_path(keyword)
+            if csv_writer is not None:
+                csv_writer.publish(csv_path, wait=pending_keys is not None)
+                if pending_keys is not None:
+                    commit_pending_keys(dedup_index, pending_keys)
             print(f"\n{'='*80}")
             print(f"Completed keyword '{keyword}'")
             print(f"Total records for {keyword}: {keyword_records}")
-            print(f"Saved to: Scrapped/{keyword_safe}.csv")
+            print(f"Saved to: {store.path if store is not None else csv_path}")
             print(f"{'='*80}")
             
             # Extra delay after completing all cities for a keyword
@@ -272,6 +414,18 @@ def main():
     finally:
         driver.quit()
         print("\nBrowser closed.")
+        try:
+            if parquet_sink is not None:
+                parquet_sink.close()
+            if csv_writer is not None:
+                # Publishes whatever is still buffered (e.g. after Ctrl+C)
+                csv_writer.close()
+                if pending_keys:
+                    commit_pending_keys(dedup_index, pending_keys)
+        finally:
+            if dedup_index is not None:
+                dedup_index.close()
+        metrics.export()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_entity_resolution.py
+#
+# Synthetic benchmark for entity_resolution.resolve_entities.
+#
+#   python benchmarks/bench_entity_resolution.py --rows 2000000
+#
+# Generates businesses with realistic duplicates (legal suffix variants,
+# reformatted phones, repeated rows) and same-name branches, then reports
+# time per stage, throughput, and how many planted duplicates were merged.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import entity_resolution as er  # noqa: E402
+
+WORDS = ['sharma', 'gupta', 'shree', 'balaji', 'krishna', 'royal', 'city', 'modern', 'national',
+         'jain', 'star', 'galaxy', 'sai', 'om', 'new', 'classic', 'prime', 'global', 'metro', 'singh']
+TRADES = ['builders', 'plumbers', 'electricals', 'contractors', 'interiors', 'traders', 'motors', 'dental clinic']
+SUFFIXES = ['', ' Pvt Ltd', ' Private Limited', ' & Co', ' LLP']
+CITIES = ['Mumbai', 'Delhi', 'Thane', 'Jaipur', 'Pune', 'Ghaziabad', 'Kalyan-Dombivli', 'Bengaluru']
+AREAS = ['MI Road', 'Andheri West', 'Sector 62', 'Koramangala', 'Malviya Nagar', 'Baner', 'Civil Lines']
+
+
+def make_dataset(rows, seed=7):
+    """About 70% unique businesses, the rest are planted duplicate variants."""
+    rng = np.random.default_rng(seed)
+    n_entities = int(rows * 0.7)
+
+    first = rng.choice(WORDS, n_entities)
+    second = rng.choice(WORDS, n_entities)
+    trade = rng.choice(TRADES, n_entities)
+    names = pd.Series(first).str.title() + ' ' + pd.Series(second).str.title() + ' ' + pd.Series(trade).str.title()
+    phones = pd.Series(rng.integers(7_000_000_000, 9_999_999_999, n_entities)).astype(str)
+    cities = rng.choice(CITIES, n_entities)
+    addresses = (pd.Series(rng.integers(1, 500, n_entities)).astype(str) + ', '
+                 + pd.Series(rng.choice(AREAS, n_entities)) + ', ' + pd.Series(cities))
+
+    base = pd.DataFrame({'Name': names, 'Address': addresses, 'Phone': phones, 'City': cities,
+                         'TrueId': np.arange(n_entities)})
+
+    # Duplicates: suffix variants with the phone reformatted
+    dup_src = rng.integers(0, n_entities, rows - n_entities)
+    dups = base.iloc[dup_src].copy()
+    dups['Name'] = dups['Name'] + pd.Series(rng.choice(SUFFIXES, len(dups)), index=dups.index)
+    dups['Phone'] = '+91 ' + dups['Phone'].str[:5] + ' ' + dups['Phone'].str[5:]
+
+    data = pd.concat([base, dups], ignore_index=True)
+    return data.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--window', type=int, default=er.DEFAULT_WINDOW)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows} synthetic rows...")
+    data = make_dataset(args.rows)
+    truth = data.pop('TrueId').to_numpy()
+
+    timings = {}
+    start = time.perf_counter()
+    norm = er.normalize_frame(data)
+    timings['normalize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    keys = er.blocking_keys(norm)
+    i, j = er.candidate_pairs(keys, norm['name_norm'].to_numpy().astype(str), window=args.window)
+    timings['blocking'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mi, mj = er.match_pairs(norm, i, j)
+    timings['matching'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    er.connected_components(len(norm), mi, mj)
+    timings['clustering'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    clustered, canonical = er.resolve_entities(data, window=args.window, verbose=False)
+    timings['end_to_end'] = time.perf_counter() - start
+
+    entity = clustered['EntityId'].to_numpy()
+    # A false merge is an entity containing more than one true business
+    per_entity = pd.DataFrame({'entity': entity, 'truth': truth}).groupby('entity')['truth'].nunique()
+
+    print(f"\n{'='*60}")
+    print(f"Rows:               {len(data)}")
+    print(f"True businesses:    {len(np.unique(truth))}")
+    print(f"Resolved entities:  {len(canonical)}")
+    print(f"Impure entities:    {(per_entity > 1).sum()}")
+    print(f"Candidate pairs:    {len(i)} ({len(i) / len(data):.2f} per row)")
+    print(f"Matched pairs:      {len(mi)}")
+    for stage, seconds in timings.items():
+        print(f"{stage:<20}{seconds:8.2f}s")
+    print(f"Throughput:         {len(data) / timings['end_to_end']:,.0f} rows/s")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_records.py
+#
+# Memory and time for one keyword's records in the batch writer's layout.
+#
+#   python benchmarks/bench_records.py --rows 100000
+#
+# Compares the old pipeline (a dict per card, copied to add City, written with
+# csv.DictWriter) with Record objects and a RecordBatch written straight from
+# its columns. Memory is the tracemalloc peak of building the records plus the
+# copy made for writing; the strings themselves are shared, so the difference
+# is the per-row containers.
+
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import FIELDS, Record, RecordBatch  # noqa: E402
+
+FIELDNAMES = list(FIELDS) + ['City']
+
+
+def make_values(rows, seed=7):
+    rng = random.Random(seed)
+    return [(f"Business {i}", f"{rng.randint(1, 999)} Main Road, Area {i % 300}",
+             f"0{rng.randint(7000000000, 9999999999)}" if rng.random() < 0.8 else '') for i in range(rows)]
+
+
+def dicts(values, city):
+    data = [{'Name': name, 'Address': address, 'Phone': phone} for name, address, phone in values]
+    with_city = []
+    for record in data:
+        record = record.copy()
+        record['City'] = city
+        with_city.append(record)
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=FIELDNAMES)
+    writer.writeheader()
+    writer.writerows(with_city)
+    return data, with_city, out
+
+
+def slotted(values, city):
+    data = [Record(name, address, phone) for name, address, phone in values]
+    batch = RecordBatch.from_records(data, city)
+    out = io.StringIO()
+    batch.write_csv(out, FIELDNAMES)
+    return data, batch, out
+
+
+def measure(name, build, values, city):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(values, city)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    csv_bytes = len(result[-1].getvalue())
+    del result
+    print(f"{name:<28} {seconds * 1000:9.1f} ms   peak {peak / 1e6:8.1f} MB (incl. {csv_bytes / 1e6:.1f} MB of CSV text)")
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare dict records with Record / RecordBatch')
+    parser.add_argument('--rows', type=int, default=100_000)
+    args = parser.parse_args()
+
+    values = make_values(args.rows)
+    print(f"{args.rows} records, one city\n")
+    old_seconds, old_peak = measure('dicts + copy + DictWriter', dicts, values, 'Mumbai')
+    new_seconds, new_peak = measure('Record + RecordBatch', slotted, values, 'Mumbai')
+    print(f"\nPeak memory {new_peak / old_peak:.0%} of the dict pipeline, time {new_seconds / old_seconds:.0%}")
+
+
+if __name__ == '__main__':
+    main()
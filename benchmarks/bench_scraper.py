@@ -0,0 +1,219 @@
+# benchmarks/bench_scraper.py
+#
+# Scraper benchmark against the offline stand-in site (fake_justdial.py).
+#
+#   python benchmarks/bench_scraper.py --cards 300 --latency-ms 100 --headless
+#   python benchmarks/bench_scraper.py --sleep-scale 0 --json bench_scraper.json
+#
+# Starts the stand-in server and one Chrome (main.create_driver), then times
+# three phases on the same search:
+#
+#   extraction   scrape_page_data on a fully loaded page (--repeat runs)
+#   scrolling    scroll_until_no_more_content from a fresh page load
+#   end_to_end   collect_listings: page load, popups, scrolling, extraction
+#
+# For each phase it reports wall time, records/s, the number of WebDriver
+# commands (every driver and element call goes through driver.execute) and how
+# the time splits into WebDriver round trips, sleeps and everything else.
+# --sleep-scale multiplies the scraper's fixed sleeps (0 = skip them) to see
+# what the code itself costs; WebDriverWait timeouts still run in full, and
+# scroll pauses run in the page (utils.scroll_step) and follow --scroll-pause.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main as scraper  # noqa: E402
+from selenium.webdriver.common.by import By  # noqa: E402
+from fake_justdial import FakeJustDial  # noqa: E402
+
+
+class DriverCallCounter:
+    """Counts the WebDriver commands sent through driver.execute and the time spent in them."""
+
+    def __init__(self, driver):
+        self.commands = Counter()
+        self.seconds = 0.0
+        self._execute = driver.execute
+
+        def execute(command, params=None):
+            start = time.perf_counter()
+            try:
+                return self._execute(command, params)
+            finally:
+                self.seconds += time.perf_counter() - start
+                self.commands[command] += 1
+
+        driver.execute = execute
+
+    def snapshot(self):
+        return sum(self.commands.values()), self.seconds, Counter(self.commands)
+
+
+class SleepMeter:
+    """
+    Replaces time.sleep while installed: sleeps from the benchmark thread are
+    scaled by `scale` and added up, other threads sleep as usual.
+    """
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.requested = 0.0
+        self.slept = 0.0
+        self._owner = threading.get_ident()
+        self._sleep = time.sleep
+
+    def __call__(self, seconds):
+        if threading.get_ident() != self._owner:
+            return self._sleep(seconds)
+        start = time.perf_counter()
+        self.requested += seconds
+        if seconds * self.scale > 0:
+            self._sleep(seconds * self.scale)
+        self.slept += time.perf_counter() - start
+
+    def __enter__(self):
+        time.sleep = self
+        return self
+
+    def __exit__(self, *exc):
+        time.sleep = self._sleep
+
+
+class Phase:
+    """Wall time plus the WebDriver and sleep time spent inside the with block."""
+
+    def __init__(self, name, counter, sleeps):
+        self.name = name
+        self.counter = counter
+        self.sleeps = sleeps
+
+    def __enter__(self):
+        self._calls, self._driver_seconds, self._commands = self.counter.snapshot()
+        self._slept = self.sleeps.slept
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._start
+        calls, driver_seconds, commands = self.counter.snapshot()
+        self.calls = calls - self._calls
+        self.driver_seconds = driver_seconds - self._driver_seconds
+        self.sleep_seconds = self.sleeps.slept - self._slept
+        self.commands = commands - self._commands
+
+
+def phase_result(phase, records, runs=1, **extra):
+    seconds = phase.seconds / runs
+    return {
+        'seconds': round(seconds, 3),
+        'records': records,
+        'records_per_second': round(records / seconds, 1) if seconds else 0.0,
+        'webdriver_calls': phase.calls // runs,
+        'calls_per_record': round(phase.calls / runs / records, 2) if records else None,
+        'webdriver_seconds': round(phase.driver_seconds / runs, 3),
+        'sleep_seconds': round(phase.sleep_seconds / runs, 3),
+        'other_seconds': round((phase.seconds - phase.driver_seconds - phase.sleep_seconds) / runs, 3),
+        'top_commands': dict(phase.commands.most_common(5)),
+        **extra,
+    }
+
+
+def load_everything(driver, url):
+    """Open the search and scroll until every card is on the page, without timing it."""
+    driver.get(url)
+    scraper.scroll_until_no_more_content(driver, scroll_pause=0.3, max_no_content_scrolls=3)
+
+
+def run(args):
+    site = FakeJustDial(cards=args.cards, page_size=args.page_size, latency_ms=args.latency_ms,
+                        jitter_ms=args.jitter_ms, popup_rate=args.popup_rate,
+                        maybe_later_rate=args.maybe_later_rate, hidden_phone_rate=args.hidden_phone_rate)
+    base_url = site.start()
+    url = scraper.build_search_url(args.city, args.keyword, base_url=base_url)
+    if args.headless:
+        os.environ['JD_HEADLESS'] = '1'
+
+    print(f"Fake JustDial at {base_url}, {args.cards} cards in batches of {args.page_size}, "
+          f"{args.latency_ms} ms latency")
+    results = {}
+    driver = scraper.create_driver()
+    counter = DriverCallCounter(driver)
+    try:
+        with SleepMeter(args.sleep_scale) as sleeps:
+            load_everything(driver, url)
+            with Phase('extraction', counter, sleeps) as phase:
+                for _ in range(args.repeat):
+                    records = scraper.scrape_page_data(driver)
+            results['extraction'] = phase_result(phase, len(records), runs=args.repeat)
+
+            driver.get(url)
+            scrolls = []
+            with Phase('scrolling', counter, sleeps) as phase:
+                scraper.scroll_until_no_more_content(driver, scroll_pause=args.scroll_pause,
+                                                     on_scroll=lambda count, height, new: scrolls.append(new))
+            cards = len(driver.find_elements(By.CLASS_NAME, 'resultbox_info'))
+            results['scrolling'] = phase_result(phase, cards, scrolls=len(scrolls),
+                                                scrolls_with_new_content=sum(scrolls))
+
+            with Phase('end_to_end', counter, sleeps) as phase:
+                records, stop_reason = scraper.collect_listings(driver, url)
+            results['end_to_end'] = phase_result(phase, len(records), stop_reason=stop_reason)
+    finally:
+        driver.quit()
+        site.stop()
+
+    return {
+        'config': {key: value for key, value in vars(args).items() if key != 'json'},
+        'server_requests': site.requests,
+        'phases': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against fake_justdial.py")
+    parser.add_argument('--cards', type=int, default=200)
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=30)
+    parser.add_argument('--popup-rate', type=float, default=0.1)
+    parser.add_argument('--maybe-later-rate', type=float, default=1.0)
+    parser.add_argument('--hidden-phone-rate', type=float, default=0.2)
+    parser.add_argument('--city', default='Jaipur')
+    parser.add_argument('--keyword', default='builders')
+    parser.add_argument('--repeat', type=int, default=3, help='extraction runs')
+    parser.add_argument('--scroll-pause', type=float, default=2, help='scroll_pause for the scrolling phase')
+    parser.add_argument('--sleep-scale', type=float, default=1.0, help="multiplier for the scraper's sleeps")
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    report = run(args)
+
+    print(f"\n{'='*100}")
+    print(f"{'phase':<12}{'seconds':>9}{'records':>9}{'rec/s':>9}{'calls':>8}{'calls/rec':>10}"
+          f"{'webdriver s':>13}{'sleep s':>9}{'other s':>9}")
+    for name, r in report['phases'].items():
+        print(f"{name:<12}{r['seconds']:>9.2f}{r['records']:>9}{r['records_per_second']:>9.1f}"
+              f"{r['webdriver_calls']:>8}{r['calls_per_record'] or 0:>10.2f}{r['webdriver_seconds']:>13.2f}"
+              f"{r['sleep_seconds']:>9.2f}{r['other_seconds']:>9.2f}")
+    for name, r in report['phases'].items():
+        print(f"{name} top commands: {r['top_commands']}")
+    print(f"Server requests: {report['server_requests']}")
+    print(f"{'='*100}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
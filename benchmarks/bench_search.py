@@ -0,0 +1,127 @@
+# benchmarks/bench_search.py
+#
+# Synthetic benchmark for search_index.SearchIndex.
+#
+#   python benchmarks/bench_search.py --rows 2000000
+#
+# Writes batch-style CSVs (one per keyword, City column) into a temporary
+# Scrapped/ folder, builds the index, appends to one file to time an
+# incremental update, then reports query latency percentiles.
+
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import search_index  # noqa: E402
+
+WORDS = ['sharma', 'gupta', 'shree', 'balaji', 'krishna', 'royal', 'city', 'modern', 'national',
+         'jain', 'star', 'galaxy', 'sai', 'om', 'new', 'classic', 'prime', 'global', 'metro', 'singh',
+         'laxmi', 'ganesh', 'vinayak', 'aditya', 'surya', 'kaveri', 'narmada', 'everest', 'lotus', 'apex']
+KEYWORDS = ['builders', 'plumbers', 'electricians', 'contractors', 'interior designers', 'car mechanics',
+            'dentists', 'caterers', 'packers and movers', 'chartered accountants']
+CITIES = ['Mumbai', 'Delhi', 'Thane', 'Jaipur', 'Pune', 'Ghaziabad', 'Kalyan-Dombivli', 'Bengaluru',
+          'Chennai', 'Hyderabad', 'Kolkata', 'Ahmedabad', 'Lucknow', 'Indore', 'Surat']
+AREAS = ['MI Road', 'Andheri West', 'Sector 62', 'Koramangala', 'Malviya Nagar', 'Baner', 'Civil Lines',
+         'Salt Lake', 'Banjara Hills', 'Navrangpura', 'Hazratganj', 'Vijay Nagar', 'Adajan', 'T Nagar']
+
+QUERIES = [
+    ('sharma', {}),
+    ('sharma builders', {}),
+    ('balaji', {'city': 'Jaipur'}),
+    ('krishna', {'keyword': 'plumbers'}),
+    ('royal interior', {'city': 'Mumbai', 'keyword': 'interior designers'}),
+    ('koramangala', {}),
+    ('gal', {}),
+    ('everest packers', {'city': 'Pune'}),
+    ('apex lotus', {}),
+]
+
+
+def write_dataset(folder, rows, seed=7):
+    rng = np.random.default_rng(seed)
+    per_keyword = rows // len(KEYWORDS)
+    paths = []
+    for keyword in KEYWORDS:
+        first = rng.choice(WORDS, per_keyword)
+        second = rng.choice(WORDS, per_keyword)
+        cities = rng.choice(CITIES, per_keyword)
+        areas = rng.choice(AREAS, per_keyword)
+        numbers = rng.integers(1, 999, per_keyword)
+        phones = rng.integers(7_000_000_000, 9_999_999_999, per_keyword)
+        trade = keyword.title()
+        path = os.path.join(folder, f"{keyword.replace(' ', '_')}.csv")
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Name', 'Address', 'Phone', 'City'])
+            for i in range(per_keyword):
+                writer.writerow([f"{first[i].title()} {second[i].title()} {trade}",
+                                 f"{numbers[i]}, {areas[i]}, {cities[i]}", str(phones[i]), cities[i]])
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per query')
+    parser.add_argument('--keep', action='store_true', help='keep the temporary folder')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_search_')
+    scrapped = os.path.join(workdir, 'Scrapped')
+    os.makedirs(scrapped)
+    try:
+        print(f"Writing {args.rows} synthetic rows to {scrapped}...")
+        paths = write_dataset(scrapped, args.rows)
+
+        index = search_index.SearchIndex(os.path.join(workdir, 'search_index.db'), roots=[scrapped])
+        start = time.perf_counter()
+        index.update(verbose=False)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        index.optimize()
+        optimize = time.perf_counter() - start
+
+        # Incremental update: append 1,000 rows to one file
+        with open(paths[0], 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            for i in range(1000):
+                writer.writerow([f"Fresh Listing {i} Builders", 'MI Road, Jaipur', str(6_000_000_000 + i), 'Jaipur'])
+        start = time.perf_counter()
+        appended = index.update(verbose=False)
+        incremental = time.perf_counter() - start
+
+        print(f"\n{'='*60}")
+        print(f"Rows indexed:       {index.count():,}")
+        print(f"Full build:         {build:8.2f}s ({args.rows / build:,.0f} rows/s)")
+        print(f"Optimize:           {optimize:8.2f}s")
+        print(f"Incremental update: {incremental:8.2f}s ({appended} appended rows)")
+        print(f"Index size:         {os.path.getsize(index.path) / 1e6:8.1f} MB")
+        print(f"\n{'query':<40}{'matches':>10}{'p50 ms':>10}{'p95 ms':>10}{'facets':>10}")
+        for text, filters in QUERIES:
+            timings, faceted = [], []
+            for _ in range(args.repeat):
+                result = index.search(text, limit=20, **filters)
+                timings.append(result['took_ms'])
+                faceted.append(index.search(text, limit=20, facets=True, **filters)['took_ms'])
+            label = text + (f" {filters}" if filters else '')
+            print(f"{label[:39]:<40}{result['total']:>10,}{np.percentile(timings, 50):>10.1f}"
+                  f"{np.percentile(timings, 95):>10.1f}{np.percentile(faceted, 50):>10.1f}")
+        print(f"{'='*60}")
+    finally:
+        if args.keep:
+            print(f"Kept {workdir}")
+        else:
+            shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
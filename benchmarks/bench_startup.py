@@ -0,0 +1,98 @@
+# benchmarks/bench_startup.py
+#
+# API cold start benchmark and regression guard.
+#
+#   python benchmarks/bench_startup.py --runs 5
+#   python benchmarks/bench_startup.py --max-import-ms 800 --json startup.json
+#
+# Each run starts a fresh interpreter (no OPENAI_API_KEY) that times
+# `import api`, lists which heavy modules the import pulled in, then times the
+# first /health and /config requests through FastAPI's TestClient (lifespan
+# included). Reports medians and exits with status 1 when a module that should
+# load lazily (selenium, webdriver_manager, openai, pyarrow, pandas) was
+# imported, or when the import is slower than --max-import-ms.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a scrape, an LLM call or a Parquet write actually happens
+LAZY_MODULES = ['selenium', 'webdriver_manager', 'openai', 'pyarrow', 'pandas', 'main', 'batch_scraper']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import api
+import_ms = (time.perf_counter() - start) * 1000
+loaded = [m for m in {lazy!r} if m in sys.modules]
+
+from fastapi.testclient import TestClient
+timings = {{}}
+with TestClient(api.app) as client:
+    for path in ('/health', '/config'):
+        start = time.perf_counter()
+        status = client.get(path).status_code
+        timings[path] = {{'ms': (time.perf_counter() - start) * 1000, 'status': status}}
+print(json.dumps({{'import_ms': import_ms, 'loaded': loaded, 'requests': timings}}))
+"""
+
+
+def probe():
+    env = {key: value for key, value in os.environ.items() if key != 'OPENAI_API_KEY'}
+    env['JD_PREWARM_BROWSERS'] = '0'
+    result = subprocess.run([sys.executable, '-c', PROBE.format(lazy=LAZY_MODULES)], cwd=REPO, env=env,
+                            capture_output=True, text=True, timeout=120)
+    if result.returncode != 0:
+        raise SystemExit(f"Probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the API's cold start")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, default=None, help='fail when the median import is slower')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.runs)]
+    report = {
+        'runs': args.runs,
+        'import_ms': round(statistics.median(r['import_ms'] for r in runs), 1),
+        'first_health_ms': round(statistics.median(r['requests']['/health']['ms'] for r in runs), 1),
+        'first_config_ms': round(statistics.median(r['requests']['/config']['ms'] for r in runs), 1),
+        'eagerly_loaded': sorted({m for r in runs for m in r['loaded']}),
+        'statuses': sorted({r['requests'][path]['status'] for r in runs for path in r['requests']}),
+    }
+
+    print(f"\n{'='*60}")
+    print(f"import api (median of {args.runs}):  {report['import_ms']:8.1f} ms")
+    print(f"first GET /health:             {report['first_health_ms']:8.1f} ms")
+    print(f"first GET /config:             {report['first_config_ms']:8.1f} ms")
+    print(f"Lazy modules loaded on import: {', '.join(report['eagerly_loaded']) or 'none'}")
+    print(f"{'='*60}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+
+    failures = []
+    if report['eagerly_loaded']:
+        failures.append(f"imported at startup: {', '.join(report['eagerly_loaded'])}")
+    if args.max_import_ms is not None and report['import_ms'] > args.max_import_ms:
+        failures.append(f"import took {report['import_ms']} ms (limit {args.max_import_ms} ms)")
+    if report['statuses'] != [200]:
+        failures.append(f"unexpected status codes {report['statuses']}")
+    if failures:
+        print("✗ Startup regression: " + "; ".join(failures))
+        sys.exit(1)
+    print("✓ Startup within limits")
+
+
+if __name__ == '__main__':
+    main()
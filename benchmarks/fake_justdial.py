@@ -0,0 +1,309 @@
+# benchmarks/fake_justdial.py
+#
+# Offline stand-in for JustDial's search pages, for benchmarking the scraper
+# without touching the live site.
+#
+#   python benchmarks/fake_justdial.py --port 8765 --cards 300 --latency-ms 150
+#   JD_BASE_URL=http://127.0.0.1:8765/ python batch_scraper.py
+#
+# Serves /<city>/<keyword>/ (and /<city>/<keyword>-in-<locality>/) with the
+# real result card markup (resultbox_info, resultbox_title_anchor, callcontent,
+# resultbox_address). The first page_size cards come with the page; the rest
+# load in page_size batches from /_cards as the visitor nears the bottom, after
+# the configured latency, until the search's card count is reached. A
+# 'maybelater' popup may show on load and 'jd_modal_close' popups may show after
+# a batch loads. Detail pages (/detail/<id>) carry the phone in a tel: link.
+#
+# Listings are generated from a seed and the search path, so every run of a
+# search sees the same businesses. ?cards=N on a search URL overrides the count.
+
+import argparse
+import html
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+WORDS = ['Sharma', 'Gupta', 'Shree', 'Balaji', 'Krishna', 'Royal', 'City', 'Modern', 'National',
+         'Jain', 'Star', 'Galaxy', 'Sai', 'Om', 'New', 'Classic', 'Prime', 'Global', 'Metro', 'Singh']
+AREAS = ['MI Road', 'Andheri West', 'Sector 62', 'Koramangala', 'Malviya Nagar', 'Baner', 'Civil Lines',
+         'Salt Lake', 'Banjara Hills', 'Navrangpura', 'Hazratganj', 'Vijay Nagar', 'Adajan', 'T Nagar']
+
+# Wall clock sleeps that benchmarks instrumenting time.sleep must not see
+_sleep = time.sleep
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title} - Fake JustDial</title>
+<style>
+body {{ font-family: sans-serif; margin: 0; }}
+.resultbox_info {{ min-height: 160px; margin: 12px; padding: 12px; border-bottom: 1px solid #ddd; }}
+.jd_modal {{ position: fixed; top: 30%; left: 30%; padding: 24px; background: #fff; border: 1px solid #999; z-index: 10; }}
+#loader {{ height: 60px; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div id="results">{cards}</div>
+<div id="loader"></div>
+{maybe_later}
+<script>
+var config = {config};
+var loaded = config.loaded, loading = false;
+
+function showModal(html) {{
+  var modal = document.createElement('div');
+  modal.className = 'jd_modal';
+  modal.innerHTML = html;
+  document.body.appendChild(modal);
+  var close = modal.querySelector('.jd_modal_close, .maybelater');
+  close.addEventListener('click', function () {{ modal.remove(); }});
+}}
+
+function loadMore() {{
+  if (loading || loaded >= config.total) return;
+  loading = true;
+  fetch(config.cardsUrl + '&offset=' + loaded)
+    .then(function (response) {{ return response.json(); }})
+    .then(function (batch) {{
+      document.getElementById('results').insertAdjacentHTML('beforeend', batch.html);
+      loaded += batch.count;
+      loading = false;
+      if (Math.random() < config.popupRate) {{
+        showModal('<p>Get the JustDial app</p><span class="jd_modal_close">&times;</span>');
+      }}
+    }})
+    .catch(function () {{ loading = false; }});
+}}
+
+window.addEventListener('scroll', function () {{
+  if (window.pageYOffset + window.innerHeight >= document.body.scrollHeight - window.innerHeight) {{
+    loadMore();
+  }}
+}});
+
+var maybeLater = document.querySelector('.maybelater');
+if (maybeLater) {{
+  maybeLater.addEventListener('click', function () {{ maybeLater.parentNode.remove(); }});
+}}
+</script>
+</body>
+</html>
+"""
+
+MAYBE_LATER = '<div class="jd_modal"><p>Allow notifications?</p><button class="maybelater">Maybe Later</button></div>'
+
+CARD = """<div class="resultbox_info">
+<div class="resultbox_title"><a class="resultbox_title_anchor" href="{link}">{name}</a></div>
+<div class="resultbox_rating">{rating} ★</div>
+<div class="resultbox_address">{address}</div>
+<div class="callbutton"><span class="callcontent">{phone}</span></div>
+</div>"""
+
+DETAIL = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{name}</title></head>
+<body>
+<h1>{name}</h1>
+<div class="address">{address}</div>
+<a class="callNowAnchor" href="tel:{phone}">Call {phone}</a>
+</body></html>
+"""
+
+
+class Listing:
+    """One synthetic business, derived from (seed, search path, position)."""
+
+    def __init__(self, seed, search, index, hidden_phone_rate):
+        rng = random.Random(f"{seed}|{search}|{index}")
+        city = search.strip('/').split('/')[0].replace('-', ' ').title()
+        trade = search.strip('/').split('/')[-1].split('-in-')[0].replace('-', ' ').title()
+        self.id = f"{zlib.crc32(search.encode('utf-8')):08x}{index:05d}"
+        self.name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {trade}"
+        self.address = f"{rng.randint(1, 999)}, {rng.choice(AREAS)}, {city}"
+        self.phone = f"0{rng.randint(7_000_000_000, 9_999_999_999)}"
+        self.hidden = rng.random() < hidden_phone_rate
+        self.rating = round(rng.uniform(3.0, 5.0), 1)
+
+    def card(self):
+        return CARD.format(link=f"/detail/{self.id}", name=html.escape(self.name), rating=self.rating,
+                           address=html.escape(self.address), phone='Show Number' if self.hidden else self.phone)
+
+
+class FakeJustDial:
+    """
+    The stand-in server. start() serves it from a background thread and
+    returns the base URL to pass to main.build_search_url(base_url=...);
+    stop() shuts it down. `requests` counts the requests served per route.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, cards=200, page_size=10, latency_ms=150, jitter_ms=50,
+                 popup_rate=0.1, maybe_later_rate=0.5, hidden_phone_rate=0.2, seed=7):
+        self.host = host
+        self.port = port
+        self.cards = cards
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.popup_rate = popup_rate
+        self.maybe_later_rate = maybe_later_rate
+        self.hidden_phone_rate = hidden_phone_rate
+        self.seed = seed
+        self.requests = {'search': 0, 'cards': 0, 'detail': 0}
+        self._details = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-justdial', daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _delay(self):
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        _sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def _chance(self, rate):
+        with self._lock:
+            return self._rng.random() < rate
+
+    def _count(self, route):
+        with self._lock:
+            self.requests[route] += 1
+
+    def listings(self, search, offset, limit, total):
+        batch = [Listing(self.seed, search, i, self.hidden_phone_rate)
+                 for i in range(offset, min(offset + limit, total))]
+        with self._lock:
+            for listing in batch:
+                self._details[listing.id] = listing
+        return batch
+
+    def search_page(self, search, total):
+        self._count('search')
+        self._delay()
+        first = self.listings(search, 0, self.page_size, total)
+        config = {
+            'loaded': len(first),
+            'total': total,
+            'cardsUrl': f"/_cards?search={search}&cards={total}",
+            'popupRate': self.popup_rate,
+        }
+        return PAGE.format(
+            title=html.escape(search.strip('/').replace('/', ' / ')),
+            cards='\n'.join(listing.card() for listing in first),
+            maybe_later=MAYBE_LATER if self._chance(self.maybe_later_rate) else '',
+            config=json.dumps(config),
+        )
+
+    def cards_batch(self, search, offset, total):
+        self._count('cards')
+        self._delay()
+        batch = self.listings(search, offset, self.page_size, total)
+        return json.dumps({'html': '\n'.join(listing.card() for listing in batch), 'count': len(batch)})
+
+    def detail_page(self, listing_id):
+        self._count('detail')
+        self._delay()
+        with self._lock:
+            listing = self._details.get(listing_id)
+        if listing is None:
+            return None
+        return DETAIL.format(name=html.escape(listing.name), address=html.escape(listing.address),
+                             phone=listing.phone)
+
+    def _handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                path = parts.path
+                if path == '/_cards':
+                    search = query.get('search', ['/'])[0]
+                    total = int(query.get('cards', [site.cards])[0])
+                    offset = int(query.get('offset', ['0'])[0])
+                    self._send(200, site.cards_batch(search, offset, total), 'application/json')
+                elif path.startswith('/detail/'):
+                    page = site.detail_page(path[len('/detail/'):].strip('/'))
+                    if page is None:
+                        self._send(404, 'Not found', 'text/plain')
+                    else:
+                        self._send(200, page, 'text/html')
+                elif len([p for p in path.split('/') if p]) == 2:
+                    total = int(query.get('cards', [site.cards])[0])
+                    self._send(200, site.search_page(path, total), 'text/html')
+                else:
+                    self._send(404, 'Not found', 'text/plain')
+
+            def _send(self, status, body, content_type):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', f"{content_type}; charset=utf-8")
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an offline JustDial stand-in")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cards', type=int, default=200, help='listings per search')
+    parser.add_argument('--page-size', type=int, default=10, help='cards per lazy-loaded batch')
+    parser.add_argument('--latency-ms', type=float, default=150)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--popup-rate', type=float, default=0.1, help='chance of a jd_modal_close popup per batch')
+    parser.add_argument('--maybe-later-rate', type=float, default=0.5, help='chance of the maybelater popup on load')
+    parser.add_argument('--hidden-phone-rate', type=float, default=0.2, help='share of cards showing "Show Number"')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    site = FakeJustDial(args.host, args.port, args.cards, args.page_size, args.latency_ms, args.jitter_ms,
+                        args.popup_rate, args.maybe_later_rate, args.hidden_phone_rate, args.seed)
+    base_url = site.start()
+    print(f"Fake JustDial serving {args.cards} listings per search at {base_url}")
+    print(f"Try {base_url}jaipur/builders/ or set JD_BASE_URL={base_url}")
+    try:
+        while True:
+            _sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+# benchmarks/load_test.py
+#
+# Load test for api.py with the browser and the LLM replaced by fakes.
+#
+#   python benchmarks/load_test.py --users 20 --duration 60 --out load_test.json
+#   python benchmarks/load_test.py --scrape-latency-ms 3000 --failure-rate 0.05 --rows 2000
+#
+# Starts the API in a subprocess (`load_test.py serve`), where api.run_scrape
+# and api.client are swapped for fakes with configurable latency, failure rate
+# and output size. Scrapes write real CSVs into a temporary working folder.
+# Then `--users` closed-loop clients send a weighted mix of /scrape/manual,
+# /scrape/nl, /download and /config requests for `--duration` seconds.
+#
+# Reports p50/p95/p99 latency, throughput and error rate per endpoint and
+# overall, and writes them to `--out` (JSON) for comparing runs.
+
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from types import SimpleNamespace
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEARCHES = ['builders', 'plumbers', 'electricians', 'interior designers', 'car mechanics', 'caterers']
+WORDS = ['Sharma', 'Gupta', 'Shree', 'Balaji', 'Krishna', 'Royal', 'Modern', 'National', 'Star', 'Galaxy']
+DEFAULT_MIX = 'manual=3,nl=2,download=3,config=2'
+
+
+# ---------------------------------------------------------------------------
+# Server side: fakes swapped into api.py
+# ---------------------------------------------------------------------------
+
+class Fault:
+    """Latency (mean ± jitter, in ms) and a failure rate shared by the fakes."""
+
+    def __init__(self, latency_ms, jitter_ms, failure_rate, seed):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait_or_fail(self, what):
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"injected {what} failure")
+
+
+class FakeScraper:
+    """Stands in for main.run_scrape: waits, maybe fails, writes `rows` synthetic records."""
+
+    def __init__(self, fault, rows):
+        self.fault = fault
+        self.rows = rows
+
+    def __call__(self, city, keyword, on_event=None, max_results=None, **options):
+        self.fault.wait_or_fail('scrape')
+        rows = self.rows if max_results is None else min(self.rows, max_results)
+        rng = random.Random(f"{city}|{keyword}")
+        records = [{'Name': f"{rng.choice(WORDS)} {rng.choice(WORDS)} {keyword.title()}",
+                    'Address': f"{rng.randint(1, 999)}, Main Road, {city}",
+                    'Phone': f"0{rng.randint(7_000_000_000, 9_999_999_999)}"} for _ in range(rows)]
+        if on_event is not None:
+            on_event("records", {"records": records})
+
+        os.makedirs("Scrapped", exist_ok=True)
+        csv_path = os.path.join("Scrapped", f"{city.lower().replace(' ', '-')}_{keyword.lower().replace(' ', '-')}.csv")
+        # Concurrent requests for the same search rewrite the same file; publish it atomically
+        tmp_path = f"{csv_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['Name', 'Address', 'Phone'])
+            writer.writeheader()
+            writer.writerows(records)
+        os.replace(tmp_path, csv_path)
+        return {"csv_path": csv_path, "records": rows, "truncated": False, "stop_reason": None,
+                "shards": 1, "enrichment": None}
+
+
+class FakeOpenAI:
+    """Stands in for the OpenAI client: chat.completions.create returns a parsed cities/search JSON."""
+
+    def __init__(self, fault, cities):
+        self.fault = fault
+        self.cities = cities
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.fault.wait_or_fail('LLM')
+        rng = random.Random()
+        content = json.dumps({'cities': rng.sample(self.cities, 2), 'search': rng.choice(SEARCHES)})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def serve(args):
+    os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+    sys.path.insert(0, REPO)
+    os.chdir(REPO)
+    import uvicorn
+    import api
+
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    shutil.copy(os.path.join(REPO, 'cities.json'), workdir)
+    os.chdir(workdir)
+
+    cities = api.load_json_file('cities.json', key='cities')
+    scrape_fault = Fault(args.scrape_latency_ms, args.scrape_jitter_ms, args.failure_rate, args.seed)
+    llm_fault = Fault(args.llm_latency_ms, args.llm_jitter_ms, args.llm_failure_rate, args.seed + 1)
+    api.run_scrape = FakeScraper(scrape_fault, args.rows)
+    api.client = FakeOpenAI(llm_fault, cities)
+
+    # Something to download before the first scrape finishes
+    FakeScraper(Fault(0, 0, 0, 0), args.rows)(cities[0], SEARCHES[0])
+    print(f"Fake API in {workdir} on port {args.port}", flush=True)
+    try:
+        uvicorn.run(api.app, host='127.0.0.1', port=args.port, log_level='warning')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Client side: closed-loop users
+# ---------------------------------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.error_kinds = {}
+        self.csv_paths = set()
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, error=None):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            self.errors.setdefault(endpoint, 0)
+            if error:
+                self.errors[endpoint] += 1
+                self.error_kinds[error] = self.error_kinds.get(error, 0) + 1
+
+
+def request(base_url, method, path, body=None, timeout=120):
+    """(status, body bytes); network errors raise."""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'} if data else {})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def user(base_url, mix, cities, recorder, stop_at, think_ms, seed, max_results):
+    rng = random.Random(seed)
+    endpoints, weights = zip(*mix.items())
+    while time.monotonic() < stop_at:
+        endpoint = rng.choices(endpoints, weights)[0]
+        if endpoint == 'manual':
+            body = {'cities': rng.sample(cities, rng.randint(1, 2)), 'search': rng.choice(SEARCHES)}
+            if max_results:
+                body['max_results'] = max_results
+            method, path = 'POST', '/scrape/manual'
+        elif endpoint == 'nl':
+            body = {'query': f"{rng.choice(SEARCHES)} in {rng.choice(cities)}"}
+            if max_results:
+                body['max_results'] = max_results
+            method, path = 'POST', '/scrape/nl'
+        elif endpoint == 'download':
+            with recorder._lock:
+                paths = sorted(recorder.csv_paths)
+            body = None
+            method = 'GET'
+            path = '/download?' + urllib.parse.urlencode({'csv_path': rng.choice(paths)})
+        else:
+            body, method, path = None, 'GET', '/config'
+
+        start = time.perf_counter()
+        try:
+            status, payload = request(base_url, method, path, body)
+            error = f"HTTP {status}" if status >= 400 else None
+        except Exception as e:
+            payload, error = b'', type(e).__name__
+        recorder.add(endpoint, time.perf_counter() - start, error)
+
+        if endpoint in ('manual', 'nl') and not error:
+            results = json.loads(payload).get('results', [])
+            with recorder._lock:
+                recorder.csv_paths.update(r['csv_path'] for r in results)
+        if think_ms:
+            time.sleep(think_ms / 1000)
+
+
+def summarize(samples, errors, seconds):
+    timings = np.array(samples) * 1000
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'throughput_rps': round(len(samples) / seconds, 2),
+        'p50_ms': round(float(np.percentile(timings, 50)), 1),
+        'p95_ms': round(float(np.percentile(timings, 95)), 1),
+        'p99_ms': round(float(np.percentile(timings, 99)), 1),
+        'mean_ms': round(float(timings.mean()), 1),
+        'max_ms': round(float(timings.max()), 1),
+    }
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ('manual', 'nl', 'download', 'config'):
+            raise SystemExit(f"Unknown endpoint in --mix: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(base_url, server, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"API server exited with code {server.returncode}")
+        try:
+            if request(base_url, 'GET', '/health', timeout=2)[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit("API server did not come up")
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args):
+    mix = parse_mix(args.mix)
+    port = args.port or free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server_args = [sys.executable, os.path.abspath(__file__), 'serve', '--port', str(port)]
+    for name in ('scrape_latency_ms', 'scrape_jitter_ms', 'failure_rate', 'llm_latency_ms', 'llm_jitter_ms',
+                 'llm_failure_rate', 'rows', 'seed'):
+        server_args += [f"--{name.replace('_', '-')}", str(getattr(args, name))]
+    # Injected failures print tracebacks server-side; keep them out of the report unless asked for
+    log = open(args.server_log, 'w') if args.server_log else subprocess.DEVNULL
+    server = subprocess.Popen(server_args, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        wait_until_up(base_url, server)
+        cities = json.loads(request(base_url, 'GET', '/config')[1])['cities']
+        recorder = Recorder()
+        recorder.csv_paths.add(os.path.join('Scrapped', f"{cities[0].lower()}_{SEARCHES[0]}.csv"))
+
+        print(f"Running {args.users} users for {args.duration}s against {base_url} (mix {mix})")
+        start = time.monotonic()
+        stop_at = start + args.duration
+        threads = [threading.Thread(target=user, args=(base_url, mix, cities, recorder, stop_at, args.think_ms,
+                                                       args.seed + i, args.max_results))
+                   for i in range(args.users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.monotonic() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        if args.server_log:
+            log.close()
+
+    all_samples = [s for samples in recorder.samples.values() for s in samples]
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': git_revision(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('command', 'out', 'server_log')},
+        'duration_seconds': round(seconds, 2),
+        'overall': summarize(all_samples, sum(recorder.errors.values()), seconds),
+        'endpoints': {endpoint: summarize(samples, recorder.errors[endpoint], seconds)
+                      for endpoint, samples in sorted(recorder.samples.items())},
+        'error_kinds': recorder.error_kinds,
+    }
+
+
+def add_fake_arguments(parser):
+    parser.add_argument('--scrape-latency-ms', type=float, default=500, help='fake run_scrape time per city')
+    parser.add_argument('--scrape-jitter-ms', type=float, default=200)
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='share of fake scrapes that raise')
+    parser.add_argument('--llm-latency-ms', type=float, default=800, help='fake OpenAI call time')
+    parser.add_argument('--llm-jitter-ms', type=float, default=300)
+    parser.add_argument('--llm-failure-rate', type=float, default=0.0)
+    parser.add_argument('--rows', type=int, default=500, help='records per fake scrape (CSV size)')
+    parser.add_argument('--seed', type=int, default=7)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test api.py with a fake scraper and LLM")
+    commands = parser.add_subparsers(dest='command')
+    serve_parser = commands.add_parser('serve', help='only run the API with the fakes')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    add_fake_arguments(serve_parser)
+
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='endpoint weights, e.g. manual=3,nl=2,download=3,config=2')
+    parser.add_argument('--think-ms', type=float, default=0, help='pause between a user\'s requests')
+    parser.add_argument('--max-results', type=int, default=None, help='max_results sent with scrapes')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--out', default='load_test.json')
+    parser.add_argument('--server-log', help='write the API server output to this file')
+    add_fake_arguments(parser)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args)
+        return
+
+    report = run(args)
+    print(f"\n{'='*92}")
+    print(f"{'endpoint':<12}{'requests':>10}{'errors':>8}{'err %':>8}{'req/s':>9}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, r in [*report['endpoints'].items(), ('overall', report['overall'])]:
+        print(f"{name:<12}{r['requests']:>10}{r['errors']:>8}{r['error_rate'] * 100:>8.1f}{r['throughput_rps']:>9.2f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}")
+    if report['error_kinds']:
+        print(f"Errors: {report['error_kinds']}")
+    print(f"{'='*92}")
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == '__main__':
+    main()
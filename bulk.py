@@ -0,0 +1,289 @@
+# bulk.py
+
+import csv
+import io
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+from dedup_index import record_key
+import metrics
+
+# Browsers shared by all bulk batches in the API process; batches queue behind each other
+BULK_WORKERS = int(os.getenv('JD_BULK_WORKERS', '2'))
+BULK_MAX_TASKS = int(os.getenv('JD_BULK_MAX_TASKS', '5000'))
+# Each batch writes its searches' CSVs to <JD_BULK_DIR>/<batch_id>/, apart from the shared Scrapped/ files
+BULK_DIR = os.getenv('JD_BULK_DIR', os.path.join('Scrapped', 'bulk'))
+# Client-chosen batch ids become a URL path segment and a folder name as they are
+BATCH_ID_PATTERN = re.compile(r'[A-Za-z0-9_.-]{1,128}')
+
+OUTPUT_FIELDS = ['Name', 'Address', 'Phone', 'City', 'Keyword']
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _clean(value):
+    return ' '.join(str(value).split())
+
+
+def parse_search_url(url):
+    """
+    (city, keyword, url) for a search URL. Plain {base}{city}/{keyword}/ URLs
+    come back as a pair (url None), so they dedup against the same search
+    given as city + keyword and can be sharded; others keep their URL.
+    """
+    segments = [unquote(s) for s in urlsplit(url).path.split('/') if s]
+    if len(segments) < 2:
+        raise ValueError(f"not a search URL (expected /<city>/<keyword>/): {url}")
+    city, keyword = (_clean(s.replace('-', ' ')) for s in segments[:2])
+    if len(segments) == 2 and '-in-' not in segments[1]:
+        return city, keyword, None
+    return city, keyword.split(' in ')[0], url
+
+
+def parse_text(text):
+    """
+    Tasks from an uploaded list: one "city,keyword" pair (comma or tab
+    separated) or one JustDial URL per line. Blank lines, "#" comments and a
+    "city,keyword" header are skipped. Returns (entries, errors) where entries
+    are (city, keyword) pairs or URL strings.
+    """
+    entries, errors = [], []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.lower().startswith(('http://', 'https://')):
+            entries.append(line)
+            continue
+        fields = next(csv.reader([line], delimiter='\t' if '\t' in line else ','))
+        fields = [f.strip() for f in fields]
+        if len(fields) < 2 or not fields[0] or not fields[1]:
+            errors.append(f"line {number}: expected 'city,keyword' or a URL")
+        elif [f.lower() for f in fields[:2]] != ['city', 'keyword']:
+            entries.append((fields[0], fields[1]))
+    return entries, errors
+
+
+class BulkTask:
+    __slots__ = ('index', 'city', 'keyword', 'url', 'status', 'records', 'csv_path', 'truncated',
+                 'stop_reason', 'error', 'seconds')
+
+    def __init__(self, index, city, keyword, url=None):
+        self.index = index
+        self.city = city
+        self.keyword = keyword
+        self.url = url
+        self.status = 'queued'
+        self.records = 0
+        self.csv_path = None
+        self.truncated = False
+        self.stop_reason = None
+        self.error = None
+        self.seconds = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class BulkBatch:
+    """One bulk submission: its deduplicated tasks, their progress and the consolidated output."""
+
+    def __init__(self, batch_id, tasks, duplicates, options, cancel_event, output_dir=None):
+        self.batch_id = batch_id
+        self.output_dir = output_dir or os.path.join(BULK_DIR, batch_id)
+        self.tasks = tasks
+        self.duplicates = duplicates
+        self.options = options
+        self.cancel_event = cancel_event
+        self.created = time.time()
+        self.finished = None
+        self.lock = threading.Lock()
+
+    def progress(self, include_tasks=False):
+        with self.lock:
+            counts = {status: 0 for status in ('queued', 'running', 'done', 'failed', 'skipped')}
+            for task in self.tasks:
+                counts[task.status] += 1
+            result = {
+                'batch_id': self.batch_id,
+                'status': 'finished' if self.finished else ('cancelling' if self.cancel_event.is_set() else 'running'),
+                'total': len(self.tasks),
+                **counts,
+                'records': sum(task.records for task in self.tasks),
+                'duplicates_removed': self.duplicates,
+                'created': self.created,
+                'finished': self.finished,
+                'elapsed_seconds': round((self.finished or time.time()) - self.created, 1),
+            }
+            if include_tasks:
+                result['tasks'] = [task.to_dict() for task in self.tasks]
+        return result
+
+    def iter_csv(self, dedup=True):
+        """
+        The consolidated CSV (Name, Address, Phone, City, Keyword) of every
+        finished task, in submission order, as text chunks for a streaming
+        response. With dedup, businesses already streamed (dedup_index.record_key)
+        are left out.
+        """
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(OUTPUT_FIELDS)
+        seen = set()
+        with self.lock:
+            finished = [task for task in self.tasks if task.status == 'done' and task.csv_path]
+        for task in finished:
+            try:
+                f = open(task.csv_path, newline='', encoding='utf-8')
+            except OSError:
+                continue
+            with f:
+                reader = csv.reader(f)
+                header = next(reader, None) or []
+                columns = [header.index(name) if name in header else None for name in OUTPUT_FIELDS[:3]]
+                for row in reader:
+                    values = [row[i] if i is not None and i < len(row) else '' for i in columns]
+                    if dedup:
+                        key = record_key(dict(zip(OUTPUT_FIELDS, values)))
+                        if key is not None:
+                            if key in seen:
+                                continue
+                            seen.add(key)
+                    writer.writerow(values + [task.city, task.keyword])
+                    if out.tell() >= STREAM_CHUNK_BYTES:
+                        yield out.getvalue()
+                        out.seek(0)
+                        out.truncate()
+        yield out.getvalue()
+
+
+class BulkRunner:
+    """
+    Runs bulk batches on a bounded pool of BULK_WORKERS threads (one browser
+    each while scraping). scrape(city, keyword, **options) is main.run_scrape
+    or a stand-in, called with output_dir set to the batch's folder so its
+    CSVs hold this batch's records only; batches are kept in memory for the
+    life of the process.
+    """
+
+    def __init__(self, scrape, workers=None, jobs=None):
+        self.scrape = scrape
+        self.workers = workers or BULK_WORKERS
+        self.jobs = jobs
+        self.batches = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bulk')
+            return self._executor
+
+    def submit(self, entries, batch_id=None, allowed_hosts=None, **options):
+        """
+        Deduplicate `entries` ((city, keyword) pairs or URLs), queue them and
+        return the BulkBatch. URLs must be on one of allowed_hosts when given.
+        options (max_results, shard, enrich, ...) go to every scrape.
+        Raises ValueError for unusable entries, an id that doesn't match
+        BATCH_ID_PATTERN or an id in use.
+        """
+        tasks, seen = [], set()
+        for entry in entries:
+            if isinstance(entry, str):
+                if allowed_hosts is not None and urlsplit(entry).netloc.lower() not in allowed_hosts:
+                    raise ValueError(f"only {', '.join(sorted(allowed_hosts))} URLs can be scraped: {entry}")
+                city, keyword, url = parse_search_url(entry)
+            else:
+                city, keyword = (_clean(value) for value in entry)
+                url = None
+            if not city or not keyword:
+                raise ValueError(f"empty city or keyword: {entry!r}")
+            if url:
+                parts = urlsplit(url)
+                key = ('url', parts.netloc.lower(), parts.path.lower().rstrip('/'))
+            else:
+                key = ('search', city.lower(), keyword.lower())
+            if key not in seen:
+                seen.add(key)
+                tasks.append(BulkTask(len(tasks), city, keyword, url))
+        if not tasks:
+            raise ValueError("no cities/keywords or URLs to scrape")
+        if len(tasks) > BULK_MAX_TASKS:
+            raise ValueError(f"{len(tasks)} searches in one batch (limit {BULK_MAX_TASKS}, JD_BULK_MAX_TASKS)")
+
+        if batch_id is not None and (not BATCH_ID_PATTERN.fullmatch(batch_id) or not batch_id.strip('.')):
+            raise ValueError(f"batch_id must be 1-128 letters, digits, '_', '-' or '.' (not only dots): {batch_id!r}")
+        batch_id = batch_id or uuid.uuid4().hex
+        if self.get(batch_id) is not None:
+            raise ValueError(f"bulk batch {batch_id} already exists")
+        if self.jobs is not None:
+            batch_id, cancel_event = self.jobs.start(batch_id, bulk=True, tasks=len(tasks))
+        else:
+            cancel_event = threading.Event()
+        batch = BulkBatch(batch_id, tasks, len(entries) - len(tasks), options, cancel_event)
+        with self._lock:
+            self.batches[batch_id] = batch
+        remaining = [len(tasks)]
+        metrics.QUEUE_DEPTH.inc(len(tasks))
+        pool = self._pool()
+        for task in tasks:
+            pool.submit(self._run_task, batch, task, remaining)
+        print(f"Bulk batch {batch_id}: {len(tasks)} searches queued ({batch.duplicates} duplicates removed)")
+        return batch
+
+    def get(self, batch_id):
+        with self._lock:
+            return self.batches.get(batch_id)
+
+    def _run_task(self, batch, task, remaining):
+        metrics.QUEUE_DEPTH.dec()
+        try:
+            if batch.cancel_event.is_set():
+                with batch.lock:
+                    task.status = 'skipped'
+                return
+            with batch.lock:
+                task.status = 'running'
+            start = time.monotonic()
+            try:
+                options = dict(batch.options, output_dir=batch.output_dir)
+                if task.url:
+                    options['url'] = task.url
+                result = self.scrape(task.city, task.keyword, cancel_event=batch.cancel_event, **options)
+            except Exception as e:
+                print(f"✗ Bulk {batch.batch_id}: {task.keyword} / {task.city} failed: {e}")
+                with batch.lock:
+                    task.status, task.error = 'failed', str(e)
+            else:
+                with batch.lock:
+                    task.status = 'done'
+                    task.records = result.get('records', 0)
+                    task.csv_path = result.get('csv_path')
+                    task.truncated = result.get('truncated', False)
+                    task.stop_reason = result.get('stop_reason')
+            task.seconds = round(time.monotonic() - start, 2)
+        finally:
+            with batch.lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+                if last:
+                    batch.finished = time.time()
+            if last:
+                if self.jobs is not None:
+                    self.jobs.finish(batch.batch_id)
+                progress = batch.progress()
+                print(f"Bulk batch {batch.batch_id} finished: {progress['done']} done, {progress['failed']} failed, "
+                      f"{progress['skipped']} skipped, {progress['records']} records")
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            for batch in list(self.batches.values()):
+                batch.cancel_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
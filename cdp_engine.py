@@ -0,0 +1,620 @@
+# cdp_engine.py
+#
+# Asyncio scraping engine that talks to Chrome over the DevTools Protocol (CDP)
+# directly, without Selenium or chromedriver. One browser, one websocket and
+# one event loop drive many pages (tabs) at once, so a search waiting out a
+# scroll pause costs a coroutine instead of an OS thread.
+#
+#   python cdp_engine.py Jaipur builders --max-results 50
+#   python cdp_engine.py Jaipur,Delhi,Pune,Surat builders --pages 4
+#
+# Navigation, the "Maybe Later" popup, scrolling and extraction follow
+# main.collect_listings / run_scrape (same waits, stop rules, card selectors and
+# outputs), so the CSVs match the Selenium engine's. Locality sharding and
+# detail page enrichment stay on the Selenium path. The API serves this engine
+# on POST /scrape/cdp.
+#
+# Needs the websockets package (pip install websockets) and a Chrome binary
+# (JD_CHROME_BINARY, or chrome / chromium on PATH). JD_CDP_ENDPOINT connects to
+# an already running Chrome instead (http://host:9222 or its ws:// URL).
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import metrics
+import snapshots
+from records import Record
+from scrape_common import (RENDER_RETRIES, _emit, _time_left, build_search_url, format_city, format_keyword,
+                           save_city_records, url_file_stem)
+from utils import SCRIPT_TIMEOUT, SCROLL_STEP_JS
+
+MAX_PAGES = int(os.getenv('JD_CDP_MAX_PAGES', '16'))  # concurrent tabs per browser
+COMMAND_TIMEOUT = 30
+NAVIGATION_TIMEOUT = 60
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+CHROME_NAMES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+# Same card fields as main.scrape_new_cards: [name, address, phone, link] from start onwards;
+# renderedOnly stops at the first card that is still filling in
+EXTRACT_CARDS_JS = """
+(function (start, limit, includeLink, renderedOnly) {
+  function text(card, className, missing) {
+    var el = card.getElementsByClassName(className)[0];
+    return el ? el.innerText.trim() : missing;
+  }
+  var cards = document.getElementsByClassName('resultbox_info'), rows = [], skipped = 0, i = start;
+  for (; i < cards.length; i++) {
+    if (limit !== null && rows.length >= limit) break;
+    var anchor = cards[i].getElementsByClassName('resultbox_title_anchor')[0];
+    var name = anchor ? anchor.innerText.trim() : 'N/A';
+    var address = text(cards[i], 'resultbox_address', 'N/A'), phone = text(cards[i], 'callcontent', '');
+    if (renderedOnly && (!name || name === 'N/A' || (!phone && (!address || address === 'N/A')))) break;
+    if (!name || name === 'N/A') { skipped++; continue; }
+    rows.push([name, address, phone, includeLink ? ((anchor && anchor.href) || '') : null]);
+  }
+  return {rows: rows, next: i, total: cards.length, skipped: skipped};
+})
+"""
+
+# Wait up to timeoutMs for the 'Maybe Later' button and click it when visible
+MAYBE_LATER_JS = """
+(function (timeoutMs) {
+  return new Promise(function (resolve) {
+    var start = Date.now();
+    (function poll() {
+      var button = document.getElementsByClassName('maybelater')[0];
+      if (button) {
+        if (button.getClientRects().length) { button.click(); resolve(true); } else { resolve(false); }
+      } else if (Date.now() - start >= timeoutMs) {
+        resolve(false);
+      } else {
+        setTimeout(poll, 250);
+      }
+    })();
+  });
+})
+"""
+
+
+class CDPError(RuntimeError):
+    """A CDP command failed, timed out, or the browser connection closed."""
+
+
+class CDPConnection:
+    """
+    One websocket to the browser. Commands for pages go over the same socket
+    with their sessionId (flattened sessions); a reader task resolves replies
+    and waited-for events.
+    """
+
+    def __init__(self, websocket):
+        self._ws = websocket
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._waiters = {}  # (session_id, event) -> [futures]
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    @property
+    def closed(self):
+        return self._reader.done()
+
+    async def send(self, method, params=None, session_id=None, timeout=COMMAND_TIMEOUT):
+        if self.closed:
+            raise CDPError("browser connection is closed")
+        message_id = next(self._ids)
+        message = {'id': message_id, 'method': method, 'params': params or {}}
+        if session_id is not None:
+            message['sessionId'] = session_id
+        reply = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = reply
+        try:
+            await self._ws.send(json.dumps(message))
+            return await asyncio.wait_for(reply, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"{method} timed out after {timeout}s") from None
+        finally:
+            self._pending.pop(message_id, None)
+
+    def wait_for_event(self, event, session_id=None):
+        """A future for the next `event` (e.g. Page.loadEventFired); create it before triggering the event."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault((session_id, event), []).append(future)
+        return future
+
+    async def _read(self):
+        error = CDPError("browser connection closed")
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                if 'id' in message:
+                    reply = self._pending.get(message['id'])
+                    if reply is None or reply.done():
+                        continue
+                    if 'error' in message:
+                        reply.set_exception(CDPError(f"{message['error'].get('message')} ({message['error'].get('code')})"))
+                    else:
+                        reply.set_result(message.get('result', {}))
+                else:
+                    for future in self._waiters.pop((message.get('sessionId'), message.get('method')), []):
+                        if not future.done():
+                            future.set_result(message.get('params', {}))
+        except Exception as e:
+            error = CDPError(f"browser connection lost: {e}")
+        finally:
+            waiting = list(self._pending.values()) + [f for futures in self._waiters.values() for f in futures]
+            self._waiters.clear()
+            for future in waiting:
+                if not future.done():
+                    future.set_exception(error)
+
+    async def close(self):
+        await self._ws.close()
+        try:
+            await self._reader
+        except Exception:
+            pass
+
+
+class CDPPage:
+    """One tab, attached over the browser connection."""
+
+    def __init__(self, connection, target_id, session_id):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+
+    async def send(self, method, timeout=COMMAND_TIMEOUT, **params):
+        return await self.connection.send(method, params, self.session_id, timeout=timeout)
+
+    async def evaluate(self, expression, timeout=COMMAND_TIMEOUT):
+        """Value of a JavaScript expression (promises are awaited); page exceptions raise CDPError."""
+        result = await self.send('Runtime.evaluate', timeout=timeout, expression=expression,
+                                 returnByValue=True, awaitPromise=True)
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise CDPError(details.get('exception', {}).get('description') or details.get('text'))
+        return result.get('result', {}).get('value')
+
+    async def call(self, function, *args, timeout=COMMAND_TIMEOUT):
+        """Call a JavaScript function expression with JSON arguments."""
+        return await self.evaluate(f"({function})(...{json.dumps(args)})", timeout=timeout)
+
+    async def call_async_script(self, script, *args, timeout=SCRIPT_TIMEOUT):
+        """Run a WebDriver-style async script (utils.py: arguments + callback last) and return its result."""
+        function = f"function () {{ var args = Array.prototype.slice.call(arguments); " \
+                   f"return new Promise(function (resolve) {{ (function () {{ {script} }}).apply(null, args.concat([resolve])); }}); }}"
+        return await self.call(function, *args, timeout=timeout)
+
+    async def goto(self, url, timeout=NAVIGATION_TIMEOUT):
+        """Navigate and wait for the load event, like WebDriver's get()."""
+        loaded = self.connection.wait_for_event('Page.loadEventFired', self.session_id)
+        try:
+            result = await self.send('Page.navigate', url=url)
+            if result.get('errorText'):
+                raise CDPError(f"could not open {url}: {result['errorText']}")
+            await asyncio.wait_for(loaded, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"{url} did not finish loading in {timeout}s") from None
+        finally:
+            loaded.cancel()  # no-op once loaded
+
+    async def close(self):
+        try:
+            await self.connection.send('Target.closeTarget', {'targetId': self.target_id})
+        except CDPError:
+            pass
+
+
+class CDPBrowser:
+    """
+    A Chrome reached over CDP: launched by launch() with a throwaway profile,
+    or an existing one (JD_CDP_ENDPOINT). page() hands out tabs, at most
+    max_pages at a time; other callers wait for a free one.
+    """
+
+    def __init__(self, connection, process=None, profile_dir=None, max_pages=None):
+        self.connection = connection
+        self.process = process
+        self.profile_dir = profile_dir
+        self._pages = asyncio.Semaphore(max_pages or MAX_PAGES)
+        self._closed = False
+
+    @property
+    def closed(self):
+        return self._closed or self.connection.closed
+
+    @classmethod
+    async def launch(cls, endpoint=None, binary=None, headless=None, max_pages=None):
+        try:
+            import websockets
+        except ImportError:
+            raise ImportError("The CDP engine needs websockets: pip install websockets")
+
+        endpoint = endpoint or os.getenv('JD_CDP_ENDPOINT')
+        process = profile_dir = None
+        if endpoint:
+            url = await _browser_ws_url(endpoint)
+        else:
+            binary = binary or os.getenv('JD_CHROME_BINARY') or next(filter(None, map(shutil.which, CHROME_NAMES)), None)
+            if not binary:
+                raise CDPError("Chrome not found: set JD_CHROME_BINARY or JD_CDP_ENDPOINT")
+            if headless is None:
+                headless = os.getenv('JD_HEADLESS', '').lower() in ('1', 'true', 'yes')
+            profile_dir = tempfile.mkdtemp(prefix='jd-cdp-')
+            args = [binary, '--remote-debugging-port=0', f'--user-data-dir={profile_dir}',
+                    '--no-first-run', '--no-default-browser-check', f'--user-agent={USER_AGENT}',
+                    '--disable-blink-features=AutomationControlled']
+            args += ['--headless=new', '--window-size=1366,900'] if headless else ['--start-maximized']
+            process = await asyncio.create_subprocess_exec(*args, 'about:blank', stdout=subprocess.DEVNULL,
+                                                           stderr=subprocess.DEVNULL)
+            try:
+                url = await _wait_for_devtools(profile_dir, process)
+            except BaseException:
+                process.kill()
+                await process.wait()
+                shutil.rmtree(profile_dir, ignore_errors=True)
+                raise
+
+        websocket = await websockets.connect(url, max_size=None)
+        metrics.ACTIVE_BROWSERS.inc()
+        print(f"✓ CDP browser ready ({'connected to ' + endpoint if endpoint else binary})")
+        return cls(CDPConnection(websocket), process, profile_dir, max_pages)
+
+    async def new_page(self):
+        target = await self.connection.send('Target.createTarget', {'url': 'about:blank'})
+        attached = await self.connection.send('Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+        page = CDPPage(self.connection, target['targetId'], attached['sessionId'])
+        await page.send('Page.enable')
+        await page.send('Emulation.setUserAgentOverride', userAgent=USER_AGENT)
+        await page.send('Page.addScriptToEvaluateOnNewDocument',
+                        source="Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        return page
+
+    def page(self):
+        """Async context manager: a new tab (waiting for a free slot first), closed again on exit."""
+        return _PageSlot(self)
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        metrics.ACTIVE_BROWSERS.dec()
+        await self.connection.close()
+        if self.process is not None and self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 10)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self.profile_dir is not None:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class _PageSlot:
+    def __init__(self, browser):
+        self.browser = browser
+        self.page = None
+
+    async def __aenter__(self):
+        await self.browser._pages.acquire()
+        try:
+            self.page = await self.browser.new_page()
+        except BaseException:
+            self.browser._pages.release()
+            raise
+        return self.page
+
+    async def __aexit__(self, *exc):
+        try:
+            await self.page.close()
+        finally:
+            self.browser._pages.release()
+
+
+async def _wait_for_devtools(profile_dir, process, timeout=30):
+    """The browser websocket URL Chrome writes to <profile>/DevToolsActivePort once it listens."""
+    path = os.path.join(profile_dir, 'DevToolsActivePort')
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.returncode is not None:
+            raise CDPError(f"Chrome exited during startup (code {process.returncode})")
+        try:
+            with open(path, encoding='utf-8') as f:
+                lines = f.read().split()
+            if len(lines) >= 2:
+                return f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+        except FileNotFoundError:
+            pass
+        await asyncio.sleep(0.1)
+    raise CDPError(f"Chrome did not open its DevTools port within {timeout}s")
+
+
+async def _browser_ws_url(endpoint):
+    if endpoint.startswith(('ws://', 'wss://')):
+        return endpoint
+    from urllib.request import urlopen
+
+    def version():
+        with urlopen(endpoint.rstrip('/') + '/json/version', timeout=10) as response:
+            return json.load(response)
+
+    return (await asyncio.to_thread(version))['webSocketDebuggerUrl']
+
+
+# ---------------------------------------------------------------------------
+# Scraping, as in main.py
+# ---------------------------------------------------------------------------
+
+async def scrape_new_cards(page, start_index=0, limit=None, include_link=False, rendered_only=False):
+    """main.scrape_new_cards in one round trip: (records, index of the next card to process)."""
+    result = await page.call(EXTRACT_CARDS_JS, start_index, limit, include_link, rendered_only)
+    if not result['total']:
+        print("No parent divs found on this page.")
+        return [], 0
+    if result['skipped']:
+        print(f"Skipped {result['skipped']} listings without a name")
+    return [Record(*row) for row in result['rows']], result['next']
+
+
+async def scroll_until_no_more_content(page, scroll_pause=2, max_no_content_scrolls=5, on_scroll=None,
+                                       cancel_event=None, should_stop=None, deadline=None):
+    """
+    main.scroll_until_no_more_content on a CDP page; on_scroll is awaited.
+    Returns the reason scrolling stopped early, or None at the end of the results.
+    """
+    last_height = await page.evaluate("document.body.scrollHeight")
+    no_new_content_count = 0
+    scroll_count = 0
+    stop_reason = None
+
+    while no_new_content_count < max_no_content_scrolls:
+        if cancel_event is not None and cancel_event.is_set():
+            stop_reason = "cancelled"
+        elif should_stop is not None:
+            stop_reason = should_stop()
+        if stop_reason:
+            print(f"Stopping scroll early ({stop_reason}).")
+            break
+
+        step = await page.call_async_script(SCROLL_STEP_JS, 1, int(scroll_pause * 1000), 2000, last_height)
+        scroll_count += 1
+        if step['popups']:
+            print("Clicked 'jd_modal_close' button.")
+
+        new_height = step['height']
+        if new_height != last_height:
+            last_height = new_height
+            no_new_content_count = 0
+        else:
+            no_new_content_count += 1
+
+        if on_scroll is not None:
+            await on_scroll(scroll_count, new_height, no_new_content_count == 0)
+
+        if step['bottom'] >= new_height - 10 and no_new_content_count >= 2:
+            break
+
+    if stop_reason:
+        return stop_reason
+    if not _time_left(deadline, 5):
+        print(f"Deadline reached, skipping final settle after {scroll_count} scrolls")
+        return None
+
+    # Final scroll to bottom, then back to top for extraction
+    await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+    await asyncio.sleep(_time_left(deadline, 3))
+    await page.evaluate("window.scrollTo(0, 0)")
+    await asyncio.sleep(_time_left(deadline, 2))
+    print(f"Scrolling completed after {scroll_count} scrolls ({last_height}px)")
+    return None
+
+
+async def collect_listings(page, url, on_event=None, cancel_event=None, max_results=None, deadline=None,
+                           include_link=False, snapshot=None):
+    """main.collect_listings on a CDP page: (records, stop_reason)."""
+    with metrics.phase("navigation"):
+        await page.goto(url)
+        print("Opened URL:", url)
+        _emit(on_event, "page_opened", url=url)
+        await asyncio.sleep(_time_left(deadline, 5))
+
+    with metrics.phase("popups"):
+        if await page.call(MAYBE_LATER_JS, int(_time_left(deadline, 10) * 1000), timeout=COMMAND_TIMEOUT):
+            print("Clicked 'Maybe Later' button.")
+
+    all_data = []
+    cards_done = 0
+    # [card index the last pass stopped at, passes in a row that stopped there]
+    stalled = [None, 0]
+    incremental = on_event is not None or max_results is not None or deadline is not None
+
+    async def extract_new_cards(rendered_only=True):
+        nonlocal cards_done
+        limit = max_results - len(all_data) if max_results is not None else None
+        if limit is not None and limit <= 0:
+            return
+        with metrics.phase("extraction"):
+            records, cards_done_now = await scrape_new_cards(
+                page, cards_done, limit, include_link=include_link,
+                rendered_only=rendered_only and stalled[1] < RENDER_RETRIES)
+        if rendered_only:
+            stalled[:] = [cards_done_now, stalled[1] + 1] if cards_done_now == stalled[0] else [cards_done_now, 1]
+        if cards_done_now > cards_done:
+            _emit(on_event, "cards_loaded", count=cards_done_now)
+        cards_done = max(cards_done, cards_done_now)
+        if records:
+            all_data.extend(records)
+            _emit(on_event, "records", records=records)
+
+    async def on_scroll(scroll_count, height, new_content):
+        _emit(on_event, "scroll", scroll=scroll_count, height=height, new_content=new_content)
+        if new_content:
+            await extract_new_cards()
+
+    def should_stop():
+        if max_results is not None and len(all_data) >= max_results:
+            return "max_results"
+        if deadline is not None and time.monotonic() >= deadline:
+            return "deadline"
+        return None
+
+    with metrics.phase("scrolling"):
+        stop_reason = await scroll_until_no_more_content(page, scroll_pause=2, max_no_content_scrolls=5,
+                                                         on_scroll=on_scroll if incremental else None,
+                                                         cancel_event=cancel_event, should_stop=should_stop,
+                                                         deadline=deadline)
+
+    await extract_new_cards(rendered_only=False)
+    if stop_reason:
+        print(f"Partial results ({stop_reason}): {len(all_data)} records")
+    if snapshot is not None:
+        with metrics.phase("snapshot"):
+            try:
+                html = await page.evaluate("document.documentElement.outerHTML")
+                # gzip + file write off the event loop, so other pages keep scrolling
+                path = await asyncio.to_thread(snapshots.save_snapshot, html, url, records=len(all_data),
+                                               stop_reason=stop_reason, **snapshot)
+                print(f"Saved page snapshot to {path}")
+            except Exception as e:
+                print(f"⚠ Could not save page snapshot: {e}")
+    return all_data, stop_reason
+
+
+async def scrape(page, city, keyword, store=None, parquet_sink=None, on_event=None, cancel_event=None,
+                 max_results=None, deadline=None, include_link=False, snapshot=None, url=None):
+    """
+    main.run_scrape on a CDP page, without sharding or enrichment.
+    deadline is a time.monotonic() timestamp. Returns the same dict as run_scrape.
+    """
+    os.makedirs("Scrapped", exist_ok=True)
+    if url:
+        csv_filename = os.path.join("Scrapped", f"{url_file_stem(url)}.csv")
+    else:
+        csv_filename = os.path.join("Scrapped", f"{format_city(city)}_{format_keyword(keyword)}.csv")
+    snapshot_meta = {"city": city, "keyword": keyword} if snapshots.snapshots_enabled(snapshot) else None
+
+    try:
+        all_data, stop_reason = await collect_listings(page, url or build_search_url(city, keyword),
+                                                       on_event=on_event, cancel_event=cancel_event,
+                                                       max_results=max_results, deadline=deadline,
+                                                       include_link=include_link, snapshot=snapshot_meta)
+        # CSV, SQLite and Parquet writes block; run them on a worker thread
+        await asyncio.to_thread(save_city_records, all_data, city, keyword, csv_filename,
+                                store=store, parquet_sink=parquet_sink)
+    except Exception:
+        metrics.SCRAPES.labels("failed").inc()
+        raise
+
+    metrics.RECORDS.inc(len(all_data))
+    metrics.SCRAPES.labels("truncated" if stop_reason else "complete").inc()
+    return {
+        "csv_path": csv_filename,
+        "records": len(all_data),
+        "truncated": stop_reason is not None,
+        "stop_reason": stop_reason,
+        "shards": None,
+        "enrichment": None,
+    }
+
+
+async def scrape_cities(browser, cities, keyword, store=None, parquet_sink=None, on_event=None, cancel_event=None,
+                        max_results=None, deadline_seconds=None, snapshot=None):
+    """
+    Scrape every city concurrently, one tab each (as many at once as the
+    browser allows). Like api.scrape_cities, returns (results, skipped cities):
+    cities still waiting for a tab when the deadline passes or the job is
+    cancelled are skipped. The first failure is raised once all cities are done.
+    """
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+    skipped = []
+    waiting = set(cities)
+    metrics.QUEUE_DEPTH.inc(len(waiting))
+
+    async def scrape_city(city):
+        async with browser.page() as page:
+            waiting.discard(city)
+            metrics.QUEUE_DEPTH.dec()
+            if (cancel_event is not None and cancel_event.is_set()) or (deadline is not None and time.monotonic() >= deadline):
+                skipped.append(city)
+                return None
+            city_events = None
+            if on_event is not None:
+                city_events = lambda event, data: on_event(event, {"city": city, **data})
+            result = {"city": city, **await scrape(page, city, keyword, store=store, parquet_sink=parquet_sink,
+                                                    on_event=city_events, cancel_event=cancel_event,
+                                                    max_results=max_results, deadline=deadline, snapshot=snapshot)}
+        if on_event is not None:
+            on_event("city_done", result)
+        return result
+
+    try:
+        outcomes = await asyncio.gather(*(scrape_city(city) for city in cities), return_exceptions=True)
+    finally:
+        metrics.QUEUE_DEPTH.dec(len(waiting))
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+    return [outcome for outcome in outcomes if outcome is not None], skipped
+
+
+# One browser for the API process, started on first use (see api.py POST /scrape/cdp)
+_shared_browser = None
+_shared_lock = None
+
+
+async def shared_browser():
+    global _shared_browser, _shared_lock
+    if _shared_lock is None:
+        _shared_lock = asyncio.Lock()
+    async with _shared_lock:
+        if _shared_browser is None or _shared_browser.closed:
+            if _shared_browser is not None:
+                await _shared_browser.close()
+            _shared_browser = await CDPBrowser.launch()
+        return _shared_browser
+
+
+async def close_shared_browser():
+    global _shared_browser
+    if _shared_browser is not None:
+        browser, _shared_browser = _shared_browser, None
+        await browser.close()
+
+
+async def _main(args):
+    async with await CDPBrowser.launch(headless=args.headless or None, max_pages=args.pages) as browser:
+        start = time.perf_counter()
+        results, _ = await scrape_cities(browser, [c.strip() for c in args.cities.split(',') if c.strip()],
+                                         args.keyword, max_results=args.max_results)
+    for result in results:
+        print(f"✓ {result['city']}: {result['records']} records -> {result['csv_path']}"
+              + (f" ({result['stop_reason']})" if result['truncated'] else ""))
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape JustDial searches over the Chrome DevTools Protocol')
+    parser.add_argument('cities', help='comma-separated cities, scraped concurrently')
+    parser.add_argument('keyword')
+    parser.add_argument('--max-results', type=int, default=None, help='stop each city after this many records')
+    parser.add_argument('--pages', type=int, default=None, help='concurrent tabs (default: JD_CDP_MAX_PAGES)')
+    parser.add_argument('--headless', action='store_true')
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
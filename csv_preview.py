@@ -0,0 +1,142 @@
+# csv_preview.py
+
+import csv
+import io
+import mmap
+import os
+import threading
+from array import array
+
+
+class CsvRowIndex:
+    """
+    Byte offset of every row in a CSV file, so any page of rows can be read
+    with one slice of a memory-mapped file instead of parsing from the top.
+
+    Rows are found with readline() plus quote parity, so quoted fields that
+    contain newlines (multi-line addresses) stay in one row. When the file has
+    only grown since the last call, indexing resumes where it stopped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = array('q')  # start of each row; offsets[0] is the header
+        self.end = 0               # byte offset up to which rows are indexed
+        self.size = -1
+        self.mtime_ns = -1
+        self.partial_start = None  # start of a final row without a newline
+        self.edge = b''            # last bytes before `end`, to tell appends from rewrites
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """Bring the index up to date with the file on disk."""
+        with self.lock:
+            stat = os.stat(self.path)
+            if stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns:
+                return
+            if stat.st_size < self.end or self._edge() != self.edge:
+                # File was rewritten or truncated: start over
+                self.offsets = array('q')
+                self.end = 0
+                self.partial_start = None
+            self._scan(stat.st_size)
+            self.edge = self._edge()
+            self.size = stat.st_size
+            self.mtime_ns = stat.st_mtime_ns
+
+    def _scan(self, size):
+        if self.partial_start is not None:
+            # The last row had no trailing newline; it may have grown since
+            self.offsets.pop()
+            self.end = self.partial_start
+            self.partial_start = None
+        if size == 0:
+            return
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            mm.seek(self.end)
+            pos = row_start = self.end
+            in_quotes = False
+            while True:
+                line = mm.readline()
+                if not line:
+                    break
+                pos += len(line)
+                if line.count(b'"') % 2:
+                    in_quotes = not in_quotes
+                if in_quotes:
+                    continue
+                if line.strip():
+                    self.offsets.append(row_start)
+                    if not line.endswith(b'\n'):
+                        self.partial_start = row_start
+                row_start = pos
+                self.end = pos
+
+    def _edge(self, width=64):
+        with open(self.path, 'rb') as f:
+            f.seek(max(self.end - width, 0))
+            return f.read(min(width, self.end))
+
+    @property
+    def total_rows(self):
+        """Number of data rows (header excluded)."""
+        return max(len(self.offsets) - 1, 0)
+
+    def header(self):
+        if not self.offsets:
+            return []
+        rows = self._read_rows(0, 1)
+        return rows[0] if rows else []
+
+    def page(self, offset, limit):
+        """Data rows [offset, offset + limit)."""
+        first = offset + 1  # skip header
+        last = min(first + limit, len(self.offsets))
+        if first >= last:
+            return []
+        return self._read_rows(first, last)
+
+    def _read_rows(self, first, last):
+        start = self.offsets[first]
+        stop = self.offsets[last] if last < len(self.offsets) else self.end
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunk = mm[start:stop]
+        return list(csv.reader(io.StringIO(chunk.decode('utf-8', errors='replace'), newline='')))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(path):
+    """Shared, refreshed row index for a CSV path."""
+    path = os.path.realpath(path)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = CsvRowIndex(path)
+    index.refresh()
+    return index
+
+
+def read_page(path, offset=0, limit=100, columns=None):
+    """
+    One page of a CSV as {"columns", "rows", "offset", "limit", "total"}.
+    `columns` optionally selects (and orders) a subset of the header.
+    """
+    index = get_index(path)
+    header = index.header()
+    rows = index.page(offset, limit)
+
+    if columns:
+        positions = [header.index(c) for c in columns if c in header]
+        header = [header[p] for p in positions]
+        rows = [[row[p] if p < len(row) else '' for p in positions] for row in rows]
+
+    return {
+        "columns": header,
+        "rows": rows,
+        "offset": offset,
+        "limit": limit,
+        "total": index.total_rows,
+    }
@@ -0,0 +1,159 @@
+# dedup_index.py
+
+import hashlib
+import os
+
+import numpy as np
+
+from normalize import normalize_address, normalize_name, normalize_phone
+
+MAGIC = 0x3158444450444A  # "JDPDDX1" little-endian, marks a dedup index file
+HEADER_WORDS = 4  # magic, capacity, count, reserved
+HEADER_BYTES = HEADER_WORDS * 8
+MAX_LOAD = 0.7
+
+
+def record_key(record):
+    """
+    Dedup key for a scraped record: normalized phone + name.
+    Without a phone, the address stands in for it so same-name branches
+    that only differ by location are not collapsed. Returns None when the
+    record has nothing to key on.
+    """
+    name = normalize_name(record.get('Name'))
+    if not name:
+        return None
+    phone = normalize_phone(record.get('Phone'))
+    if phone:
+        return f"{phone}|{name}"
+    return f"|{name}|{normalize_address(record.get('Address'))}"
+
+
+def fingerprint(key):
+    """64-bit fingerprint of a key; 0 is reserved for empty slots."""
+    value = int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+    return value or 1
+
+
+class DedupIndex:
+    """
+    Persistent, memory-mapped hash set of 64-bit key fingerprints.
+
+    Open addressing with linear probing over a power-of-two table stored in a
+    single file, so lookups and inserts are O(1) and only the touched pages are
+    resident: 8 bytes per slot, about 11.5 bytes per key at the 0.7 max load.
+    The table doubles (rehash into a new file + atomic rename) when it fills up.
+
+    One writer process at a time; concurrent scrapers should share one process.
+    """
+
+    def __init__(self, path, initial_capacity=1 << 20):
+        self.path = path
+        if not os.path.exists(path):
+            self._create(path, _next_power_of_two(initial_capacity))
+        self._open()
+
+    # -- file handling ------------------------------------------------------
+
+    @staticmethod
+    def _create(path, capacity):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(np.array([MAGIC, capacity, 0, 0], dtype='<u8').tobytes())
+            f.truncate(HEADER_BYTES + capacity * 8)
+
+    def _open(self):
+        self.header = np.memmap(self.path, dtype='<u8', mode='r+', shape=(HEADER_WORDS,))
+        if int(self.header[0]) != MAGIC:
+            raise ValueError(f"{self.path} is not a dedup index file")
+        self.capacity = int(self.header[1])
+        self.mask = self.capacity - 1
+        self.table = np.memmap(self.path, dtype='<u8', mode='r+', offset=HEADER_BYTES, shape=(self.capacity,))
+
+    def __len__(self):
+        return int(self.header[2])
+
+    def flush(self):
+        self.table.flush()
+        self.header.flush()
+
+    def close(self):
+        self.flush()
+        del self.table
+        del self.header
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- set operations -----------------------------------------------------
+
+    def _slot(self, fp):
+        """Slot holding `fp`, or the empty slot where it would go."""
+        slot = fp & self.mask
+        table = self.table
+        while True:
+            current = int(table[slot])
+            if current == 0 or current == fp:
+                return slot, current == fp
+            slot = (slot + 1) & self.mask
+
+    def __contains__(self, key):
+        return self._slot(fingerprint(key))[1]
+
+    def add(self, key):
+        """Insert `key`. Returns True if it was new (first sighting)."""
+        fp = fingerprint(key)
+        slot, found = self._slot(fp)
+        if found:
+            return False
+        if (len(self) + 1) > self.capacity * MAX_LOAD:
+            self._grow()
+            slot, _ = self._slot(fp)
+        self.table[slot] = fp
+        self.header[2] += 1
+        return True
+
+    def _grow(self):
+        """Rehash into a table twice the size (vectorized), then swap files."""
+        fps = np.asarray(self.table[self.table != 0])
+        new_capacity = self.capacity * 2
+        tmp_path = self.path + '.tmp'
+        self._create(tmp_path, new_capacity)
+        new_table = np.memmap(tmp_path, dtype='<u8', mode='r+', offset=HEADER_BYTES, shape=(new_capacity,))
+        _bulk_insert(new_table, fps, new_capacity - 1)
+        new_header = np.memmap(tmp_path, dtype='<u8', mode='r+', shape=(HEADER_WORDS,))
+        new_header[2] = len(fps)
+        new_table.flush()
+        new_header.flush()
+        del new_table, new_header
+
+        self.close()
+        os.replace(tmp_path, self.path)
+        self._open()
+        print(f"Dedup index grown to {new_capacity} slots ({len(self)} keys).")
+
+
+def _bulk_insert(table, fps, mask):
+    """Linear-probing insert of distinct fingerprints into an empty table, in rounds."""
+    pending = fps
+    slots = pending & np.uint64(mask)
+    while len(pending):
+        occupied = table[slots] != 0
+        # Losers of a previous round (or collisions with placed keys) move one slot on
+        slots[occupied] = (slots[occupied] + np.uint64(1)) & np.uint64(mask)
+        free = ~occupied
+        # Several pending keys may want the same free slot; the first one wins
+        _, first = np.unique(slots[free], return_index=True)
+        winners = np.flatnonzero(free)[first]
+        table[slots[winners]] = pending[winners]
+        keep = np.ones(len(pending), dtype=bool)
+        keep[winners] = False
+        pending = pending[keep]
+        slots = slots[keep]
+
+
+def _next_power_of_two(n):
+    return 1 << max(int(n) - 1, 1).bit_length()
@@ -0,0 +1,492 @@
+# distributed.py
+#
+# Coordinator / worker mode for batch scraping across machines.
+#
+#   python distributed.py coordinator --port 8900            # queue cities.json x searchs.json and serve it
+#   python distributed.py worker --coordinator http://host:8900/
+#   python distributed.py worker --queue Scrapped/task_queue.db --exit-when-empty   # same machine, no server
+#   python distributed.py status --coordinator http://host:8900/
+#
+# Every city + keyword is one task in a SQLite queue. Workers lease a task,
+# keep the lease alive with heartbeats while they scrape, and report the record
+# counts when done. A lease that isn't renewed within JD_LEASE_SECONDS (worker
+# crashed, machine gone) expires and the task is queued again, up to
+# JD_MAX_ATTEMPTS times. Workers hold no state besides their browser, so more
+# throughput means starting more workers.
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from json_files import load_json_file
+
+QUEUE_PATH = os.getenv('JD_QUEUE_PATH', os.path.join('Scrapped', 'task_queue.db'))
+COORDINATOR_URL = os.getenv('JD_COORDINATOR_URL', '')
+LEASE_SECONDS = float(os.getenv('JD_LEASE_SECONDS', '120'))
+HEARTBEAT_SECONDS = float(os.getenv('JD_HEARTBEAT_SECONDS', '30'))
+MAX_ATTEMPTS = int(os.getenv('JD_MAX_ATTEMPTS', '3'))
+POLL_SECONDS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id            INTEGER PRIMARY KEY,
+    run           TEXT NOT NULL,
+    city          TEXT NOT NULL,
+    keyword       TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'queued',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    worker        TEXT,
+    lease         TEXT,
+    lease_expires REAL,
+    records       INTEGER,
+    written       INTEGER,
+    error         TEXT,
+    created       REAL NOT NULL,
+    updated       REAL NOT NULL,
+    UNIQUE (run, keyword, city)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, id);
+"""
+
+
+class TaskQueue:
+    """
+    City + keyword tasks in a SQLite database (WAL, so the coordinator and
+    workers on the same machine can share the file directly).
+
+    Task states: queued -> leased -> done, or back to queued when the lease
+    expires or the worker reports a failure; failed once MAX_ATTEMPTS leases
+    went nowhere. Every lease carries a random token: heartbeats and results
+    from a worker whose lease has since expired are rejected.
+    """
+
+    def __init__(self, path=None, lease_seconds=None, max_attempts=None):
+        self.path = path or QUEUE_PATH
+        self.lease_seconds = lease_seconds or LEASE_SECONDS
+        self.max_attempts = max_attempts or MAX_ATTEMPTS
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _transaction(self, work):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(conn, time.time())
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+        finally:
+            conn.close()
+
+    def enqueue(self, cities, keywords, run=None):
+        """Queue every keyword x city (keyword by keyword, like batch_scraper). Returns (run, tasks added)."""
+        run = run or time.strftime('%Y%m%d-%H%M%S')
+
+        def work(conn, now):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (run, city, keyword, created, updated) VALUES (?, ?, ?, ?, ?)",
+                [(run, city, keyword, now, now) for keyword in keywords for city in cities])
+            return conn.total_changes - before
+
+        return run, self._transaction(work)
+
+    def _expire(self, conn, now):
+        conn.execute("UPDATE tasks SET status = 'failed', error = COALESCE(error, 'lease expired'), updated = ? "
+                     "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                     (now, now, self.max_attempts))
+        conn.execute("UPDATE tasks SET status = 'queued', worker = NULL, lease = NULL, updated = ? "
+                     "WHERE status = 'leased' AND lease_expires < ?", (now, now))
+
+    def requeue_expired(self):
+        self._transaction(self._expire)
+
+    def lease(self, worker):
+        """The next queued task as a dict (with its lease token), or None when nothing is queued."""
+        def work(conn, now):
+            self._expire(conn, now)
+            row = conn.execute("SELECT id, run, city, keyword, attempts FROM tasks WHERE status = 'queued' "
+                               "ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            conn.execute("UPDATE tasks SET status = 'leased', worker = ?, lease = ?, lease_expires = ?, "
+                         "attempts = attempts + 1, updated = ? WHERE id = ?",
+                         (worker, token, now + self.lease_seconds, now, row[0]))
+            return {'id': row[0], 'run': row[1], 'city': row[2], 'keyword': row[3], 'attempt': row[4] + 1,
+                    'lease': token, 'lease_seconds': self.lease_seconds}
+
+        return self._transaction(work)
+
+    def heartbeat(self, task_id, lease):
+        """Extend a lease; False when it was lost (expired and given to another worker)."""
+        def work(conn, now):
+            return conn.execute("UPDATE tasks SET lease_expires = ?, updated = ? "
+                                "WHERE id = ? AND lease = ? AND status = 'leased'",
+                                (now + self.lease_seconds, now, task_id, lease)).rowcount == 1
+
+        return self._transaction(work)
+
+    def complete(self, task_id, lease, records, written):
+        def work(conn, now):
+            return conn.execute("UPDATE tasks SET status = 'done', records = ?, written = ?, error = NULL, "
+                                "lease = NULL, lease_expires = NULL, updated = ? "
+                                "WHERE id = ? AND lease = ? AND status = 'leased'",
+                                (records, written, now, task_id, lease)).rowcount == 1
+
+        return self._transaction(work)
+
+    def fail(self, task_id, lease, error):
+        """Report a failed attempt: queued again, or failed after max_attempts."""
+        def work(conn, now):
+            return conn.execute("UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                                "error = ?, worker = NULL, lease = NULL, lease_expires = NULL, updated = ? "
+                                "WHERE id = ? AND lease = ? AND status = 'leased'",
+                                (self.max_attempts, str(error)[:500], now, task_id, lease)).rowcount == 1
+
+        return self._transaction(work)
+
+    def stats(self, run=None):
+        """Task counts by status, records scraped/written, and per-worker totals of finished tasks."""
+        self.requeue_expired()
+        where, params = ("WHERE run = ?", (run,)) if run else ("", ())
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute(f"SELECT status, COUNT(*) FROM tasks {where} GROUP BY status", params))
+            records, written = conn.execute(
+                f"SELECT COALESCE(SUM(records), 0), COALESCE(SUM(written), 0) FROM tasks {where}", params).fetchone()
+            workers = {worker: {'tasks': tasks, 'records': total} for worker, tasks, total in conn.execute(
+                f"SELECT worker, COUNT(*), COALESCE(SUM(records), 0) FROM tasks {where} "
+                f"{'AND' if where else 'WHERE'} status = 'done' GROUP BY worker", params)}
+        finally:
+            conn.close()
+        return {
+            'queued': counts.get('queued', 0),
+            'leased': counts.get('leased', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'records': records,
+            'written': written,
+            'workers': workers,
+        }
+
+
+class RemoteQueue:
+    """TaskQueue's worker-side methods, called on a coordinator over HTTP (see serve)."""
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip('/') + '/'
+        self.timeout = timeout
+
+    def _call(self, method, **params):
+        request = urllib.request.Request(self.url + method, data=json.dumps(params).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())['result']
+
+    def lease(self, worker):
+        return self._call('lease', worker=worker)
+
+    def heartbeat(self, task_id, lease):
+        return self._call('heartbeat', task_id=task_id, lease=lease)
+
+    def complete(self, task_id, lease, records, written):
+        return self._call('complete', task_id=task_id, lease=lease, records=records, written=written)
+
+    def fail(self, task_id, lease, error):
+        return self._call('fail', task_id=task_id, lease=lease, error=error)
+
+    def stats(self, run=None):
+        return self._call('stats', run=run)
+
+
+REMOTE_METHODS = {'lease', 'heartbeat', 'complete', 'fail', 'stats'}
+
+
+def make_server(task_queue, host='0.0.0.0', port=8900):
+    """HTTP server exposing a TaskQueue to remote workers: POST /<method> with JSON arguments."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            method = self.path.strip('/')
+            if method not in REMOTE_METHODS:
+                self._reply(404, {'error': f"unknown method {method}"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                params = json.loads(self.rfile.read(length) or b'{}')
+                self._reply(200, {'result': getattr(task_queue, method)(**params)})
+            except Exception as e:
+                self._reply(500, {'error': str(e)})
+
+        def do_GET(self):
+            if self.path.strip('/') in ('', 'stats'):
+                self._reply(200, {'result': task_queue.stats()})
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+class LeaseLost(Exception):
+    """The task's lease expired or was taken over while it ran; its result must not be written."""
+
+
+class _Heartbeat:
+    """
+    Renews a lease every HEARTBEAT_SECONDS on a background thread while a task
+    runs. When the lease is lost, `lost` is set and so is `cancel_event`, which
+    the scrape watches to stop early.
+    """
+
+    def __init__(self, task_queue, task, interval=None):
+        self.task_queue = task_queue
+        self.task = task
+        self.interval = interval or min(HEARTBEAT_SECONDS, task['lease_seconds'] / 3)
+        self.lost = False
+        self.cancel_event = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{task['id']}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.task_queue.heartbeat(self.task['id'], self.task['lease']):
+                    self.lost = True
+                    self.cancel_event.set()
+                    print(f"⚠ Lease on task {self.task['id']} was lost; another worker will redo it")
+                    return
+            except Exception as e:
+                # The coordinator may be restarting; the lease survives until it expires
+                print(f"⚠ Heartbeat for task {self.task['id']} failed: {e}")
+
+
+def task_csv_path(task, output_dir='Scrapped'):
+    """One CSV per task (Scrapped/<keyword>__<city>.csv), so retried tasks overwrite instead of duplicating."""
+    from batch_scraper import keyword_csv_path
+    keyword_path = keyword_csv_path(task['keyword'], output_dir)
+    city_safe = task['city'].replace(' ', '_').replace('/', '_').replace('-', '_').lower()
+    return f"{keyword_path[:-len('.csv')]}__{city_safe}.csv"
+
+
+def scrape_task(driver, task, store=None, output_dir='Scrapped', cancel_event=None):
+    """
+    Scrape one task; returns (records scraped, records written). Errors are raised to fail the task.
+    Once cancel_event is set (the lease was lost) the scrape stops and LeaseLost is raised
+    instead of writing anything.
+    """
+    from batch_scraper import scrape_city_keyword
+    from records import RecordBatch
+    from writer import atomic_write
+
+    data = scrape_city_keyword(driver, task['city'], task['keyword'], raise_errors=True, cancel_event=cancel_event)
+    if cancel_event is not None and cancel_event.is_set():
+        raise LeaseLost(f"lease on task {task['id']} was lost")
+    if not data:
+        return 0, 0
+    batch = RecordBatch.from_records(data, task['city'])
+    if store is not None:
+        store.upsert_records(batch, task['city'], task['keyword'])
+        return len(data), len(batch)
+    with atomic_write(task_csv_path(task, output_dir)) as f:
+        batch.write_csv(f, ['Name', 'Address', 'Phone', 'City'])
+    return len(data), len(batch)
+
+
+def _report(method, *args):
+    """Send a result to the queue; None if it can't be reached (the lease then expires and the task reruns)."""
+    try:
+        return method(*args)
+    except OSError as e:
+        print(f"⚠ Could not report to the task queue: {e}")
+        return None
+
+
+def run_worker(task_queue, worker_id=None, exit_when_empty=False, scrape=None, create_driver=None,
+               poll_seconds=POLL_SECONDS, max_tasks=None):
+    """
+    Lease and run tasks until stopped (Ctrl+C), or until the queue has nothing
+    queued or leased with exit_when_empty. One browser is kept for all tasks
+    and replaced after a failure. `scrape(driver, task, cancel_event)` and
+    `create_driver` default to the real scraper; cancel_event is set when the
+    task's lease is lost, and the scrape should then stop without writing
+    (raising LeaseLost). Returns the number of tasks completed.
+    """
+    import metrics
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    if scrape is None:
+        from storage import get_default_store
+        store = get_default_store()
+
+        def scrape(driver, task, cancel_event):
+            return scrape_task(driver, task, store=store, cancel_event=cancel_event)
+    if create_driver is None:
+        from main import create_driver
+
+    print(f"Worker {worker_id} started")
+    driver = None
+    completed = 0
+    try:
+        while max_tasks is None or completed < max_tasks:
+            try:
+                task = task_queue.lease(worker_id)
+            except OSError as e:
+                print(f"⚠ Could not reach the task queue: {e}")
+                time.sleep(poll_seconds)
+                continue
+            if task is None:
+                try:
+                    stats = task_queue.stats()
+                except OSError as e:
+                    print(f"⚠ Could not reach the task queue: {e}")
+                    time.sleep(poll_seconds)
+                    continue
+                if exit_when_empty and stats['queued'] == 0 and stats['leased'] == 0:
+                    print(f"Worker {worker_id}: queue is empty, exiting")
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            print(f"\n[{worker_id}] Task {task['id']}: {task['keyword']} / {task['city']} (attempt {task['attempt']})")
+            try:
+                if driver is None:
+                    driver = create_driver()
+                with _Heartbeat(task_queue, task) as heartbeat:
+                    records, written = scrape(driver, task, heartbeat.cancel_event)
+                    if heartbeat.lost:
+                        raise LeaseLost(f"lease on task {task['id']} was lost")
+            except LeaseLost:
+                # The task belongs to another lease now; nothing to report, the browser is fine
+                print(f"⚠ Task {task['id']} stopped: its lease was lost")
+            except Exception as e:
+                print(f"✗ Task {task['id']} failed: {e}")
+                _report(task_queue.fail, task['id'], task['lease'], str(e))
+                if driver is not None:
+                    try:
+                        driver.quit()
+                    except Exception:
+                        pass
+                    driver = None
+            else:
+                accepted = _report(task_queue.complete, task['id'], task['lease'], records, written)
+                if accepted:
+                    completed += 1
+                    print(f"✓ Task {task['id']} done: {records} records ({written} written)")
+                elif accepted is False:
+                    print(f"⚠ Task {task['id']} finished after its lease expired; result left to the new lease")
+            metrics.export(job=f"{metrics.PUSH_JOB}_{worker_id}")
+    except KeyboardInterrupt:
+        print(f"\nWorker {worker_id} interrupted; its lease expires and the task is requeued")
+    finally:
+        if driver is not None:
+            driver.quit()
+    return completed
+
+
+def print_stats(stats):
+    total = stats['queued'] + stats['leased'] + stats['done'] + stats['failed']
+    print(f"Tasks: {stats['done']}/{total} done, {stats['leased']} running, {stats['queued']} queued, "
+          f"{stats['failed']} failed | {stats['records']} records ({stats['written']} written)")
+    for worker, totals in sorted(stats['workers'].items()):
+        print(f"  {worker}: {totals['tasks']} tasks, {totals['records']} records")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Distributed batch scraping: coordinator and workers')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator = commands.add_parser('coordinator', help='queue cities x keywords and serve the queue')
+    coordinator.add_argument('--queue', default=QUEUE_PATH)
+    coordinator.add_argument('--host', default='0.0.0.0')
+    coordinator.add_argument('--port', type=int, default=8900)
+    coordinator.add_argument('--cities', default='cities.json')
+    coordinator.add_argument('--searches', default='searchs.json')
+    coordinator.add_argument('--run', help='run name; re-using one only adds missing tasks (default: timestamp)')
+    coordinator.add_argument('--no-enqueue', action='store_true', help='serve the existing queue only')
+
+    worker = commands.add_parser('worker', help='lease and scrape tasks')
+    target = worker.add_mutually_exclusive_group()
+    target.add_argument('--coordinator', default=COORDINATOR_URL, help='coordinator URL (JD_COORDINATOR_URL)')
+    target.add_argument('--queue', help='use a queue database directly (same machine / shared disk)')
+    worker.add_argument('--id', help='worker name (default: host-pid)')
+    worker.add_argument('--exit-when-empty', action='store_true')
+
+    status = commands.add_parser('status', help='show queue progress')
+    status.add_argument('--coordinator', default=COORDINATOR_URL)
+    status.add_argument('--queue', default=QUEUE_PATH)
+    status.add_argument('--run')
+
+    args = parser.parse_args()
+
+    if args.command == 'coordinator':
+        task_queue = TaskQueue(args.queue)
+        if not args.no_enqueue:
+            cities = load_json_file(args.cities, key='cities')
+            keywords = load_json_file(args.searches, key='searches')
+            run, added = task_queue.enqueue(cities, keywords, run=args.run)
+            print(f"Queued {added} tasks for run {run} ({len(keywords)} keywords x {len(cities)} cities)")
+        server = make_server(task_queue, args.host, args.port)
+        print(f"Coordinator serving {args.queue} on http://{args.host}:{server.server_address[1]}/")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            while True:
+                time.sleep(POLL_SECONDS * 3)
+                print_stats(task_queue.stats())
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.command == 'worker':
+        if args.queue:
+            task_queue = TaskQueue(args.queue)
+        elif args.coordinator:
+            task_queue = RemoteQueue(args.coordinator)
+        else:
+            parser.error('worker needs --coordinator (or JD_COORDINATOR_URL) or --queue')
+        run_worker(task_queue, args.id, exit_when_empty=args.exit_when_empty)
+    else:
+        task_queue = RemoteQueue(args.coordinator) if args.coordinator else TaskQueue(args.queue)
+        print_stats(task_queue.stats(args.run))
+
+
+if __name__ == '__main__':
+    main()
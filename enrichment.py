@@ -0,0 +1,213 @@
+# enrichment.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit
+
+from selenium.webdriver.common.by import By
+
+from main import ThreadLocalDrivers
+from normalize import normalize_phone
+
+# JD_ENRICH=missing fetches the detail page of listings whose phone is hidden on the results card.
+ENRICH_WORKERS = int(os.getenv('JD_ENRICH_WORKERS', '2'))
+ENRICH_CACHE_PATH = os.getenv('JD_ENRICH_CACHE', os.path.join('Scrapped', 'enrichment_cache.db'))
+
+# Detail pages show the number in a tel: link; the visible text is the fallback
+PHONE_SELECTORS = ["a[href^='tel:']", ".callcontent", "[class*='callNowAnchor']", "[class*='telnowpr']"]
+ADDRESS_SELECTORS = ["[class*='address']", "address"]
+PAGE_LOAD_WAIT = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS details (
+    link       TEXT PRIMARY KEY,
+    phone      TEXT NOT NULL DEFAULT '',
+    address    TEXT NOT NULL DEFAULT '',
+    status     TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+)
+"""
+
+
+def enrichment_enabled(enrich=None):
+    """enrich=True/False forces the choice; None follows JD_ENRICH (off by default)."""
+    if enrich is None:
+        return os.getenv('JD_ENRICH', 'off').lower() in ('missing', 'on', '1', 'true')
+    return bool(enrich)
+
+
+def canonical_link(link):
+    """Detail page URL without tracking query strings, so one business has one cache entry."""
+    if not link:
+        return ''
+    parts = urlsplit(link)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/'), '', ''))
+
+
+def needs_enrichment(record):
+    """Phone missing or hidden behind "Show Number", and a detail page to look at."""
+    return bool(record.get('Link')) and not normalize_phone(record.get('Phone'))
+
+
+class DetailCache:
+    """
+    Persistent per-listing cache of detail page results, keyed on the canonical
+    link. Pages without a phone are cached too, so nothing is fetched twice.
+    """
+
+    def __init__(self, path=ENRICH_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, links):
+        """{link: {"phone", "address", "status"}} for the cached links."""
+        found = {}
+        links = list(links)
+        conn = self._connect()
+        try:
+            for start in range(0, len(links), 500):
+                chunk = links[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT link, phone, address, status FROM details WHERE link IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for link, phone, address, status in rows:
+                    found[link] = {'phone': phone, 'address': address, 'status': status}
+        finally:
+            conn.close()
+        return found
+
+    def put(self, link, phone='', address='', status='ok'):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO details (link, phone, address, status, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    (link, phone, address, status, time.time()),
+                )
+        finally:
+            conn.close()
+
+
+def _first_text(driver, selectors, attribute=None):
+    for selector in selectors:
+        for element in driver.find_elements(By.CSS_SELECTOR, selector):
+            value = (element.get_attribute(attribute) if attribute else element.text) or ''
+            value = value.strip()
+            if value:
+                return value
+    return ''
+
+
+def extract_details(driver):
+    """Phone and address from an open detail page ('' when not found)."""
+    phone = _first_text(driver, PHONE_SELECTORS[:1], attribute='href')
+    phone = re.sub(r'^tel:', '', phone)
+    if not normalize_phone(phone):
+        phone = _first_text(driver, PHONE_SELECTORS[1:])
+    address = _first_text(driver, ADDRESS_SELECTORS)
+    return {'phone': phone if normalize_phone(phone) else '', 'address': address}
+
+
+def fetch_details(driver, link):
+    driver.get(link)
+    time.sleep(PAGE_LOAD_WAIT)
+    return extract_details(driver)
+
+
+def apply_details(record, details):
+    """Fill the record's missing fields from detail page results. Returns True if the phone was filled."""
+    filled = False
+    if details.get('phone') and not normalize_phone(record.get('Phone')):
+        record['Phone'] = details['phone']
+        filled = True
+    if details.get('address') and record.get('Address') in (None, '', 'N/A'):
+        record['Address'] = details['address']
+    return filled
+
+
+def enrich_records(records, workers=None, cache=None, cancel_event=None, fetch=None, drivers=None):
+    """
+    Fill in phones (and missing addresses) from the detail pages of listings
+    whose card hid them. Records need a 'Link' (scrape with include_link=True);
+    it is removed afterwards so outputs keep their usual columns.
+
+    Detail pages are fetched by at most `workers` browsers at once
+    (JD_ENRICH_WORKERS, default 2); results are cached per listing in
+    `cache` (a DetailCache), so re-runs only fetch listings never seen before.
+    Returns stats: {"candidates", "cache_hits", "fetched", "failed", "filled",
+    "seconds", "pages_per_second"}.
+    """
+    start = time.perf_counter()
+    cache = cache or DetailCache()
+    fetch = fetch or fetch_details
+    workers = workers or ENRICH_WORKERS
+
+    pending = {}
+    for record in records:
+        if needs_enrichment(record):
+            pending.setdefault(canonical_link(record['Link']), []).append(record)
+
+    stats = {'candidates': sum(len(group) for group in pending.values()), 'cache_hits': 0,
+             'fetched': 0, 'failed': 0, 'filled': 0}
+    stats_lock = threading.Lock()
+
+    cached = cache.get_many(pending)
+    for link, details in cached.items():
+        for record in pending[link]:
+            stats['cache_hits'] += 1
+            stats['filled'] += apply_details(record, details)
+    to_fetch = [link for link in pending if link not in cached]
+
+    own_drivers = drivers is None
+    drivers = drivers or ThreadLocalDrivers()
+
+    def run(link):
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        try:
+            details = fetch(drivers.get(), link)
+        except Exception as e:
+            print(f"✗ Could not fetch {link}: {e}")
+            drivers.discard()
+            with stats_lock:
+                stats['failed'] += 1
+            return
+        cache.put(link, details['phone'], details['address'], 'ok' if details['phone'] else 'no_phone')
+        with stats_lock:
+            stats['fetched'] += 1
+            for record in pending[link]:
+                stats['filled'] += apply_details(record, details)
+
+    if to_fetch:
+        print(f"Enriching {len(to_fetch)} listings from their detail pages "
+              f"({stats['cache_hits']} from cache, {min(workers, len(to_fetch))} browsers)...")
+        try:
+            with ThreadPoolExecutor(max_workers=min(workers, len(to_fetch)), thread_name_prefix="enrich") as pool:
+                list(pool.map(run, to_fetch))
+        finally:
+            if own_drivers:
+                drivers.close()
+
+    for record in records:
+        record.pop('Link', None)
+
+    stats['seconds'] = round(time.perf_counter() - start, 2)
+    stats['pages_per_second'] = round(stats['fetched'] / stats['seconds'], 2) if stats['seconds'] else 0.0
+    print(f"Enrichment: {stats['filled']}/{stats['candidates']} phones filled, {stats['fetched']} pages fetched, "
+          f"{stats['cache_hits']} cache hits, {stats['failed']} failed in {stats['seconds']}s "
+          f"({stats['pages_per_second']} pages/s)")
+    return stats
@@ -0,0 +1,230 @@
+# entity_resolution.py
+
+import numpy as np
+import pandas as pd
+from normalize import NON_ALNUM_RE, LEGAL_SUFFIX_RE, LEADING_THE_RE, PHONE_RE, MISSING_VALUES
+
+# How many neighbours (after sorting a block by name) each record is compared with.
+# Keeps candidate pairs at O(n * window) even for huge blocks like "shree ..." in one city.
+DEFAULT_WINDOW = 5
+
+
+# ---------------------------------------------------------------------------
+# Vectorized normalization
+# ---------------------------------------------------------------------------
+
+def _normalize_text(series):
+    text = series.fillna('').astype(str).str.lower().str.replace('&', ' and ', regex=False)
+    text = text.str.replace(NON_ALNUM_RE, ' ', regex=True).str.strip()
+    return text.mask(text.isin(MISSING_VALUES), '')
+
+
+def normalize_frame(df):
+    """Add name_norm / phone_norm / address_norm / city_norm columns (see normalize.py)."""
+    out = pd.DataFrame(index=df.index)
+    name = _normalize_text(df['Name'])
+    name = name.str.replace(LEADING_THE_RE, '', regex=True)
+    out['name_norm'] = name.str.replace(LEGAL_SUFFIX_RE, '', regex=True)
+
+    if 'Phone' in df.columns:
+        phone = df['Phone'].fillna('').astype(str).str.extract(PHONE_RE, expand=False).fillna('')
+        digits = phone.str.replace(r'\D', '', regex=True)
+        out['phone_norm'] = digits.str[-10:].where(digits.str.len() >= 10, '')
+    else:
+        out['phone_norm'] = ''
+
+    out['address_norm'] = _normalize_text(df['Address']) if 'Address' in df.columns else ''
+    out['city_norm'] = _normalize_text(df['City']) if 'City' in df.columns else ''
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Blocking + candidate pairs
+# ---------------------------------------------------------------------------
+
+def blocking_keys(norm):
+    """
+    Blocking keys; only records sharing a key are ever compared.
+      - phone: the normalized phone number
+      - name : city + first two name tokens (token bigram prefix)
+    """
+    first_tokens = norm['name_norm'].str.extract(r'^(\S+(?: \S+)?)', expand=False).fillna('')
+    return {
+        'phone': norm['phone_norm'].where(norm['phone_norm'] != '', None),
+        'name': (norm['city_norm'] + '|' + first_tokens).where(first_tokens != '', None),
+    }
+
+
+def candidate_pairs(keys, sort_values, window=DEFAULT_WINDOW):
+    """
+    Sorted-neighbourhood candidate generation.
+    Within every block (records sorted by name), each record is paired with
+    the next `window` records. Returns two int arrays (i < j) of row positions.
+    """
+    left, right = [], []
+    for key in keys.values():
+        mask = key.notna().to_numpy()
+        positions = np.flatnonzero(mask)
+        if len(positions) < 2:
+            continue
+        order = np.lexsort((sort_values[positions], key.to_numpy()[positions].astype(str)))
+        ordered = positions[order]
+        block = key.to_numpy()[ordered]
+        for offset in range(1, window + 1):
+            if offset >= len(ordered):
+                break
+            same_block = block[:-offset] == block[offset:]
+            left.append(ordered[:-offset][same_block])
+            right.append(ordered[offset:][same_block])
+
+    i = np.concatenate(left).astype(np.int64) if left else np.empty(0, dtype=np.int64)
+    j = np.concatenate(right).astype(np.int64) if right else np.empty(0, dtype=np.int64)
+    if len(i) == 0:
+        return i, j
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    # The same pair can come out of several blocking passes
+    n = int(max(i.max(), j.max())) + 1
+    unique = np.unique(i * n + j)
+    return unique // n, unique % n
+
+
+# ---------------------------------------------------------------------------
+# Pair scoring
+# ---------------------------------------------------------------------------
+
+def _token_sets(series):
+    return [frozenset(s.split()) for s in series]
+
+
+def _similarities(sets, i, j):
+    """Token Jaccard and containment (overlap / smaller set) for each pair."""
+    jaccard = np.zeros(len(i))
+    containment = np.zeros(len(i))
+    for k, (a, b) in enumerate(zip(i.tolist(), j.tolist())):
+        sa, sb = sets[a], sets[b]
+        if not sa or not sb:
+            continue
+        inter = len(sa & sb)
+        jaccard[k] = inter / (len(sa) + len(sb) - inter)
+        containment[k] = inter / min(len(sa), len(sb))
+    return jaccard, containment
+
+
+def match_pairs(norm, i, j):
+    """
+    Decide which candidate pairs are the same business.
+
+    - Same phone and one name mostly contained in the other
+      ("Sharma Builders" / "Sharma Builders Pvt Ltd") -> match.
+    - Same name, no conflicting phone, and matching or missing address -> match.
+    - Same name but different phones and different addresses -> separate branches.
+    """
+    phone = norm['phone_norm'].to_numpy()
+    address = norm['address_norm'].to_numpy()
+
+    phone_a, phone_b = phone[i], phone[j]
+    has_phones = (phone_a != '') & (phone_b != '')
+    phone_match = has_phones & (phone_a == phone_b)
+    phone_conflict = has_phones & (phone_a != phone_b)
+
+    name_jaccard, name_containment = _similarities(_token_sets(norm['name_norm']), i, j)
+    address_jaccard, _ = _similarities(_token_sets(norm['address_norm']), i, j)
+    address_missing = (address[i] == '') | (address[j] == '')
+
+    same_name = name_jaccard >= 0.9
+    match = phone_match & (name_containment >= 0.5)
+    match |= same_name & ~phone_conflict & (address_missing | (address_jaccard >= 0.5))
+    match |= same_name & phone_conflict & (address_jaccard >= 0.8)
+    return i[match], j[match]
+
+
+# ---------------------------------------------------------------------------
+# Clustering
+# ---------------------------------------------------------------------------
+
+def connected_components(n, i, j):
+    """Cluster label per row (smallest member position) via vectorized label propagation."""
+    labels = np.arange(n)
+    if len(i) == 0:
+        return labels
+    while True:
+        pair_min = np.minimum(labels[i], labels[j])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, i, pair_min)
+        np.minimum.at(new_labels, j, pair_min)
+        # Pointer jumping so long chains converge in a few rounds
+        while True:
+            jumped = new_labels[new_labels]
+            if np.array_equal(jumped, new_labels):
+                break
+            new_labels = jumped
+        if np.array_equal(new_labels, labels):
+            return labels
+        labels = new_labels
+
+
+def _completeness(df, norm):
+    """Rank cluster members: phone first, then address, then the longest (most formal) name."""
+    score = (norm['phone_norm'] != '').astype(int) * 4
+    score += (norm['address_norm'] != '').astype(int) * 2
+    return score * 1000 + df['Name'].fillna('').astype(str).str.len().clip(upper=999)
+
+
+def resolve_entities(df, window=DEFAULT_WINDOW, verbose=True):
+    """
+    Cluster rows that describe the same business.
+
+    Returns (clustered, canonical):
+      - clustered: the input rows plus an EntityId column
+      - canonical: one record per entity (most complete member, with a missing
+        phone/address filled from the rest of the cluster) plus ClusterSize
+    """
+    df = df.reset_index(drop=True)
+    norm = normalize_frame(df)
+
+    # Exact duplicates (after normalization) don't need pairwise comparison
+    exact_id = norm.groupby(['name_norm', 'phone_norm', 'address_norm', 'city_norm'], sort=False).ngroup().to_numpy()
+    _, representatives = np.unique(exact_id, return_index=True)
+    rep_norm = norm.iloc[representatives].reset_index(drop=True)
+    if verbose:
+        print(f"{len(df)} rows, {len(rep_norm)} distinct after normalization.")
+
+    keys = blocking_keys(rep_norm)
+    i, j = candidate_pairs(keys, rep_norm['name_norm'].to_numpy().astype(str), window=window)
+    if verbose:
+        print(f"{len(i)} candidate pairs from blocking.")
+
+    mi, mj = match_pairs(rep_norm, i, j)
+    if verbose:
+        print(f"{len(mi)} matching pairs.")
+
+    rep_labels = connected_components(len(rep_norm), mi, mj)
+    # ngroup ids are dense, so representative r stands for every row with exact_id == r
+    row_labels = rep_labels[exact_id]
+    entity_id = pd.factorize(row_labels)[0]
+
+    clustered = df.copy()
+    clustered['EntityId'] = entity_id
+
+    score = _completeness(df, norm)
+    best = score.groupby(entity_id).idxmax()
+    canonical = df.loc[best.to_numpy()].copy()
+    canonical['EntityId'] = best.index.to_numpy()
+
+    # Fill gaps in the canonical record from other members of its cluster
+    for column, norm_column in (('Phone', 'phone_norm'), ('Address', 'address_norm')):
+        if column not in df.columns:
+            continue
+        present = norm[norm_column] != ''
+        first_present = df.loc[present, column].groupby(entity_id[present.to_numpy()]).first()
+        missing = norm.loc[best.to_numpy(), norm_column].to_numpy() == ''
+        fill = canonical['EntityId'].map(first_present)
+        canonical.loc[missing, column] = fill[missing].where(fill[missing].notna(), canonical.loc[missing, column])
+
+    sizes = np.bincount(entity_id)
+    canonical['ClusterSize'] = sizes[canonical['EntityId'].to_numpy()]
+    canonical = canonical.sort_values('EntityId').reset_index(drop=True)
+
+    if verbose:
+        print(f"{len(canonical)} entities after resolution.")
+    return clustered, canonical
@@ -0,0 +1,54 @@
+# jobs.py
+
+import threading
+import time
+import uuid
+
+
+class JobRegistry:
+    """
+    Running scrape jobs by id, each with a threading.Event that cancels it.
+
+    The scraper checks the event between scrolls, so cancelling stops a job
+    within one scroll pause and keeps the records loaded so far.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, job_id=None, **info):
+        """Register a job (a new id if none is given); returns (job_id, cancel_event)."""
+        job_id = job_id or uuid.uuid4().hex
+        cancel_event = threading.Event()
+        with self._lock:
+            if job_id in self._jobs:
+                raise ValueError(f"job {job_id} is already running")
+            self._jobs[job_id] = {"cancel_event": cancel_event, "started": time.time(), **info}
+        return job_id, cancel_event
+
+    def cancel(self, job_id):
+        """Ask a running job to stop. Returns False if there is no such job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job["cancel_event"].set()
+        return True
+
+    def finish(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def running(self):
+        """[{"job_id", "started", "cancelling", ...info}] for every running job."""
+        with self._lock:
+            jobs = list(self._jobs.items())
+        return [
+            {
+                "job_id": job_id,
+                "cancelling": job["cancel_event"].is_set(),
+                **{k: v for k, v in job.items() if k != "cancel_event"},
+            }
+            for job_id, job in jobs
+        ]
@@ -0,0 +1,35 @@
+# json_files.py
+
+import json
+
+
+def load_json_file(filename, key=None):
+    """Load data from JSON file - handles both array and object formats"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+            
+            # If it's a list, return it directly
+            if isinstance(data, list):
+                return data
+            
+            # If it's a dict and key is provided, return that key's value
+            if isinstance(data, dict) and key:
+                return data.get(key, [])
+            
+            # If it's a dict without key, try common keys
+            if isinstance(data, dict):
+                # Try common keys
+                for common_key in ['cities', 'searches', 'keywords', 'data']:
+                    if common_key in data:
+                        return data[common_key]
+                # If no common key found, return empty list
+                return []
+            
+            return data
+    except FileNotFoundError:
+        print(f"Error: {filename} not found!")
+        return []
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in {filename}: {e}")
+        return []
@@ -3,6 +3,7 @@
 import time
 import os
 import csv
+import queue
 import threading
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -11,7 +12,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
-from utils import check_and_click_close_popup, countdown_timer, smooth_scroll_to, human_like_scroll
+from utils import (check_and_click_close_popup, countdown_timer, smooth_scroll_to, human_like_scroll, scroll_step,
+                   SCRIPT_TIMEOUT)
+import metrics
+from records import Record
+import snapshots
+# Shared with the Selenium-free CDP engine (cdp_engine.py); re-exported for existing imports
+from scrape_common import (BASE_URL, RENDER_RETRIES, _emit, _time_left, build_search_url, format_city,
+                           format_keyword, save_city_records, url_file_stem)
 
 def get_url_input():
     # Ask the user if they have a URL or need to enter city/keyword
@@ -47,25 +55,45 @@ def get_url_from_file(filename):
         print(f"The file '{filename}' does not exist. Exiting.")
         exit()
 
-def scrape_page_data(driver):
-    """Extract data from the current page"""
+def scrape_page_data(driver, start_index=0, include_link=False):
+    """Extract data from the current page (listings from start_index onwards)"""
+    data, _ = scrape_new_cards(driver, start_index, include_link=include_link)
+    return data
+
+
+def scrape_new_cards(driver, start_index=0, limit=None, include_link=False, rendered_only=False):
+    """
+    Extract listings from start_index onwards (at most `limit` records).
+    Returns (records, index of the next card to process), so the next
+    call can pick up right after the cards processed here.
+    include_link adds the detail page URL as 'Link' (used by enrichment.py).
+    rendered_only (used while cards are still loading) stops at the first
+    card that has no name yet or neither address nor phone text, so a
+    later call extracts it once it has filled in instead of skipping it
+    (collect_listings stops waiting on a card after RENDER_RETRIES passes).
+    """
     data = []
     parent_divs = driver.find_elements(By.CLASS_NAME, 'resultbox_info')
     
     if not parent_divs:
         print("No parent divs found on this page.")
-        return data
+        return data, 0
     
-    for index, parent_div in enumerate(parent_divs):
+    for index, parent_div in enumerate(parent_divs[start_index:], start_index):
+        if limit is not None and len(data) >= limit:
+            return data, index
         try:
             name = "N/A"
             phone_number = ""
             address = "N/A"
+            link = ""
             
-            # Extract name
+            # Extract name (and the detail page link from the same anchor)
             try:
                 name_div = parent_div.find_element(By.CLASS_NAME, 'resultbox_title_anchor')
                 name = name_div.text.strip()
+                if include_link:
+                    link = name_div.get_attribute('href') or ""
             except:
                 pass
             
@@ -83,39 +111,61 @@ def scrape_page_data(driver):
             except:
                 pass
             
+            # Card still filling in: leave it for a later pass
+            if rendered_only and (name in ("", "N/A") or (not phone_number and address in ("", "N/A"))):
+                return data, index
+
             # Save record even if phone is missing (as long as name exists)
             if name and name != "N/A":
-                data.append({'Name': name, 'Address': address, 'Phone': phone_number})
+                data.append(Record(name, address, phone_number, link if include_link else None))
             else:
                 print(f"Skipping parent div {index}: No name found")
 
         except Exception as e:
+            if rendered_only:
+                return data, index
             print(f"Error extracting data from listing {index}: {str(e)}")
             continue
     
-    return data
+    return data, len(parent_divs)
 
 
-def scroll_until_no_more_content(driver, scroll_pause=2, max_no_content_scrolls=5):
-    """Scroll until no more new content loads (infinite scroll)"""
+def scroll_until_no_more_content(driver, scroll_pause=2, max_no_content_scrolls=5, on_scroll=None,
+                                 cancel_event=None, should_stop=None, deadline=None):
+    """
+    Scroll until no more new content loads (infinite scroll).
+    on_scroll(scroll_count, height, new_content) is called after every scroll;
+    setting cancel_event (threading.Event) stops scrolling early, and so does
+    should_stop() returning a reason (e.g. "max_results", "deadline").
+    Returns the reason scrolling stopped early ("cancelled" or should_stop's
+    reason), or None when the end of the results was reached. The final
+    settle waits are cut short by deadline (a time.monotonic() timestamp).
+    Each scroll is a single WebDriver call (utils.scroll_step): the pause,
+    popup check and height check run in the page.
+    """
     print("Starting infinite scroll to load all results...")
     last_height = driver.execute_script("return document.body.scrollHeight")
     no_new_content_count = 0
     scroll_count = 0
+    stop_reason = None
     
     while no_new_content_count < max_no_content_scrolls:
-        # Scroll down
-        driver.execute_script("window.scrollBy(0, window.innerHeight);")
+        if cancel_event is not None and cancel_event.is_set():
+            stop_reason = "cancelled"
+        elif should_stop is not None:
+            stop_reason = should_stop()
+        if stop_reason:
+            print(f"Stopping scroll early ({stop_reason}).")
+            break
+
+        # Scroll down, wait for content to load (up to 2s more once the pause is over) and close popups
+        step = scroll_step(driver, viewports=1, pause=scroll_pause, settle=2, last_height=last_height)
         scroll_count += 1
-        
-        # Wait for content to load
-        time.sleep(scroll_pause)
-        
-        # Check for popups
-        check_and_click_close_popup(driver)
+        if step['popups']:
+            print("Clicked 'jd_modal_close' button.")
         
         # Check if new content loaded
-        new_height = driver.execute_script("return document.body.scrollHeight")
+        new_height = step['height']
         if new_height != last_height:
             print(f"Scroll {scroll_count}: New content detected (height: {new_height}px). Continuing...")
             last_height = new_height
@@ -123,40 +173,145 @@ def scroll_until_no_more_content(driver, scroll_pause=2, max_no_content_scrolls=
         else:
             no_new_content_count += 1
             print(f"Scroll {scroll_count}: No new content ({no_new_content_count}/{max_no_content_scrolls})")
+
+        if on_scroll is not None:
+            on_scroll(scroll_count, new_height, no_new_content_count == 0)
         
         # Also check if we've reached the bottom
-        current_position = driver.execute_script("return window.pageYOffset + window.innerHeight")
+        current_position = step['bottom']
         if current_position >= new_height - 10:  # Near bottom
             if no_new_content_count >= 2:
                 print("Reached bottom with no new content. Stopping scroll.")
                 break
     
+    if stop_reason:
+        print(f"Total scrolls performed: {scroll_count}")
+        return stop_reason
+
+    if not _time_left(deadline, 5):
+        print(f"Deadline reached, skipping final settle. Total scrolls performed: {scroll_count}")
+        return None
+
     # Final scroll to bottom to ensure all content is loaded
     print("Final scroll to bottom...")
     driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(3)
+    time.sleep(_time_left(deadline, 3))
     
     # Scroll back to top for data extraction
     print("Scrolling back to top...")
     driver.execute_script("window.scrollTo(0, 0);")
-    time.sleep(2)
+    time.sleep(_time_left(deadline, 2))
     
     final_height = driver.execute_script("return document.body.scrollHeight")
     print(f"Scrolling completed. Total page height: {final_height}px")
     print(f"Total scrolls performed: {scroll_count}")
+    return None
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def chromedriver_path():
+    """Resolve (and if needed download) chromedriver once per process instead of once per browser."""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
+
+# Browsers started ahead of time by prewarm_drivers(), handed out by create_driver()
+_warm_drivers = queue.Queue()
+_prewarm_target = 0
+_prewarm_lock = threading.Lock()  # held while browsers are launched (one filling thread at a time)
+_target_lock = threading.Lock()   # guards _prewarm_target against queueing a browser after shutdown
 
-def run_single_scrape(city: str, keyword: str) -> str:
+def prewarm_drivers(count):
     """
-    Programmatic entrypoint for scraping one city + one keyword.
-    Returns the path to the generated CSV file.
+    Launch `count` browsers now (e.g. at API startup) so the next create_driver()
+    calls return immediately. Every browser taken is replaced in the background.
+    """
+    global _prewarm_target
+    with _target_lock:
+        _prewarm_target = count
+    _fill_warm_drivers()
+
+def _fill_warm_drivers():
+    if not _prewarm_lock.acquire(blocking=False):
+        return  # another thread is already filling up to the target
+    try:
+        while _warm_drivers.qsize() < _prewarm_target:
+            try:
+                driver = launch_driver()
+            except Exception as e:
+                print(f"⚠ Could not pre-warm a browser: {e}")
+                return
+            with _target_lock:
+                # close_warm_drivers() may have run while the browser started
+                wanted = _warm_drivers.qsize() < _prewarm_target
+                if wanted:
+                    _warm_drivers.put(driver)
+            if not wanted:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                return
+            print(f"✓ Pre-warmed browser {_warm_drivers.qsize()}/{_prewarm_target}")
+    finally:
+        _prewarm_lock.release()
+
+def close_warm_drivers():
+    """Quit every pre-warmed browser; waits for a browser that is still being launched."""
+    global _prewarm_target
+    with _target_lock:
+        _prewarm_target = 0
+    with _prewarm_lock:
+        while True:
+            try:
+                driver = _warm_drivers.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+def _take_warm_driver():
+    while True:
+        try:
+            driver = _warm_drivers.get_nowait()
+        except queue.Empty:
+            return None
+        try:
+            driver.current_url  # still alive?
+        except Exception:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            continue
+        if _prewarm_target:
+            threading.Thread(target=_fill_warm_drivers, name="prewarm", daemon=True).start()
+        return driver
+
+def create_driver(profile_pool=None):
+    """
+    A browser for one scrape: a pre-warmed one when available (see
+    prewarm_drivers), otherwise a newly launched one (launch_driver).
     """
-    # Build JustDial URL from city + keyword
-    base_url = "https://www.justdial.com/"
-    city_formatted = city.replace(" ", "-").replace("–", "-").replace("/", "-").lower()
-    keyword_formatted = keyword.replace(" ", "-").lower()
-    url = f"{base_url}{city_formatted}/{keyword_formatted}/"
+    driver = _take_warm_driver() if profile_pool is None else None
+    return driver or launch_driver(profile_pool)
+
+def launch_driver(profile_pool=None):
+    """
+    Chrome with the scraper's usual options and the webdriver flag hidden.
+    With persistent profiles (JD_PROFILE_ROOT, see profiles.py) the browser gets
+    its own reusable user-data-dir and disk cache, released again on quit().
+    """
+    import profiles
+
+    pool = profile_pool or profiles.get_default_pool()
+    profile = pool.acquire() if pool is not None else None
 
-    # Set up Chrome options (same as in __main__ block)
     chrome_options = Options()
     user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
     chrome_options.add_argument(f"user-agent={user_agent}")
@@ -164,23 +319,103 @@ def run_single_scrape(city: str, keyword: str) -> str:
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option("useAutomationExtension", False)
     chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    if os.getenv('JD_HEADLESS', '').lower() in ('1', 'true', 'yes'):
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1366,900")
+    if profile is not None:
+        for argument in profile.chrome_arguments(pool.cache_mb):
+            chrome_options.add_argument(argument)
+
+    try:
+        with metrics.phase("driver_start"):
+            service = Service(chromedriver_path())
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+    except Exception:
+        if profile is not None:
+            pool.release(profile)
+        raise
+
+    metrics.ACTIVE_BROWSERS.inc()
+    chrome_quit = driver.quit
+    closed = threading.Event()
+
+    def quit():
+        if closed.is_set():
+            return
+        closed.set()
+        try:
+            chrome_quit()
+        finally:
+            metrics.ACTIVE_BROWSERS.dec()
+            if profile is not None:
+                pool.release(profile)
 
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.quit = quit
     driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    driver.set_script_timeout(SCRIPT_TIMEOUT)  # in-page scroll phases, see utils.py
+    return driver
 
-    # Ensure output folder exists
-    os.makedirs("Scrapped", exist_ok=True)
-    csv_filename = os.path.join("Scrapped", f"{city_formatted}_{keyword_formatted}.csv")
+class ThreadLocalDrivers:
+    """
+    One browser per worker thread, created on first use and reused for every
+    task the thread runs; close() quits them all. Used by the parallel stages
+    (sharding.py, enrichment.py).
+    """
 
-    try:
+    def __init__(self, factory=None):
+        self.factory = factory or create_driver
+        self._local = threading.local()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        if getattr(self._local, 'driver', None) is None:
+            self._local.driver = self.factory()
+            with self._lock:
+                self._drivers.append(self._local.driver)
+        return self._local.driver
+
+    def discard(self):
+        """Quit this thread's browser (e.g. after it crashed); the next get() starts a new one."""
+        driver = getattr(self._local, 'driver', None)
+        self._local.driver = None
+        if driver is not None:
+            with self._lock:
+                self._drivers.remove(driver)
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+def collect_listings(driver, url, on_event=None, cancel_event=None, max_results=None, deadline=None,
+                     include_link=False, snapshot=None):
+    """
+    Open a search URL, scroll through its results and extract them.
+    Returns (records, stop_reason); stop_reason is None when the end of the
+    results was reached, else "max_results", "deadline" or "cancelled".
+    deadline is a time.monotonic() timestamp. include_link adds each listing's
+    detail page URL as 'Link'. With snapshot (a dict such as {"city", "keyword"})
+    the scrolled page is saved for offline re-extraction, see snapshots.py.
+    """
+    with metrics.phase("navigation"):
         driver.get(url)
         print("Opened URL:", url)
+        _emit(on_event, "page_opened", url=url)
+        time.sleep(_time_left(deadline, 5))
 
-        # Handle 'Maybe Later' popup if present
-        time.sleep(5)
+    # Handle 'Maybe Later' popup if present
+    with metrics.phase("popups"):
         try:
-            maybe_later_button = WebDriverWait(driver, 10).until(
+            maybe_later_button = WebDriverWait(driver, _time_left(deadline, 10)).until(
                 EC.presence_of_element_located((By.CLASS_NAME, "maybelater"))
             )
             if maybe_later_button.is_displayed():
@@ -189,26 +424,187 @@ def run_single_scrape(city: str, keyword: str) -> str:
         except Exception:
             pass
 
-        # Scroll and load all results
-        print("\nStarting to scroll and load all results...")
-        scroll_until_no_more_content(driver, scroll_pause=2, max_no_content_scrolls=5)
+    # When someone is listening or the scrape is bounded, extract new cards as
+    # they load instead of only at the end
+    all_data = []
+    cards_done = 0
+    # [card index the last pass stopped at, passes in a row that stopped there]
+    stalled = [None, 0]
+    incremental = on_event is not None or max_results is not None or deadline is not None
 
-        # Extract data
-        print("\nExtracting data from all loaded results...")
-        all_data = scrape_page_data(driver)
+    def extract_new_cards(rendered_only=True):
+        nonlocal cards_done
+        limit = max_results - len(all_data) if max_results is not None else None
+        if limit is not None and limit <= 0:
+            return
+        with metrics.phase("extraction"):
+            records, cards_done_now = scrape_new_cards(
+                driver, cards_done, limit, include_link=include_link,
+                rendered_only=rendered_only and stalled[1] < RENDER_RETRIES)
+        if rendered_only:
+            stalled[:] = [cards_done_now, stalled[1] + 1] if cards_done_now == stalled[0] else [cards_done_now, 1]
+        if cards_done_now > cards_done:
+            _emit(on_event, "cards_loaded", count=cards_done_now)
+        cards_done = max(cards_done, cards_done_now)
+        if records:
+            all_data.extend(records)
+            _emit(on_event, "records", records=records)
 
-        if all_data:
-            with open(csv_filename, "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=["Name", "Address", "Phone"])
-                writer.writeheader()
-                writer.writerows(all_data)
-            print(f"Saved {len(all_data)} records to {csv_filename}")
+    def on_scroll(scroll_count, height, new_content):
+        _emit(on_event, "scroll", scroll=scroll_count, height=height, new_content=new_content)
+        if new_content:
+            extract_new_cards()
+
+    def should_stop():
+        if max_results is not None and len(all_data) >= max_results:
+            return "max_results"
+        if deadline is not None and time.monotonic() >= deadline:
+            return "deadline"
+        return None
+
+    # Scroll and load all results
+    print("\nStarting to scroll and load all results...")
+    with metrics.phase("scrolling"):
+        stop_reason = scroll_until_no_more_content(driver, scroll_pause=2, max_no_content_scrolls=5,
+                                                   on_scroll=on_scroll if incremental else None,
+                                                   cancel_event=cancel_event, should_stop=should_stop,
+                                                   deadline=deadline)
+
+    # Extract data (everything, or what the scroll callbacks haven't picked up yet)
+    print("\nExtracting data from all loaded results...")
+    extract_new_cards(rendered_only=False)
+    if stop_reason:
+        print(f"Partial results ({stop_reason}): {len(all_data)} records")
+    if snapshot is not None:
+        save_page_snapshot(driver, url, records=len(all_data), stop_reason=stop_reason, **snapshot)
+    return all_data, stop_reason
+
+def save_page_snapshot(driver, url, **meta):
+    """Save the current DOM as a gzipped snapshot (snapshots.py); failures are printed, never raised."""
+    with metrics.phase("snapshot"):
+        try:
+            path = snapshots.save_snapshot(driver.page_source, url, **meta)
+            print(f"Saved page snapshot to {path}")
+            return path
+        except Exception as e:
+            print(f"⚠ Could not save page snapshot: {e}")
+            return None
+
+def run_single_scrape(city: str, keyword: str, store=None, parquet_sink=None, on_event=None, cancel_event=None,
+                      max_results=None, deadline_seconds=None, shard=None, enrich=None, profiler=None,
+                      snapshot=None) -> str:
+    """
+    Programmatic entrypoint for scraping one city + one keyword.
+    Returns the path to the generated CSV file (see run_scrape for the details).
+    """
+    result = run_scrape(city, keyword, store=store, parquet_sink=parquet_sink, on_event=on_event,
+                        cancel_event=cancel_event, max_results=max_results, deadline_seconds=deadline_seconds,
+                        shard=shard, enrich=enrich, profiler=profiler, snapshot=snapshot)
+    return result["csv_path"]
+
+def run_scrape(city: str, keyword: str, store=None, parquet_sink=None, on_event=None, cancel_event=None,
+               max_results=None, deadline_seconds=None, shard=None, enrich=None, profiler=None,
+               snapshot=None, url=None, output_dir=None) -> dict:
+    """
+    Scrape one city + one keyword.
+    Returns {"csv_path", "records", "truncated", "stop_reason", "shards", "enrichment"}; truncated
+    is True when scrolling stopped before the end of the results, with stop_reason
+    "max_results", "deadline" or "cancelled".
+    With a `store` (storage.SQLiteStore) records are upserted into the database
+    and the CSV is exported from it for this city + keyword.
+    With a `parquet_sink` (parquet_output.ParquetSink) records are also written to Parquet.
+
+    on_event(event, data) receives progress as it happens: "page_opened",
+    "scroll", "cards_loaded" and "records" (batches of newly extracted records,
+    extracted while scrolling). Setting cancel_event stops scrolling; whatever
+    was loaded so far is still extracted and saved.
+
+    max_results stops once that many records have been extracted and
+    deadline_seconds stops scrolling that many seconds after the call started.
+
+    shard=True splits the query into one search per locality (localities.json)
+    scraped in parallel, see sharding.py; None follows JD_SHARDING.
+
+    enrich=True fetches the detail pages of listings whose phone was hidden
+    (see enrichment.py); None follows JD_ENRICH. Its stats are returned as
+    "enrichment" and sent as an "enriched" event.
+
+    profiler (profiling.JobProfiler) traces the WebDriver commands and sleeps
+    of every browser the scrape opens.
+
+    snapshot=True saves each scrolled results page as gzipped HTML for offline
+    re-extraction (see snapshots.py, snapshot_extract.py); None follows JD_SNAPSHOTS.
+
+    url scrapes that exact search page instead of the one built from city +
+    keyword (which then only label the output); it is never sharded and the
+    CSV is named after the URL path.
+
+    output_dir writes the CSV of just this run's records into that folder
+    (bulk.py uses one per batch) instead of the shared Scrapped/ file, which
+    later scrapes overwrite and which a store exports with earlier runs.
+    """
+    import enrichment
+    import sharding
+
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+
+    # Ensure output folder exists
+    os.makedirs(output_dir or "Scrapped", exist_ok=True)
+    if url:
+        csv_filename = os.path.join(output_dir or "Scrapped", f"{url_file_stem(url)}.csv")
+    else:
+        csv_filename = os.path.join(output_dir or "Scrapped", f"{format_city(city)}_{format_keyword(keyword)}.csv")
+
+    include_link = enrichment.enrichment_enabled(enrich)
+    snapshot_meta = {"city": city, "keyword": keyword} if snapshots.snapshots_enabled(snapshot) else None
+    shards = 1
+    # Profiled scrapes get every browser (main, shard and enrichment ones) from a traced factory
+    drivers = ThreadLocalDrivers(profiler.wrap_factory(create_driver)) if profiler is not None else None
+    try:
+        if not url and sharding.should_shard(city, shard):
+            all_data, stop_reason, shards = sharding.scrape_sharded(
+                city, keyword, on_event=on_event, cancel_event=cancel_event,
+                max_results=max_results, deadline=deadline, include_link=include_link, drivers=drivers,
+                snapshot=snapshot_meta,
+            )
         else:
-            print("No data extracted; CSV will be empty or not created.")
+            driver = drivers.get() if drivers is not None else create_driver()
+            try:
+                all_data, stop_reason = collect_listings(driver, url or build_search_url(city, keyword),
+                                                         on_event=on_event,
+                                                         cancel_event=cancel_event, max_results=max_results,
+                                                         deadline=deadline, include_link=include_link,
+                                                         snapshot=snapshot_meta)
+            finally:
+                if drivers is None:
+                    driver.quit()
 
-        return csv_filename
+        enrichment_stats = None
+        if include_link:
+            with metrics.phase("enrichment"):
+                enrichment_stats = enrichment.enrich_records(all_data, cancel_event=cancel_event, drivers=drivers)
+            _emit(on_event, "enriched", **enrichment_stats)
+
+        save_city_records(all_data, city, keyword, csv_filename, store=store, parquet_sink=parquet_sink,
+                          run_only=output_dir is not None)
+    except Exception:
+        metrics.SCRAPES.labels("failed").inc()
+        raise
     finally:
-        driver.quit()
+        if drivers is not None:
+            drivers.close()
+
+    metrics.RECORDS.inc(len(all_data))
+    metrics.SCRAPES.labels("truncated" if stop_reason else "complete").inc()
+
+    return {
+        "csv_path": csv_filename,
+        "records": len(all_data),
+        "truncated": stop_reason is not None,
+        "stop_reason": stop_reason,
+        "shards": shards,
+        "enrichment": enrichment_stats,
+    }
 
 # Main execution - only runs when script is executed directly, not when imported
 if __name__ == "__main__":
@@ -219,21 +615,8 @@ if __name__ == "__main__":
         # Use the original URL fetching method if temp_url.txt does not exist
         url = get_url_input()
 
-    # Set up Chrome options
-    chrome_options = Options()
-    user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-    chrome_options.add_argument(f"user-agent={user_agent}")
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option("useAutomationExtension", False)
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-
-    # Set up WebDriver
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-
-    # Hide WebDriver signature
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    # Set up WebDriver (hides the WebDriver signature; persistent profile if JD_PROFILE_ROOT is set)
+    driver = create_driver()
 
     # Ensure the 'Scrapped' folder exists
     os.makedirs('Scrapped', exist_ok=True)
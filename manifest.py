@@ -0,0 +1,125 @@
+# manifest.py
+
+import hashlib
+import json
+import os
+
+
+def _hash_file(path, prefix_size=0, chunk_size=1024 * 1024):
+    """
+    Hash a file in one pass.
+    Returns (full_sha256, prefix_sha256) where the prefix digest covers the
+    first `prefix_size` bytes (None when prefix_size is 0).
+    """
+    hasher = hashlib.sha256()
+    prefix_digest = None
+    read = 0
+    with open(path, 'rb') as f:
+        while True:
+            # Stop exactly on the prefix boundary so its digest can be snapshotted
+            if prefix_size and read < prefix_size:
+                chunk = f.read(min(chunk_size, prefix_size - read))
+            else:
+                chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            read += len(chunk)
+            if prefix_size and read == prefix_size:
+                prefix_digest = hasher.copy().hexdigest()
+    return hasher.hexdigest(), prefix_digest
+
+
+class FileManifest:
+    """
+    Remembers which input files have already been processed
+    (path, size, mtime, content hash) so a run only touches what changed.
+
+    Files are classified as:
+      - new        : never seen before
+      - appended   : old content is an unchanged prefix of the new content
+      - modified   : content changed in any other way
+      - unchanged  : same size/mtime, or same content hash
+      - removed    : in the manifest but no longer on disk
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.meta = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: could not read manifest {self.path}: {e}. Starting fresh.")
+            return
+        if data.get('version') != self.VERSION:
+            print(f"Manifest {self.path} has an unknown version. Starting fresh.")
+            return
+        self.files = data.get('files', {})
+        self.meta = data.get('meta', {})
+
+    def save(self):
+        """Write the manifest atomically (temp file + rename)."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'meta': self.meta, 'files': self.files}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        self.files = {}
+        self.meta = {}
+
+    def classify(self, paths):
+        """
+        Compare `paths` against the manifest.
+        Returns a dict of lists: new, appended, modified, unchanged, removed.
+        Every non-removed entry is (path, fingerprint); appended entries also
+        carry the byte offset where the new data starts.
+        """
+        result = {'new': [], 'appended': [], 'modified': [], 'unchanged': [], 'removed': []}
+        seen = set()
+
+        for path in paths:
+            seen.add(path)
+            stat = os.stat(path)
+            old = self.files.get(path)
+
+            if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+                result['unchanged'].append((path, old))
+                continue
+
+            # Only changed files are read; one pass gives both the full digest
+            # and the digest of the previously processed prefix.
+            prefix_size = old['size'] if old and 0 < old['size'] <= stat.st_size else 0
+            sha256, prefix_sha256 = _hash_file(path, prefix_size)
+            fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+
+            if old is None:
+                result['new'].append((path, fingerprint))
+            elif sha256 == old['sha256']:
+                result['unchanged'].append((path, fingerprint))
+            elif old['size'] == 0 or (prefix_size and prefix_sha256 == old['sha256']):
+                result['appended'].append((path, fingerprint, old['size']))
+            else:
+                result['modified'].append((path, fingerprint))
+
+        for path in self.files:
+            if path not in seen:
+                result['removed'].append(path)
+
+        return result
+
+    def record(self, path, fingerprint):
+        self.files[path] = fingerprint
+
+    def forget(self, path):
+        self.files.pop(path, None)
@@ -1,48 +1,405 @@
 import pandas as pd
+import argparse
+import csv
 import os
+import shutil
+import sqlite3
 import time
+from manifest import FileManifest
+from records import RecordBatch
+from writer import atomic_write
+import parquet_output
 
 # Paths relative to the current working directory
 folder_path = 'Scrapped'  # Directory containing CSV files
 output_folder = 'Clean Data'  # Directory to save cleaned data
+output_file = os.path.join(output_folder, 'cleaned_data.csv')
+resolved_file = os.path.join(output_folder, 'resolved_data.csv')
 
-# Create the output folder if it doesn't exist
-os.makedirs(output_folder, exist_ok=True)
+# Parquet outputs are dataset directories; each incremental run adds a part file
+parquet_output_dir = os.path.join(output_folder, 'cleaned_data.parquet')
+parquet_resolved_dir = os.path.join(output_folder, 'resolved_data.parquet')
 
-# List all CSV files in the folder
-csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
+# Incremental state: which input files were merged, and which keys were already written
+manifest_file = os.path.join(output_folder, 'merge_manifest.json')
+keys_file = os.path.join(output_folder, 'merge_keys.db')
 
-print(f'Found {len(csv_files)} CSV files.')
+# Legacy behaviour dedups on the exact Name. When entity resolution runs afterwards,
+# only exact row duplicates are dropped here so distinct branches sharing a name survive.
+DEDUP_COLUMNS = ['Name']
+RESOLVE_DEDUP_COLUMNS = ['Name', 'Address', 'Phone']
 
-# Create an empty DataFrame to hold all the data
-all_data = pd.DataFrame()
+# Dedup keys are built from the values as read. Inputs are read as plain text
+# ('text'); the pandas reader this replaced keyed empty cells as 'nan'.
+KEY_FORMAT = 'text'
 
-# Read each CSV file and append it to the all_data DataFrame
-for file in csv_files:
-    file_path = os.path.join(folder_path, file)
-    print(f'Reading {file_path}...')
-    df = pd.read_csv(file_path)
-    all_data = pd.concat([all_data, df], ignore_index=True)
+# Layout of merge_keys.db; version 2 added the per-file key refs used to retract one file
+KEY_STORE_VERSION = 2
 
-print(f'Combined data contains {len(all_data)} rows before processing.')
 
-# Check if 'Name' column exists
-if 'Name' not in all_data.columns:
-    raise ValueError("The 'Name' column is missing from the data.")
+class KeyStore:
+    """
+    Persistent set of dedup keys already written to the cleaned output.
 
-# Remove duplicates based on the 'Name' column, keeping the first occurrence
-print('Removing duplicates based on the Name column, keeping the first occurrence...')
-cleaned_data = all_data.drop_duplicates(subset=['Name'], keep='first')
+    Each key has an owner (the input file whose row was written) and refs (every
+    input file the key was seen in), so a rewritten or deleted input file can be
+    retracted on its own instead of rebuilding the whole output.
+    """
 
-print(f'Cleaned data contains {len(cleaned_data)} rows after removing duplicates.')
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("DROP TABLE IF EXISTS keys")  # version 1 layout, replaced by a rebuild
+        self.conn.execute("CREATE TABLE IF NOT EXISTS key_owners (key TEXT PRIMARY KEY, source TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS key_refs "
+                          "(source TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (source, key))")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS key_refs_key ON key_refs (key)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS key_owners_source ON key_owners (source)")
 
-# Save the cleaned data to a new CSV file in the Clean Data folder
-output_file = os.path.join(output_folder, 'cleaned_data.csv')
-print(f'Saving cleaned data to {output_file}...')
-cleaned_data.to_csv(output_file, index=False)
+    def clear(self):
+        self.conn.execute("DELETE FROM key_owners")
+        self.conn.execute("DELETE FROM key_refs")
+        self.conn.commit()
+
+    def filter_new(self, keys, source):
+        """
+        Return a boolean list marking the keys that were never seen before
+        (first occurrence only, also within `keys` itself) and remember them,
+        owned by `source`. Every key is also recorded as seen in `source`.
+        """
+        existing = set()
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), 500):
+            chunk = unique_keys[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT key FROM key_owners WHERE key IN ({placeholders})", chunk)
+            existing.update(row[0] for row in rows)
+
+        is_new = []
+        fresh = set()
+        for key in keys:
+            if key in existing or key in fresh:
+                is_new.append(False)
+            else:
+                fresh.add(key)
+                is_new.append(True)
+
+        self.conn.executemany("INSERT OR IGNORE INTO key_owners (key, source) VALUES (?, ?)",
+                              ((k, source) for k in fresh))
+        self.conn.executemany("INSERT OR IGNORE INTO key_refs (source, key) VALUES (?, ?)",
+                              ((source, k) for k in unique_keys))
+        return is_new
+
+    def retract(self, source):
+        """
+        Forget everything `source` contributed. Returns (removed, moved): keys it
+        owned that no other file contains are deleted (removed, a set); the others
+        move to the first other file (in path order, as a full rebuild reads them)
+        that contains them (moved, {key: new owner}). The output rows of both
+        came from `source`, so they have to be dropped, and moved keys get the
+        new owner's row instead.
+        """
+        self.conn.execute("DELETE FROM key_refs WHERE source = ?", (source,))
+        owners = self.conn.execute(
+            "SELECT o.key, (SELECT MIN(r.source) FROM key_refs r WHERE r.key = o.key) "
+            "FROM key_owners o WHERE o.source = ?", (source,)).fetchall()
+        moved = {key: owner for key, owner in owners if owner is not None}
+        self.conn.executemany("UPDATE key_owners SET source = ? WHERE key = ?",
+                              ((owner, key) for key, owner in moved.items()))
+        self.conn.execute("DELETE FROM key_owners WHERE source = ?", (source,))
+        return {key for key, owner in owners if owner is None}, moved
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def list_input_files(folder):
+    """All CSV files in the input folder plus Parquet part files under it, in a stable order."""
+    files = [os.path.join(folder, f) for f in os.listdir(folder) if f.endswith('.csv')]
+    for root, _, names in os.walk(folder):
+        files.extend(os.path.join(root, f) for f in names if f.endswith('.parquet'))
+    return sorted(files)
+
+
+def read_input(file_path, offset=0):
+    """Read an input file as a RecordBatch (Parquet parts are immutable, so they are always read whole)."""
+    if file_path.endswith('.parquet'):
+        return parquet_output.read_part_batch(file_path)
+    return read_csv_from(file_path, offset)
+
+
+def read_csv_from(file_path, offset=0):
+    """
+    Read a CSV file, or only the rows appended after byte `offset`, as a
+    RecordBatch. Values stay text, so phone numbers keep their leading zeros
+    and empty cells stay empty.
+    """
+    with open(file_path, newline='', encoding='utf-8') as f:
+        if offset == 0:
+            return RecordBatch.read_csv(f)
+        header = next(csv.reader(f), [])
+        f.seek(offset)
+        return RecordBatch.from_rows(header, csv.reader(f))
+
+
+def dedup_keys(batch, dedup_columns):
+    return ['\x1f'.join(values) for values in batch.rows(dedup_columns)]
+
+
+def drop_output_rows(keys, dedup_columns, output_format):
+    """
+    Remove the rows whose dedup key is in `keys` from the cleaned output.
+    Returns the number of rows removed. The CSV is rewritten atomically; for
+    Parquet only the part files holding such rows are replaced.
+    """
+    dropped = 0
+    if output_format == 'parquet':
+        for name in sorted(os.listdir(parquet_output_dir)):
+            if not name.endswith('.parquet'):
+                continue
+            path = os.path.join(parquet_output_dir, name)
+            batch = parquet_output.read_part_batch(path)
+            keep = [key not in keys for key in dedup_keys(batch, dedup_columns)]
+            if all(keep):
+                continue
+            dropped += keep.count(False)
+            if any(keep):
+                parquet_output.write_frame(batch.take(keep).to_frame(), parquet_output_dir)
+            os.remove(path)
+        return dropped
+
+    with open(output_file, newline='', encoding='utf-8') as src, atomic_write(output_file) as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        header = next(reader, [])
+        writer.writerow(header)
+        positions = [header.index(c) if c in header else None for c in dedup_columns]
+        for row in reader:
+            key = '\x1f'.join(row[i] if i is not None and i < len(row) else '' for i in positions)
+            if key in keys:
+                dropped += 1
+            else:
+                writer.writerow(row)
+    return dropped
+
+
+def owner_rows(moved, dedup_columns, columns):
+    """
+    The rows that replace moved keys in the output: for each {key: owner file},
+    the first row of the owner with that key, limited to the output `columns`.
+    """
+    by_owner = {}
+    for key, owner in moved.items():
+        by_owner.setdefault(owner, set()).add(key)
+    batches = []
+    for owner in sorted(by_owner):
+        wanted = by_owner[owner]
+        batch = read_input(owner)
+        keep = []
+        for key in dedup_keys(batch, dedup_columns):
+            keep.append(key in wanted)
+            wanted.discard(key)
+        batches.append(batch.take(keep, columns))
+    return RecordBatch.concat(batches, columns)
+
+
+def output_path_for(output_format):
+    return parquet_output_dir if output_format == 'parquet' else output_file
+
+
+def write_output(batch, output_format, append):
+    """Write (or append to) the cleaned output in the chosen format."""
+    if output_format == 'parquet':
+        if not append and os.path.exists(parquet_output_dir):
+            shutil.rmtree(parquet_output_dir)
+        if len(batch) or not append:
+            parquet_output.write_frame(batch.to_frame(), parquet_output_dir)
+    else:
+        with open(output_file, 'a' if append else 'w', newline='', encoding='utf-8') as f:
+            batch.write_csv(f, header=not append)
+
+
+def resolve(output_format='csv'):
+    """Run entity resolution over the cleaned data and save one canonical record per business."""
+    from entity_resolution import resolve_entities
+
+    input_path = output_path_for(output_format)
+    print(f'Resolving entities in {input_path}...')
+    if output_format == 'parquet':
+        data = pd.read_parquet(input_path).astype('string').fillna('')
+    else:
+        data = pd.read_csv(input_path, dtype=str, keep_default_na=False)
+    _, canonical = resolve_entities(data)
+
+    if output_format == 'parquet':
+        if os.path.exists(parquet_resolved_dir):
+            shutil.rmtree(parquet_resolved_dir)
+        parquet_output.write_frame(canonical, parquet_resolved_dir)
+        output_path = parquet_resolved_dir
+    else:
+        canonical.to_csv(resolved_file, index=False)
+        output_path = resolved_file
+    print(f'Resolved data saved to {output_path}')
+    return output_path
+
+
+def merge(full=False, resolve_entities=False, output_format='csv'):
+    """
+    Merge scraped CSV/Parquet files into the cleaned output (CSV or Parquet).
+
+    Only new, appended or rewritten input files are read, and only rows whose
+    dedup key was never written before are appended to the output. A file
+    that was rewritten or deleted is retracted first: its rows are dropped
+    from the output (replaced by another file's row for the same key, if
+    any), and a rewritten file is then read again like a new one. A full rebuild is done when there is no
+    previous state, when `full` is set, or when the output settings changed.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+
+    csv_files = list_input_files(folder_path)
+    print(f'Found {len(csv_files)} CSV files.')
+
+    manifest = FileManifest(manifest_file)
+    key_store = KeyStore(keys_file)
+
+    changes = manifest.classify(csv_files)
+    columns = manifest.meta.get('columns')
+    dedup_columns = RESOLVE_DEDUP_COLUMNS if resolve_entities else DEDUP_COLUMNS
+
+    rebuild_reason = None
+    if full:
+        rebuild_reason = 'full rebuild requested'
+    elif not os.path.exists(output_path_for(output_format)) or not columns:
+        rebuild_reason = 'no previous merge output'
+    elif manifest.meta.get('output_format', 'csv') != output_format:
+        rebuild_reason = 'output format changed'
+    elif manifest.meta.get('dedup_columns') != dedup_columns or manifest.meta.get('key_format') != KEY_FORMAT:
+        rebuild_reason = 'dedup key changed'
+    elif manifest.meta.get('key_store') != KEY_STORE_VERSION:
+        rebuild_reason = 'dedup key store format changed'
+
+    if rebuild_reason:
+        print(f'Rebuilding cleaned data from scratch ({rebuild_reason}).')
+        manifest.reset()
+        key_store.clear()
+        changes = manifest.classify(csv_files)
+        columns = None
+        work = [(path, fp, 0) for path, fp in changes['new']]
+    else:
+        work = ([(path, fp, 0) for path, fp in changes['new'] + changes['modified']] + changes['appended'])
+        print(f"{len(changes['unchanged'])} unchanged, {len(changes['new'])} new, "
+              f"{len(changes['appended'])} appended, {len(changes['modified'])} rewritten, "
+              f"{len(changes['removed'])} removed file(s).")
+
+        # Take back what rewritten or deleted files contributed; the rest of the output stays
+        retracted = [path for path, _ in changes['modified']] + changes['removed']
+        if retracted:
+            removed_keys, moved = set(), {}
+            for path in retracted:
+                removed, moved_now = key_store.retract(path)
+                # A key moved to a file retracted later in this loop shows up again there
+                for key in removed:
+                    moved.pop(key, None)
+                removed_keys |= removed
+                moved.update(moved_now)
+            dropped = drop_output_rows(removed_keys | moved.keys(), dedup_columns, output_format) \
+                if removed_keys or moved else 0
+            if moved:
+                write_output(owner_rows(moved, dedup_columns, columns), output_format, append=True)
+            key_store.commit()
+            for path in changes['removed']:
+                manifest.forget(path)
+            print(f'Retracted {len(retracted)} file(s): {dropped} row(s) removed, {len(moved)} of them '
+                  f'replaced by the row of another file that has the same key.')
+
+    if not work:
+        print('Nothing new to merge.')
+        manifest.save()
+        key_store.close()
+        if resolve_entities:
+            resolve(output_format)
+        return output_path_for(output_format)
+
+    # Read only the new data
+    batches = []
+    for file_path, fingerprint, offset in work:
+        if offset:
+            print(f'Reading {file_path} (appended rows from byte {offset})...')
+        else:
+            print(f'Reading {file_path}...')
+        batches.append(read_input(file_path, offset))
+
+    new_data = RecordBatch.concat(batches)
+    new_columns = new_data.fieldnames()
+    print(f'New data contains {len(new_data)} rows before processing.')
+
+    # Check if 'Name' column exists
+    if 'Name' not in new_columns:
+        raise ValueError("The 'Name' column is missing from the data.")
+
+    # New columns can't be appended under the existing header; start over with the full column set
+    if columns and any(c not in columns for c in new_columns):
+        manifest.save()
+        key_store.close()
+        print('Input files contain new columns. Falling back to a full rebuild...')
+        return merge(full=True, resolve_entities=resolve_entities, output_format=output_format)
+
+    if columns is None:
+        columns = new_columns
+
+    # Remove duplicates, keeping the first occurrence ever written
+    print(f"Removing duplicates based on {', '.join(dedup_columns)}, keeping the first occurrence...")
+    is_new = []
+    for (file_path, _, _), batch in zip(work, batches):
+        is_new.extend(key_store.filter_new(dedup_keys(batch, dedup_columns), file_path))
+    cleaned_data = new_data.take(is_new, columns)
+
+    print(f'{len(cleaned_data)} new rows after removing duplicates.')
+
+    # Save the cleaned data to the Clean Data folder
+    output_path = output_path_for(output_format)
+    if rebuild_reason:
+        print(f'Saving cleaned data to {output_path}...')
+    else:
+        print(f'Appending cleaned data to {output_path}...')
+    write_output(cleaned_data, output_format, append=not rebuild_reason)
+
+    # Commit state only after the output was written
+    key_store.commit()
+    key_store.close()
+    for file_path, fingerprint, _ in work:
+        manifest.record(file_path, fingerprint)
+    for file_path, fingerprint in changes['unchanged']:
+        manifest.record(file_path, fingerprint)
+    manifest.meta['columns'] = columns
+    manifest.meta['dedup_columns'] = dedup_columns
+    manifest.meta['key_format'] = KEY_FORMAT
+    manifest.meta['key_store'] = KEY_STORE_VERSION
+    manifest.meta['output_format'] = output_format
+    manifest.save()
+
+    print(f'Cleaned data saved to {output_path}')
+
+    # Clusters can span old and new rows, so resolution always looks at the whole cleaned file
+    if resolve_entities:
+        resolve(output_format)
+    return output_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Merge scraped CSVs into Clean Data/cleaned_data.csv')
+    parser.add_argument('--full', action='store_true', help='ignore previous state and rebuild from scratch')
+    parser.add_argument('--resolve', action='store_true',
+                        help='resolve fuzzy duplicates into Clean Data/resolved_data.csv')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help='output format (Parquet input files are always read)')
+    args = parser.parse_args()
 
-print(f'Cleaned data saved to {output_file}')
+    merge(full=args.full, resolve_entities=args.resolve, output_format=args.format)
 
-# Wait for 5 seconds before exiting
-print('Exiting in 5 seconds...')
-time.sleep(5)
+    # Wait for 5 seconds before exiting
+    print('Exiting in 5 seconds...')
+    time.sleep(5)
@@ -0,0 +1,107 @@
+# metrics.py
+
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+                                   generate_latest, push_to_gateway, write_to_textfile)
+except ImportError:  # optional dependency, metrics are no-ops without it
+    CollectorRegistry = None
+    CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Batch runs: push to a Prometheus Pushgateway and/or dump to a file (node_exporter textfile format)
+PUSHGATEWAY = os.getenv('JD_METRICS_PUSHGATEWAY', '')
+METRICS_FILE = os.getenv('JD_METRICS_FILE', '')
+PUSH_JOB = os.getenv('JD_METRICS_JOB', 'justdial_batch')
+
+# Scrape phases run from milliseconds (extraction) to many minutes (scrolling a metro)
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+class _NoopMetric:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def set_function(self, f):
+        pass
+
+
+if CollectorRegistry is not None:
+    registry = CollectorRegistry()
+    PHASE_SECONDS = Histogram(
+        'jd_phase_seconds', 'Time spent per scrape phase (driver_start, navigation, popups, scrolling, '
+        'extraction, snapshot, write, enrichment, llm); scrolling includes its popup checks and streamed extraction',
+        ['phase'], buckets=PHASE_BUCKETS, registry=registry)
+    PHASE_FAILURES = Counter('jd_phase_failures_total', 'Phases that raised', ['phase'], registry=registry)
+    SCRAPES = Counter('jd_scrapes_total', 'Finished city + keyword scrapes', ['outcome'], registry=registry)
+    RECORDS = Counter('jd_records_total', 'Records extracted', registry=registry)
+    ACTIVE_BROWSERS = Gauge('jd_active_browsers', 'Chrome instances currently open', registry=registry)
+    RUNNING_JOBS = Gauge('jd_running_jobs', 'Scrape jobs currently running in the API', registry=registry)
+    QUEUE_DEPTH = Gauge('jd_queue_depth', 'City + keyword scrapes waiting to start', registry=registry)
+    LLM_REQUESTS = Counter('jd_llm_requests_total', 'Natural-language parses sent to the LLM', ['outcome'],
+                           registry=registry)
+else:
+    registry = None
+    PHASE_SECONDS = PHASE_FAILURES = SCRAPES = RECORDS = _NoopMetric()
+    ACTIVE_BROWSERS = RUNNING_JOBS = QUEUE_DEPTH = LLM_REQUESTS = _NoopMetric()
+
+
+def enabled():
+    return registry is not None
+
+
+@contextmanager
+def phase(name):
+    """Time a block as one observation of jd_phase_seconds{phase=name}; failures are counted too."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        PHASE_FAILURES.labels(name).inc()
+        raise
+    finally:
+        PHASE_SECONDS.labels(name).observe(time.perf_counter() - start)
+
+
+def latest():
+    """(body, content type) for a /metrics response."""
+    if registry is None:
+        return b"# prometheus_client is not installed: pip install prometheus_client\n", CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def export(pushgateway=None, filename=None, job=None):
+    """
+    Push the metrics to a Pushgateway and/or write them to a file (defaults:
+    JD_METRICS_PUSHGATEWAY, JD_METRICS_FILE). For runs without an API to scrape,
+    like batch_scraper.py. Failures are printed, never raised.
+    """
+    if registry is None:
+        return
+    pushgateway = pushgateway or PUSHGATEWAY
+    filename = filename or METRICS_FILE
+    if pushgateway:
+        try:
+            push_to_gateway(pushgateway, job=job or PUSH_JOB, registry=registry)
+        except Exception as e:
+            print(f"⚠ Could not push metrics to {pushgateway}: {e}")
+    if filename:
+        try:
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+            write_to_textfile(filename, registry)
+        except OSError as e:
+            print(f"⚠ Could not write metrics to {filename}: {e}")
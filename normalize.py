@@ -0,0 +1,47 @@
+# normalize.py
+
+import re
+
+# Shared patterns so the scalar helpers below and the vectorized pandas
+# versions in entity_resolution.py normalize exactly the same way.
+NON_ALNUM_RE = r'[^0-9a-z]+'
+LEGAL_SUFFIX_RE = r'(?:\s+(?:pvt|private|ltd|limited|llp|inc|co|company|corp|corporation|and))+$'
+LEADING_THE_RE = r'^the\s+'
+PHONE_RE = r'(\+?\d[\d\s\-()]{7,}\d)'
+MISSING_VALUES = {'', 'n/a', 'na', 'nan', 'none', 'show number'}
+
+_non_alnum = re.compile(NON_ALNUM_RE)
+_legal_suffix = re.compile(LEGAL_SUFFIX_RE)
+_leading_the = re.compile(LEADING_THE_RE)
+_phone = re.compile(PHONE_RE)
+
+
+def normalize_text(value):
+    """Lowercase, turn punctuation into single spaces, trim."""
+    if value is None:
+        return ''
+    text = str(value).lower().replace('&', ' and ')
+    text = _non_alnum.sub(' ', text).strip()
+    return '' if text in MISSING_VALUES else text
+
+
+def normalize_name(value):
+    """Business name without legal suffixes: 'Sharma Builders Pvt. Ltd.' -> 'sharma builders'."""
+    text = normalize_text(value)
+    text = _leading_the.sub('', text)
+    return _legal_suffix.sub('', text)
+
+
+def normalize_phone(value):
+    """Last 10 digits of the first phone number in the text, or '' if there is none."""
+    if value is None:
+        return ''
+    match = _phone.search(str(value))
+    if not match:
+        return ''
+    digits = re.sub(r'\D', '', match.group(1))
+    return digits[-10:] if len(digits) >= 10 else ''
+
+
+def normalize_address(value):
+    return normalize_text(value)
@@ -0,0 +1,163 @@
+# parquet_output.py
+
+import os
+import time
+from urllib.parse import quote, unquote
+
+from records import RecordBatch
+
+# pyarrow is an optional dependency, only needed for Parquet output. It takes a
+# while to import, so it is loaded on first use rather than with this module.
+pa = ds = pq = None
+
+PARQUET_ROOT = os.path.join('Scrapped', 'parquet')
+
+RECORD_SCHEMA_FIELDS = ['Name', 'Address', 'Phone']
+
+
+def output_formats():
+    """Formats selected with JD_OUTPUT_FORMAT: csv (default), parquet, or both."""
+    value = os.getenv('JD_OUTPUT_FORMAT', 'csv').lower()
+    if value == 'both':
+        return {'csv', 'parquet'}
+    return {value}
+
+
+def _require_pyarrow():
+    global pa, ds, pq
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+    pa, ds, pq = pyarrow, pyarrow.dataset, pyarrow.parquet
+
+
+def partition_dir(root, keyword, city):
+    """Hive-style partition directory: root/Keyword=<keyword>/City=<city>."""
+    return os.path.join(root, f"Keyword={quote(keyword, safe='')}", f"City={quote(city, safe='')}")
+
+
+def partition_values(path):
+    """Recover {'Keyword': ..., 'City': ...} from a part file path inside a partitioned dataset."""
+    values = {}
+    for part in os.path.normpath(path).split(os.sep):
+        key, sep, value = part.partition('=')
+        if sep and key in ('Keyword', 'City'):
+            values[key] = unquote(value)
+    return values
+
+
+def _write_part(table, directory, compression='zstd', row_group_size=None):
+    """
+    Write `table` as a new part file in `directory`. It is written under a
+    hidden .tmp name and renamed when complete, so dataset readers (which skip
+    hidden files) and merge/search (which only take *.parquet) never open a
+    part without its footer.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"part-{time.time_ns()}.parquet"
+    temp = os.path.join(directory, f".{name}.tmp")
+    path = os.path.join(directory, name)
+    try:
+        pq.write_table(table, temp, compression=compression, row_group_size=row_group_size)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    return path
+
+
+class ParquetSink:
+    """
+    Writes scraped records into a Parquet dataset partitioned by keyword and city.
+
+    Every write() (one city's records) becomes a complete part file in its
+    (keyword, city) partition right away, so the dataset is readable while a
+    batch is still running and a crash loses nothing already written.
+    City/Keyword live in the partition path, so readers get them back as
+    dictionary-encoded columns (see read_dataset).
+    """
+
+    def __init__(self, root=PARQUET_ROOT, row_group_size=10_000, compression='zstd'):
+        _require_pyarrow()
+        self.root = root
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.schema = pa.schema([(name, pa.string()) for name in RECORD_SCHEMA_FIELDS])
+
+    def write(self, records, city, keyword):
+        if isinstance(records, RecordBatch):
+            # Already column-oriented: take each column as a whole
+            columns = {name: [value or '' for value in records.column(name)] for name in RECORD_SCHEMA_FIELDS}
+        else:
+            columns = {name: [record.get(name) or '' for record in records] for name in RECORD_SCHEMA_FIELDS}
+        if columns['Name']:
+            _write_part(pa.table(columns, schema=self.schema), partition_dir(self.root, keyword, city),
+                        compression=self.compression, row_group_size=self.row_group_size)
+        return len(records)
+
+    def close(self):
+        """Nothing is buffered; kept so callers can treat the sink like the other outputs."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_dataset(root=PARQUET_ROOT, keyword=None, cities=None, columns=None):
+    """
+    Read a partitioned dataset into a DataFrame with City/Keyword as categoricals.
+    Filters on keyword/cities prune whole partitions without opening their files.
+    """
+    _require_pyarrow()
+    dataset = ds.dataset(root, format='parquet',
+                         partitioning=ds.partitioning(flavor='hive', dictionaries='infer'))
+    expression = None
+    if keyword is not None:
+        expression = ds.field('Keyword') == keyword
+    if cities:
+        city_filter = ds.field('City').isin(cities)
+        expression = city_filter if expression is None else expression & city_filter
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def read_part_file(path):
+    """Read one part file, adding its City/Keyword partition values as columns."""
+    _require_pyarrow()
+    df = pq.read_table(path).to_pandas()
+    for key, value in partition_values(path).items():
+        df[key] = value
+    return df
+
+
+def read_part_batch(path):
+    """Read one part file as a records.RecordBatch, City/Keyword kept as batch constants."""
+    _require_pyarrow()
+    table = pq.read_table(path)
+    partition = partition_values(path)
+    batch = RecordBatch(partition.get('City'), partition.get('Keyword'), columns=table.column_names)
+    for name in table.column_names:
+        batch.columns[name] = ['' if value is None else str(value) for value in table.column(name).to_pylist()]
+    return batch
+
+
+def write_frame(df, directory, dictionary_columns=('City', 'Keyword'), compression='zstd'):
+    """
+    Write a DataFrame as a new part file in a dataset directory
+    (appending = adding a part). Low-cardinality columns are dictionary-encoded.
+    """
+    _require_pyarrow()
+    df = df.copy()
+    for column in df.columns:
+        # Same schema in every part: strings (nulls kept), dictionary-encoded where asked
+        df[column] = df[column].astype('string')
+        if column in dictionary_columns:
+            df[column] = df[column].astype('category')
+    return _write_part(pa.Table.from_pandas(df, preserve_index=False), directory, compression=compression)
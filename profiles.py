@@ -0,0 +1,240 @@
+# profiles.py
+
+import os
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# JD_PROFILE_ROOT enables persistent Chrome profiles (one per concurrent browser) under that folder.
+# Empty = every browser starts with a throwaway profile, as before.
+PROFILE_ROOT = os.getenv('JD_PROFILE_ROOT', '')
+DISK_CACHE_MB = int(os.getenv('JD_DISK_CACHE_MB', '256'))
+CLEANUP_INTERVAL_HOURS = float(os.getenv('JD_PROFILE_CLEANUP_HOURS', '24'))
+PROFILE_MAX_AGE_DAYS = float(os.getenv('JD_PROFILE_MAX_AGE_DAYS', '30'))
+
+LOCK_FILE = '.jd_lock'
+LAST_USED_FILE = '.jd_last_used'
+LAST_CLEANUP_FILE = '.jd_last_cleanup'
+
+# Chrome state that can be thrown away without losing the HTTP cache
+DISPOSABLE_DIRS = ['Crashpad', 'GrShaderCache', 'ShaderCache', 'GPUCache', os.path.join('Default', 'GPUCache')]
+# Left behind when Chrome is killed; a new Chrome refuses the profile while they exist
+SINGLETON_FILES = ['SingletonLock', 'SingletonSocket', 'SingletonCookie']
+
+
+def _lock_fd(fd):
+    """Non-blocking exclusive lock on an open file; the OS drops it when the process dies."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def dir_size(path):
+    total = 0
+    for directory, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class Profile:
+    """A checked-out profile: user-data-dir plus its HTTP disk cache folder."""
+
+    def __init__(self, slot, path):
+        self.slot = slot
+        self.path = path
+        self.cache_dir = os.path.join(path, 'cache')
+
+    def chrome_arguments(self, cache_mb=None):
+        cache_mb = DISK_CACHE_MB if cache_mb is None else cache_mb
+        return [
+            f"--user-data-dir={os.path.abspath(self.path)}",
+            f"--disk-cache-dir={os.path.abspath(self.cache_dir)}",
+            f"--disk-cache-size={cache_mb * 1024 * 1024}",
+        ]
+
+
+class ProfilePool:
+    """
+    Persistent Chrome profiles, one per concurrently running browser.
+
+    Chrome locks its user-data-dir, so every live browser checks out its own
+    slot (root/worker-0, worker-1, ...); the next browser reuses a released
+    slot together with its warm disk cache, so JustDial's scripts, styles and
+    sprites come from disk instead of the network. Slots are also locked with
+    a lock file (flock) so two processes (API + batch scraper) never share one.
+
+    cleanup() runs at most every CLEANUP_INTERVAL_HOURS on acquire: it clears
+    stale Chrome locks and crash/GPU leftovers, empties caches that grew past
+    twice their size limit, and deletes profiles unused for PROFILE_MAX_AGE_DAYS.
+    """
+
+    def __init__(self, root, cache_mb=DISK_CACHE_MB):
+        self.root = root
+        self.cache_mb = cache_mb
+        self._lock = threading.Lock()
+        self._in_use = set()
+        self._lock_fds = {}
+        os.makedirs(root, exist_ok=True)
+
+    def _slot_path(self, slot):
+        return os.path.join(self.root, f"worker-{slot}")
+
+    def _try_lock(self, path):
+        """
+        Lock a slot for this process. The lock file stays on disk; holding the
+        OS lock on it is what counts, so a crashed process frees its slot and
+        there is no stale lock to take over.
+        """
+        os.makedirs(path, exist_ok=True)
+        fd = os.open(os.path.join(path, LOCK_FILE), os.O_CREAT | os.O_RDWR)
+        if not _lock_fd(fd):
+            os.close(fd)
+            return False
+        # The pid is only informational
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fds[path] = fd
+        return True
+
+    def _unlock(self, path):
+        fd = self._lock_fds.pop(path, None)
+        if fd is not None:
+            os.close(fd)
+
+    def acquire(self):
+        """Check out the lowest free profile slot."""
+        self.maybe_cleanup()
+        with self._lock:
+            slot = 0
+            while True:
+                if slot not in self._in_use and self._try_lock(self._slot_path(slot)):
+                    self._in_use.add(slot)
+                    break
+                slot += 1
+        profile = Profile(slot, self._slot_path(slot))
+        for name in SINGLETON_FILES:
+            # We hold the slot lock, so a Chrome lock here is stale
+            path = os.path.join(profile.path, name)
+            if os.path.lexists(path):
+                os.remove(path)
+        return profile
+
+    def release(self, profile):
+        with open(os.path.join(profile.path, LAST_USED_FILE), 'w') as f:
+            f.write(str(time.time()))
+        with self._lock:
+            self._unlock(profile.path)
+            self._in_use.discard(profile.slot)
+
+    def maybe_cleanup(self):
+        marker = os.path.join(self.root, LAST_CLEANUP_FILE)
+        try:
+            last = os.path.getmtime(marker)
+        except OSError:
+            last = 0
+        if time.time() - last < CLEANUP_INTERVAL_HOURS * 3600:
+            return
+        with open(marker, 'w') as f:
+            f.write(str(time.time()))
+        self.cleanup()
+
+    def cleanup(self):
+        """Tidy every profile that is not in use. Returns {"removed", "trimmed", "freed_mb"}."""
+        stats = {'removed': 0, 'trimmed': 0, 'freed_mb': 0.0}
+        now = time.time()
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if not name.startswith('worker-') or not os.path.isdir(path):
+                continue
+            with self._lock:
+                if not self._try_lock(path):
+                    continue
+            try:
+                before = dir_size(path)
+                try:
+                    with open(os.path.join(path, LAST_USED_FILE), 'r') as f:
+                        last_used = float(f.read().strip() or 0)
+                except (OSError, ValueError):
+                    last_used = os.path.getmtime(path)
+
+                if now - last_used > PROFILE_MAX_AGE_DAYS * 86400:
+                    shutil.rmtree(path, ignore_errors=True)
+                    stats['removed'] += 1
+                    stats['freed_mb'] += before / 1e6
+                    continue
+
+                for disposable in DISPOSABLE_DIRS:
+                    shutil.rmtree(os.path.join(path, disposable), ignore_errors=True)
+                cache_dir = os.path.join(path, 'cache')
+                if dir_size(cache_dir) > 2 * self.cache_mb * 1024 * 1024:
+                    # Chrome enforces --disk-cache-size itself; this only catches runaway leftovers
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                    stats['trimmed'] += 1
+                stats['freed_mb'] += (before - dir_size(path)) / 1e6
+            finally:
+                with self._lock:
+                    self._unlock(path)
+
+        stats['freed_mb'] = round(stats['freed_mb'], 1)
+        if stats['removed'] or stats['trimmed'] or stats['freed_mb']:
+            print(f"Profile cleanup in {self.root}: {stats['removed']} removed, "
+                  f"{stats['trimmed']} caches trimmed, {stats['freed_mb']} MB freed")
+        return stats
+
+    def usage(self):
+        """[{"slot", "size_mb", "cache_mb"}] per profile on disk."""
+        result = []
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if name.startswith('worker-') and os.path.isdir(path):
+                result.append({
+                    'slot': name,
+                    'size_mb': round(dir_size(path) / 1e6, 1),
+                    'cache_mb': round(dir_size(os.path.join(path, 'cache')) / 1e6, 1),
+                })
+        return result
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool():
+    """Shared ProfilePool under JD_PROFILE_ROOT, or None when persistent profiles are off."""
+    global _default_pool
+    if not PROFILE_ROOT:
+        return None
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = ProfilePool(PROFILE_ROOT)
+        return _default_pool
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show or clean up persistent Chrome profiles")
+    parser.add_argument('--root', default=PROFILE_ROOT or 'profiles')
+    parser.add_argument('--cleanup', action='store_true', help='clean up now instead of waiting for the interval')
+    args = parser.parse_args()
+
+    pool = ProfilePool(args.root)
+    if args.cleanup:
+        pool.cleanup()
+    for entry in pool.usage():
+        print(f"{entry['slot']}: {entry['size_mb']} MB ({entry['cache_mb']} MB HTTP cache)")
@@ -0,0 +1,309 @@
+# profiling.py
+
+import cProfile
+import importlib
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+# Per-job reports from ?profile=... (API) go here as <job_id>.json (+ <job_id>.pstats.txt with cpu)
+PROFILE_DIR = os.getenv('JD_JOB_PROFILE_DIR', os.path.join('Scrapped', 'job_profiles'))
+
+# Selenium's wire command names, shown as the Python calls that send them
+COMMAND_NAMES = {
+    'findElement': 'find_element',
+    'findElements': 'find_elements',
+    'findChildElement': 'find_element',
+    'findChildElements': 'find_elements',
+    'w3cExecuteScript': 'execute_script',
+    'w3cExecuteScriptAsync': 'execute_async_script',
+    'getElementText': 'text',
+    'getElementAttribute': 'get_attribute',
+    'getElementProperty': 'get_property',
+    'isElementDisplayed': 'is_displayed',
+    'clickElement': 'click',
+    'get': 'get',
+    'quit': 'quit',
+}
+
+
+def parse_mode(value):
+    """
+    Profiling options from a ?profile= value: None when off ("", "0", "false"),
+    else a set. Any other value traces WebDriver commands and sleeps; "cpu",
+    "memory" or "all" (comma separated) also run cProfile / tracemalloc.
+    """
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    if value in ('', '0', 'false', 'no', 'off'):
+        return None
+    modes = {'trace'}
+    for part in value.split(','):
+        part = part.strip()
+        if part == 'all':
+            modes.update({'cpu', 'memory'})
+        elif part in ('cpu', 'memory'):
+            modes.add(part)
+    return modes
+
+
+# Modules whose time.sleep calls belong to a scrape job: the scroll/settle waits,
+# detail page loads and WebDriverWait polling
+SLEEP_MODULES = ('main', 'enrichment', 'selenium.webdriver.support.wait')
+
+
+class _TimeProxy:
+    """The time module as seen by a patched module: sleep goes through the hook."""
+
+    def __init__(self, hook):
+        self.sleep = hook
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class _SleepHook:
+    """
+    While any profiler runs, the `time` global of each SLEEP_MODULES module is
+    swapped for a _TimeProxy, so only the job's own call sites are hooked
+    (time.sleep itself is never replaced). Sleeps from threads a profiler
+    has claimed are timed and reported to it; others pass through.
+    """
+
+    def __init__(self):
+        self.original = time.sleep
+        self.owners = {}
+        self.installed = 0
+        self.patched = []
+        self.lock = threading.Lock()
+
+    def __call__(self, seconds):
+        profiler = self.owners.get(threading.get_ident())
+        if profiler is None:
+            return self.original(seconds)
+        start = time.perf_counter()
+        try:
+            self.original(seconds)
+        finally:
+            caller = sys._getframe(1)
+            profiler.record_sleep(seconds, time.perf_counter() - start,
+                                  f"{os.path.basename(caller.f_code.co_filename)}:{caller.f_lineno}")
+
+    def install(self):
+        with self.lock:
+            if self.installed == 0:
+                proxy = _TimeProxy(self)
+                for name in SLEEP_MODULES:
+                    try:
+                        module = importlib.import_module(name)
+                    except ImportError:
+                        continue
+                    if getattr(module, 'time', None) is time:
+                        module.time = proxy
+                        self.patched.append(module)
+            self.installed += 1
+
+    def uninstall(self, profiler):
+        with self.lock:
+            for thread_id in [t for t, p in self.owners.items() if p is profiler]:
+                del self.owners[thread_id]
+            self.installed -= 1
+            if self.installed == 0:
+                for module in self.patched:
+                    module.time = time
+                self.patched = []
+
+
+_sleep_hook = _SleepHook()
+
+
+class _TracemallocLease:
+    """
+    tracemalloc is process wide, so one job at a time may use it: acquire()
+    returns False while another profiler holds it. Tracing this started is
+    stopped again by the last release().
+    """
+
+    def __init__(self):
+        self.owner = None
+        self.started = False
+        self.lock = threading.Lock()
+
+    def acquire(self, profiler):
+        with self.lock:
+            if self.owner is not None:
+                return False
+            self.owner = profiler
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started = True
+            tracemalloc.reset_peak()
+            return True
+
+    def release(self, profiler):
+        with self.lock:
+            if self.owner is not profiler:
+                return
+            self.owner = None
+            if self.started:
+                tracemalloc.stop()
+                self.started = False
+
+
+_tracemalloc_lease = _TracemallocLease()
+
+
+class JobProfiler:
+    """
+    Opt-in profiling for one scrape job.
+
+    Every browser created through wrap_factory() / trace_driver() has its
+    WebDriver commands counted and timed by type (every driver and element
+    call goes through driver.execute), and sleeps in the scraping modules
+    (SLEEP_MODULES) from the threads running those browsers are timed by call
+    site. With cpu=True the job thread runs under cProfile; with memory=True
+    tracemalloc records the allocation peak and top sites. tracemalloc is
+    process wide, so memory profiling is skipped while another job has it.
+
+    start() before the job, stop() after it: stop() writes
+    <directory>/<job_id>.json and returns a summary.
+    """
+
+    def __init__(self, job_id, cpu=False, memory=False, directory=None):
+        self.job_id = job_id
+        self.cpu = cpu
+        self.memory = memory
+        self.directory = directory or PROFILE_DIR
+        self.commands = {}
+        self.sleeps = {}
+        self.driver_starts = []
+        self._lock = threading.Lock()
+        self._cprofile = None
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        _sleep_hook.install()
+        self.attach()
+        if self.memory and not _tracemalloc_lease.acquire(self):
+            print(f"⚠ Memory profiling unavailable for {self.job_id}: another job is using tracemalloc")
+            self.memory = False
+        if self.cpu:
+            self._cprofile = cProfile.Profile()
+            try:
+                self._cprofile.enable()
+            except ValueError as e:
+                # Python 3.12+ allows one active profiler per process
+                print(f"⚠ CPU profiling unavailable for {self.job_id}: {e}")
+                self._cprofile = None
+        return self
+
+    def attach(self):
+        """Attribute the calling thread's sleeps to this job."""
+        _sleep_hook.owners[threading.get_ident()] = self
+
+    def record_sleep(self, requested, actual, caller):
+        with self._lock:
+            entry = self.sleeps.setdefault(caller, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += requested
+            entry[2] += actual
+
+    def _record_command(self, command, seconds):
+        name = COMMAND_NAMES.get(command, command)
+        with self._lock:
+            entry = self.commands.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def trace_driver(self, driver):
+        """Count and time every command the driver sends; returns the driver."""
+        execute = driver.execute
+
+        def traced_execute(command, params=None):
+            start = time.perf_counter()
+            try:
+                return execute(command, params)
+            finally:
+                self._record_command(command, time.perf_counter() - start)
+
+        driver.execute = traced_execute
+        return driver
+
+    def wrap_factory(self, factory):
+        """A driver factory (e.g. main.create_driver) whose browsers are traced."""
+        def create():
+            self.attach()
+            start = time.perf_counter()
+            driver = factory()
+            with self._lock:
+                self.driver_starts.append(time.perf_counter() - start)
+            return self.trace_driver(driver)
+        return create
+
+    def stop(self):
+        """Stop profiling, write the report and return its summary."""
+        wall = time.perf_counter() - self._start
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        _sleep_hook.uninstall(self)
+
+        with self._lock:
+            commands = {name: {'calls': calls, 'seconds': round(seconds, 3),
+                               'mean_ms': round(seconds / calls * 1000, 2)}
+                        for name, (calls, seconds) in sorted(self.commands.items(), key=lambda kv: -kv[1][1])}
+            sleeps = {caller: {'calls': calls, 'requested_seconds': round(requested, 3),
+                               'seconds': round(actual, 3)}
+                      for caller, (calls, requested, actual) in sorted(self.sleeps.items(), key=lambda kv: -kv[1][2])}
+        webdriver_seconds = sum(c['seconds'] for c in commands.values())
+        sleep_seconds = sum(s['seconds'] for s in sleeps.values())
+
+        report = {
+            'job_id': self.job_id,
+            'wall_seconds': round(wall, 3),
+            # Across all the job's browsers; with parallel shards these can add up to more than wall time
+            'webdriver_seconds': round(webdriver_seconds, 3),
+            'webdriver_calls': sum(c['calls'] for c in commands.values()),
+            'sleep_seconds': round(sleep_seconds, 3),
+            'sleep_calls': sum(s['calls'] for s in sleeps.values()),
+            'driver_start_seconds': round(sum(self.driver_starts), 3),
+            'browsers': len(self.driver_starts),
+            'commands': commands,
+            'sleeps': sleeps,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        # job ids can come from API clients; keep them inside the report folder
+        base = os.path.join(self.directory, re.sub(r'[^A-Za-z0-9_.-]', '_', self.job_id).lstrip('.') or 'job')
+        if self._cprofile is not None:
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats('cumulative').print_stats(40)
+            with open(f"{base}.pstats.txt", 'w', encoding='utf-8') as f:
+                f.write(out.getvalue())
+            report['cpu_profile'] = f"{base}.pstats.txt"
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics('lineno')[:10]
+            report['memory'] = {
+                'current_mb': round(current / 1e6, 2),
+                'peak_mb': round(peak / 1e6, 2),
+                'top_allocations': [{'site': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1),
+                                     'count': stat.count} for stat in top],
+            }
+            _tracemalloc_lease.release(self)
+
+        report['report_path'] = f"{base}.json"
+        with open(report['report_path'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Profile {self.job_id}: {report['wall_seconds']}s wall, {report['webdriver_calls']} WebDriver calls "
+              f"({report['webdriver_seconds']}s), {report['sleep_calls']} sleeps ({report['sleep_seconds']}s) "
+              f"-> {report['report_path']}")
+        return {key: report[key] for key in ('report_path', 'wall_seconds', 'webdriver_calls', 'webdriver_seconds',
+                                             'sleep_calls', 'sleep_seconds', 'driver_start_seconds', 'browsers')}
@@ -0,0 +1,206 @@
+# records.py
+
+import csv
+from collections.abc import Mapping
+
+FIELDS = ('Name', 'Address', 'Phone')
+
+
+class Record(Mapping):
+    """
+    One scraped listing. With __slots__ it takes less than half the memory
+    of the {'Name', 'Address', 'Phone'} dict it replaces. It is a read/write
+    Mapping (record['Phone'], .get(), .pop('Link'), dict(record), DictWriter),
+    so code written against the dicts (dedup keys, enrichment, CSV writers)
+    takes either. 'Link' (detail page URL, see enrichment.py) is only
+    present when set.
+    """
+
+    __slots__ = ('Name', 'Address', 'Phone', 'Link')
+
+    def __init__(self, Name='N/A', Address='N/A', Phone='', Link=None):
+        self.Name = Name
+        self.Address = Address
+        self.Phone = Phone
+        self.Link = Link
+
+    def _fields(self):
+        return FIELDS if self.Link is None else FIELDS + ('Link',)
+
+    def __iter__(self):
+        return iter(self._fields())
+
+    def __len__(self):
+        return len(self._fields())
+
+    def __getitem__(self, key):
+        if key not in self._fields():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(f"Record has no field {key!r}")
+        setattr(self, key, value)
+
+    def pop(self, key, default=None):
+        value = self.get(key, default)
+        if key == 'Link':
+            self.Link = None
+        elif key in FIELDS:
+            raise KeyError(f"{key} can't be removed from a Record")
+        return value
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self._fields()}
+
+    def __repr__(self):
+        return f"Record({self.to_dict()!r})"
+
+
+def jsonable(obj):
+    """json.dumps(..., default=jsonable) hook for Record objects."""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class RecordBatch:
+    """
+    Records of one city + keyword, column by column: one list per field
+    instead of one object per row, with City and Keyword stored once for the
+    whole batch. Writers take rows straight from the columns (rows(),
+    write_csv()), so adding City to 100k rows costs nothing per row.
+
+    Any column can be added (e.g. 'Duplicate' in the batch scraper, or the
+    columns of an arbitrary input CSV in merge.py); column() returns
+    City/Keyword from the batch constants and '' for columns it doesn't have.
+    """
+
+    def __init__(self, city=None, keyword=None, columns=None):
+        self.city = city
+        self.keyword = keyword
+        self.columns = {name: [] for name in (columns or FIELDS)}
+
+    @classmethod
+    def from_records(cls, records, city=None, keyword=None):
+        batch = cls(city, keyword)
+        batch.extend(records)
+        return batch
+
+    @classmethod
+    def from_frame(cls, df, city=None, keyword=None):
+        """Batch from a DataFrame, every column as strings ('' for missing values)."""
+        batch = cls(city, keyword, columns=[str(c) for c in df.columns])
+        for name in df.columns:
+            batch.columns[str(name)] = ['' if value is None or value != value else str(value)
+                                        for value in df[name].tolist()]
+        return batch
+
+    @classmethod
+    def read_csv(cls, f, city=None, keyword=None):
+        """Batch from an open CSV file: its header (first line) names the columns, values stay text."""
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return cls(city, keyword, columns=[])
+        return cls.from_rows(header, reader, city, keyword)
+
+    @classmethod
+    def from_rows(cls, header, rows, city=None, keyword=None):
+        batch = cls(city, keyword, columns=header)
+        columns = [batch.columns[name] for name in header]
+        width = len(columns)
+        for row in rows:
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            for column, value in zip(columns, row):
+                column.append(value)
+        return batch
+
+    @classmethod
+    def concat(cls, batches, columns=None):
+        """One batch from several; City/Keyword constants become columns where they differ."""
+        batches = list(batches)
+        if columns is None:
+            columns = []
+            for batch in batches:
+                columns.extend(name for name in batch.fieldnames() if name not in columns)
+        result = cls(columns=columns)
+        for batch in batches:
+            for name in columns:
+                result.columns[name].extend(batch.column(name))
+        return result
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def __iter__(self):
+        """Records (Name, Address, Phone) one at a time, created on the fly."""
+        names, addresses, phones = (self.column(name) for name in FIELDS)
+        for name, address, phone in zip(names, addresses, phones):
+            yield Record(name, address, phone)
+
+    def append(self, record, **extra):
+        """Add one record (Record or dict) plus values for extra columns, e.g. Duplicate='yes'."""
+        for name, column in self.columns.items():
+            value = extra[name] if name in extra else record.get(name)
+            column.append('' if value is None else value)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def add_column(self, name, default=''):
+        if name not in self.columns:
+            self.columns[name] = [default] * len(self)
+
+    def fieldnames(self):
+        names = list(self.columns)
+        if self.city is not None and 'City' not in names:
+            names.append('City')
+        if self.keyword is not None and 'Keyword' not in names:
+            names.append('Keyword')
+        return names
+
+    def column(self, name):
+        if name in self.columns:
+            return self.columns[name]
+        if name == 'City' and self.city is not None:
+            return [self.city] * len(self)
+        if name == 'Keyword' and self.keyword is not None:
+            return [self.keyword] * len(self)
+        return [''] * len(self)
+
+    def rows(self, fieldnames=None):
+        """Row tuples in fieldnames order (default: fieldnames())."""
+        return zip(*(self.column(name) for name in (fieldnames or self.fieldnames())))
+
+    def take(self, mask, columns=None):
+        """New batch with the rows where mask is true, optionally limited/reordered to `columns`."""
+        columns = columns or list(self.columns)
+        result = RecordBatch(self.city, self.keyword, columns=columns)
+        for name in columns:
+            result.columns[name] = [value for value, keep in zip(self.column(name), mask) if keep]
+        return result
+
+    def write_csv(self, f, fieldnames=None, header=True):
+        """Write the batch to an open file as CSV, straight from the columns."""
+        fieldnames = fieldnames or self.fieldnames()
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(fieldnames)
+        writer.writerows(self.rows(fieldnames))
+        return len(self)
+
+    def to_frame(self, fieldnames=None):
+        import pandas as pd
+        fieldnames = fieldnames or self.fieldnames()
+        return pd.DataFrame({name: self.column(name) for name in fieldnames}, columns=fieldnames)
+
+
+def field_rows(records, fields=FIELDS):
+    """Tuples of `fields` for a RecordBatch or any iterable of Record / dict records."""
+    if isinstance(records, RecordBatch):
+        return records.rows(fields)
+    return (tuple(record.get(field) for field in fields) for record in records)
@@ -0,0 +1,85 @@
+# scrape_common.py
+#
+# Search URLs, output file names, wait budgets and record saving shared by the
+# Selenium scraper (main.py) and the CDP engine (cdp_engine.py). Nothing here
+# imports Selenium, so the CDP engine loads without it.
+
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+import metrics
+from records import RecordBatch
+from writer import atomic_write
+
+# JD_BASE_URL points the scraper at another host, e.g. benchmarks/fake_justdial.py
+BASE_URL = os.getenv('JD_BASE_URL', "https://www.justdial.com/")
+
+# A card that still looks half rendered stops the mid-scroll extraction at most this
+# many passes; after that it is taken as it is (or skipped, without a name)
+RENDER_RETRIES = 3
+
+
+def _time_left(deadline, limit):
+    """Seconds to wait: limit, or less (down to 0) when deadline (time.monotonic()) is closer."""
+    if deadline is None:
+        return limit
+    return max(0, min(limit, deadline - time.monotonic()))
+
+
+def _emit(on_event, event, **data):
+    """Send a progress event to an optional listener."""
+    if on_event is not None:
+        on_event(event, data)
+
+
+def format_city(city):
+    return city.replace(" ", "-").replace("–", "-").replace("/", "-").lower()
+
+
+def format_keyword(keyword):
+    return keyword.replace(" ", "-").lower()
+
+
+def build_search_url(city, keyword, locality=None, base_url=BASE_URL):
+    """
+    JustDial search URL: {base}{city}/{keyword}/, or {base}{city}/{keyword}-in-{locality}/
+    for a single locality (the same form JustDial uses for its area pages).
+    """
+    if locality:
+        return f"{base_url}{format_city(city)}/{format_keyword(keyword)}-in-{format_city(locality)}/"
+    return f"{base_url}{format_city(city)}/{format_keyword(keyword)}/"
+
+
+def url_file_stem(url):
+    """File name for a search URL's output: its path segments joined by '_' (jaipur_builders-in-c-scheme)."""
+    segments = [s for s in urlsplit(url).path.lower().split('/') if s]
+    return re.sub(r'[^a-z0-9_.-]', '-', '_'.join(segments)).strip('.') or 'search'
+
+
+def save_city_records(all_data, city, keyword, csv_filename, store=None, parquet_sink=None, run_only=False):
+    """
+    Write one city's records to the configured outputs (CSV, SQLite store, Parquet).
+    With a store the CSV is exported from it (every run so far) unless run_only,
+    which writes just these records to csv_filename.
+    """
+    with metrics.phase("write"):
+        if not all_data:
+            print("No data extracted; CSV will be empty or not created.")
+            return
+
+        if parquet_sink is not None:
+            parquet_sink.write(all_data, city, keyword)
+
+        if store is not None:
+            store.upsert_records(all_data, city, keyword)
+            if not run_only:
+                store.export_csv(csv_filename, keyword=keyword, cities=[city], include_city=False)
+                print(f"Stored {len(all_data)} records in {store.path} and exported {csv_filename}")
+                return
+            print(f"Stored {len(all_data)} records in {store.path}")
+        # Temp file + rename: /download never sees a half-written CSV
+        with atomic_write(csv_filename) as f:
+            RecordBatch.from_records(all_data).write_csv(f)
+        print(f"Saved {len(all_data)} records to {csv_filename}")
@@ -0,0 +1,473 @@
+# search_index.py
+
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from manifest import FileManifest
+from normalize import normalize_name, normalize_phone, normalize_text
+import parquet_output
+
+# Raw scraper outputs carry city/keyword (columns, file names or partitions); the merged
+# files in Clean Data are derived from them and have lost the keyword, so by default
+# they are not indexed twice. JD_SEARCH_ROOTS=Scrapped,Clean Data adds them anyway.
+INDEX_ROOTS = [r.strip() for r in os.getenv('JD_SEARCH_ROOTS', 'Scrapped').split(',') if r.strip()]
+INDEX_PATH = os.getenv('JD_SEARCH_INDEX', os.path.join('Clean Data', 'search_index.db'))
+
+# Facets of a text search are counted over at most this many matches; filter-only
+# searches read the precomputed per-(city, keyword) counts instead
+FACET_SCAN_LIMIT = int(os.getenv('JD_SEARCH_FACET_SCAN', '10000'))
+
+# Name matches count twice as much as address matches in the ranking
+NAME_WEIGHT = 2.0
+ADDRESS_WEIGHT = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id      INTEGER PRIMARY KEY,
+    key     TEXT NOT NULL UNIQUE,
+    name    TEXT NOT NULL,
+    address TEXT NOT NULL DEFAULT '',
+    phone   TEXT NOT NULL DEFAULT '',
+    city    TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    keyword TEXT NOT NULL DEFAULT '' COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS idx_docs_city_keyword ON docs (city, keyword);
+CREATE INDEX IF NOT EXISTS idx_docs_keyword ON docs (keyword);
+CREATE TABLE IF NOT EXISTS sources (
+    id   INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS doc_sources (
+    source_id INTEGER NOT NULL,
+    doc_id    INTEGER NOT NULL,
+    PRIMARY KEY (source_id, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_doc_sources_doc ON doc_sources (doc_id);
+CREATE TABLE IF NOT EXISTS facet_counts (
+    city    TEXT NOT NULL COLLATE NOCASE,
+    keyword TEXT NOT NULL COLLATE NOCASE,
+    n       INTEGER NOT NULL,
+    PRIMARY KEY (city, keyword)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    name, address, city, keyword, content='docs', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+_token = re.compile(r'\w+', re.UNICODE)
+
+
+def source_facets(path, columns=()):
+    """
+    City/keyword implied by where a file lives, for files without those columns:
+    Scrapped/<keyword>.csv (batch files, which have a City column),
+    Scrapped/<city>_<keyword>.csv (single city files) and Keyword=/City=
+    partitions of Parquet datasets.
+    """
+    facets = parquet_output.partition_values(path)
+    if facets:
+        return {'City': facets.get('City', ''), 'Keyword': facets.get('Keyword', '')}
+    parts = os.path.normpath(path).split(os.sep)
+    stem = os.path.splitext(parts[-1])[0]
+    if len(parts) < 2 or parts[-2] != 'Scrapped':
+        return {'City': '', 'Keyword': ''}
+    if 'City' in columns:
+        return {'City': '', 'Keyword': stem.replace('_', ' ')}
+    # main.py names single city files <city>_<keyword> with spaces as hyphens
+    city, _, keyword = stem.partition('_')
+    return {'City': city.replace('-', ' ').title(), 'Keyword': keyword.replace('-', ' ')}
+
+
+def csv_columns(path):
+    with open(path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+        return next(csv.reader(f), [])
+
+
+def iter_file_rows(path, offset=0):
+    """Yield row dicts from a CSV (only the part after byte `offset`) or a Parquet part file."""
+    if path.endswith('.parquet'):
+        df = parquet_output.read_part_file(path).astype('string').fillna('')
+        yield from df.to_dict('records')
+        return
+    with open(path, 'r', newline='', encoding='utf-8', errors='replace') as f:
+        header = next(csv.reader(f), None)
+        if not header:
+            return
+        if offset:
+            f.seek(offset)
+        yield from csv.DictReader(f, fieldnames=header)
+
+
+def doc_key(name, phone, city, keyword):
+    """Same business from several files (raw scrape, merged output, Parquet) is indexed once."""
+    return '\x1f'.join([normalize_name(name), normalize_phone(phone) or normalize_text(phone),
+                        normalize_text(city), normalize_text(keyword)])
+
+
+def fts_query(text, city=None, keyword=None):
+    """
+    Turn free text into an FTS5 query: every word must match the name or address,
+    the last one as a prefix so results show up while typing ("plumb" finds "plumbers").
+    City/keyword filters become column filters on their words, so the FTS index
+    narrows them down too; search() then checks exact equality.
+    (Anchored '^' phrases would be exact but make bm25() noticeably slower.)
+    """
+    parts = []
+    tokens = _token.findall(text.lower())
+    if tokens:
+        terms = [f'"{t}"' for t in tokens]
+        terms[-1] += '*'
+        parts.append(f"{{name address}} : ({' '.join(terms)})")
+    for column, value in (('city', city), ('keyword', keyword)):
+        value_tokens = _token.findall((value or '').lower())
+        if value_tokens:
+            quoted = ' '.join(f'"{t}"' for t in value_tokens)
+            parts.append(f"{column} : ({quoted})")
+    return ' AND '.join(parts) or None
+
+
+class SearchIndex:
+    """
+    Full-text index (SQLite FTS5, BM25 ranking) over every scraped record.
+
+    Records from all CSVs and Parquet parts under INDEX_ROOTS are stored once
+    per business (see doc_key) with city/keyword facets, and remember which
+    files they came from. update() only reads files that are new or were
+    appended to since the last run; rows of modified or removed files are
+    dropped and re-read, so the index always matches what is on disk.
+    """
+
+    def __init__(self, path=INDEX_PATH, roots=None, batch_size=5000):
+        self.path = path
+        self.roots = roots or INDEX_ROOTS
+        self.batch_size = batch_size
+        self.manifest_path = os.path.splitext(path)[0] + '_manifest.json'
+        self._update_lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Indexes built before facet_counts existed get their counts once
+            if conn.execute("SELECT NOT EXISTS (SELECT 1 FROM facet_counts)").fetchone()[0]:
+                with conn:
+                    conn.execute("INSERT INTO facet_counts (city, keyword, n) "
+                                 "SELECT city, keyword, COUNT(*) FROM docs GROUP BY city, keyword")
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def list_files(self):
+        files = []
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            for directory, _, names in os.walk(root):
+                files.extend(os.path.join(directory, n) for n in names if n.endswith(('.csv', '.parquet')))
+        return sorted(files)
+
+    # -- ingest -------------------------------------------------------------
+
+    def update(self, verbose=True):
+        """Bring the index up to date with the files on disk. Returns the number of rows read."""
+        with self._update_lock:
+            manifest = FileManifest(self.manifest_path)
+            changes = manifest.classify(self.list_files())
+            stale = [p for p, _ in changes['modified']] + changes['removed']
+            work = ([(p, fp, 0) for p, fp in changes['new'] + changes['modified']] + changes['appended'])
+            if not work and not stale:
+                return 0
+
+            conn = self._connect()
+            rows_read = 0
+            try:
+                for path in stale:
+                    self._drop_source(conn, path)
+                    manifest.forget(path)
+                    if verbose:
+                        print(f"Dropped stale rows of {path}")
+                for path, fingerprint, offset in work:
+                    count = self._ingest_file(conn, path, offset)
+                    rows_read += count
+                    # Each file is committed with its manifest entry, so an interrupted
+                    # update resumes where it stopped (re-reading a file is harmless)
+                    manifest.record(path, fingerprint)
+                    manifest.save()
+                    if verbose:
+                        print(f"Indexed {count} rows from {path}")
+                manifest.save()
+            finally:
+                conn.close()
+            return rows_read
+
+    def _source_id(self, conn, path):
+        conn.execute("INSERT OR IGNORE INTO sources (path) VALUES (?)", (path,))
+        return conn.execute("SELECT id FROM sources WHERE path = ?", (path,)).fetchone()[0]
+
+    def _drop_source(self, conn, path):
+        """Remove a file's rows; businesses that no other file mentions leave the index."""
+        row = conn.execute("SELECT id FROM sources WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS orphan_candidates (doc_id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM orphan_candidates")
+            conn.execute("INSERT INTO orphan_candidates SELECT doc_id FROM doc_sources WHERE source_id = ?", row)
+            conn.execute("DELETE FROM doc_sources WHERE source_id = ?", row)
+            orphans = ("SELECT doc_id FROM orphan_candidates o WHERE NOT EXISTS "
+                       "(SELECT 1 FROM doc_sources s WHERE s.doc_id = o.doc_id)")
+            # External content FTS tables need the old values to delete a row
+            conn.execute(f"INSERT INTO docs_fts (docs_fts, rowid, name, address, city, keyword) "
+                         f"SELECT 'delete', id, name, address, city, keyword FROM docs WHERE id IN ({orphans})")
+            self._add_facet_counts(conn, f"WHERE id IN ({orphans})", sign=-1)
+            conn.execute(f"DELETE FROM docs WHERE id IN ({orphans})")
+            conn.execute("DELETE FROM sources WHERE id = ?", row)
+
+    def _ingest_file(self, conn, path, offset):
+        columns = () if path.endswith('.parquet') else csv_columns(path)
+        facets = source_facets(path, columns)
+        source_id = self._source_id(conn, path)
+        batch = []
+        count = 0
+        for record in iter_file_rows(path, offset):
+            name = (record.get('Name') or '').strip()
+            if not name or name == 'N/A':
+                continue
+            address = record.get('Address') or ''
+            phone = record.get('Phone') or ''
+            city = record.get('City') or facets['City']
+            keyword = record.get('Keyword') or facets['Keyword']
+            batch.append((doc_key(name, phone, city, keyword), name, address, phone, city, keyword))
+            count += 1
+            if len(batch) >= self.batch_size:
+                self._insert_batch(conn, source_id, batch)
+                batch = []
+        if batch:
+            self._insert_batch(conn, source_id, batch)
+        conn.commit()
+        return count
+
+    def _insert_batch(self, conn, source_id, batch):
+        with conn:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM docs").fetchone()[0]
+            conn.executemany(
+                "INSERT OR IGNORE INTO docs (key, name, address, phone, city, keyword) VALUES (?, ?, ?, ?, ?, ?)",
+                batch,
+            )
+            # Rows that were actually new got ids above the previous maximum
+            conn.execute("INSERT INTO docs_fts (rowid, name, address, city, keyword) "
+                         "SELECT id, name, address, city, keyword FROM docs WHERE id > ?", (last_id,))
+            self._add_facet_counts(conn, "WHERE id > ?", (last_id,))
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_keys (key TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM batch_keys")
+            conn.executemany("INSERT OR IGNORE INTO batch_keys (key) VALUES (?)", ((row[0],) for row in batch))
+            conn.execute("INSERT OR IGNORE INTO doc_sources (source_id, doc_id) "
+                         "SELECT ?, d.id FROM batch_keys b JOIN docs d ON d.key = b.key", (source_id,))
+
+    @staticmethod
+    def _add_facet_counts(conn, where, params=(), sign=1):
+        """Add (sign=1) or subtract (sign=-1) the docs matching `where` from facet_counts."""
+        conn.execute(f"INSERT INTO facet_counts (city, keyword, n) "
+                     f"SELECT city, keyword, {sign} * COUNT(*) FROM docs {where} GROUP BY city, keyword "
+                     f"ON CONFLICT (city, keyword) DO UPDATE SET n = n + excluded.n", params)
+        if sign < 0:
+            conn.execute("DELETE FROM facet_counts WHERE n <= 0")
+
+    def optimize(self):
+        """Merge FTS segments; worth running after a large initial import."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT INTO docs_fts (docs_fts) VALUES ('optimize')")
+        finally:
+            conn.close()
+
+    # -- search -------------------------------------------------------------
+
+    @staticmethod
+    def _filters(city, keyword, alias='d.'):
+        clauses, params = [], []
+        if city:
+            clauses.append(f"{alias}city = ?")
+            params.append(city)
+        if keyword:
+            clauses.append(f"{alias}keyword = ?")
+            params.append(keyword)
+        return clauses, params
+
+    def search(self, text='', city=None, keyword=None, offset=0, limit=20, facets=False, facet_limit=20):
+        """
+        Ranked hits for `text` (all words must match name or address), optionally
+        restricted to a city and/or keyword. Returns
+        {"query", "total", "offset", "limit", "hits", "facets", "facets_exact", "took_ms"}.
+        Without text, records matching the filters are listed in index order.
+        With facets, city/keyword counts come from facet_counts when there is no
+        text, else from the first FACET_SCAN_LIMIT matches (facets_exact is
+        False when there were more).
+        """
+        start = time.perf_counter()
+        clauses, params = self._filters(city, keyword)
+        match = fts_query(text or '', city, keyword)
+        ranked = bool(match and _token.search(text or ''))
+        if ranked:
+            # CROSS JOIN keeps the FTS index as the outer loop; otherwise SQLite may
+            # walk the city index and run the full-text match once per row
+            source = "docs_fts CROSS JOIN docs d ON d.id = docs_fts.rowid"
+            clauses.insert(0, "docs_fts MATCH ?")
+            params.insert(0, match)
+            # City/keyword columns only filter, they don't add to the score
+            score = f"bm25(docs_fts, {NAME_WEIGHT}, {ADDRESS_WEIGHT}, 0.0, 0.0)"
+        else:
+            source = "docs d"
+            score = "0.0"
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        fields = "d.name, d.address, d.phone, d.city, d.keyword"
+
+        conn = self._connect()
+        try:
+            if ranked and not (city or keyword):
+                # Rank inside the FTS table and only join the page of hits
+                rows = conn.execute(
+                    f"SELECT {fields}, m.score FROM "
+                    f"(SELECT rowid, {score} AS score FROM docs_fts WHERE docs_fts MATCH ? "
+                    f"ORDER BY score, rowid LIMIT ? OFFSET ?) m "
+                    f"CROSS JOIN docs d ON d.id = m.rowid ORDER BY m.score, d.id",
+                    [match, limit, offset],
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT {fields}, {score} AS score FROM {source} {where} ORDER BY score, d.id LIMIT ? OFFSET ?",
+                    params + [limit, offset],
+                ).fetchall()
+
+            facet_counts, facets_exact, total = {}, True, None
+            if facets:
+                if ranked:
+                    pairs = conn.execute(
+                        f"SELECT city, keyword, COUNT(*) FROM (SELECT d.city, d.keyword FROM {source} {where} "
+                        f"LIMIT ?) GROUP BY city, keyword", params + [FACET_SCAN_LIMIT]
+                    ).fetchall()
+                else:
+                    facet_clauses, facet_params = self._filters(city, keyword, alias='')
+                    facet_where = f"WHERE {' AND '.join(facet_clauses)}" if facet_clauses else ""
+                    pairs = conn.execute(
+                        f"SELECT city, keyword, n FROM facet_counts {facet_where}", facet_params
+                    ).fetchall()
+                city_counts, keyword_counts = {}, {}
+                for city_value, keyword_value, n in pairs:
+                    city_counts[city_value] = city_counts.get(city_value, 0) + n
+                    keyword_counts[keyword_value] = keyword_counts.get(keyword_value, 0) + n
+                facet_counts = {
+                    'city': sorted(city_counts.items(), key=lambda item: -item[1]),
+                    'keyword': sorted(keyword_counts.items(), key=lambda item: -item[1]),
+                }
+                facets_exact = not ranked or sum(city_counts.values()) < FACET_SCAN_LIMIT
+                if facets_exact:
+                    total = sum(city_counts.values())
+            if total is None and ranked and not (city or keyword):
+                total = conn.execute("SELECT COUNT(*) FROM docs_fts WHERE docs_fts MATCH ?", [match]).fetchone()[0]
+            elif total is None:
+                total = conn.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+        finally:
+            conn.close()
+
+        return {
+            "query": text,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "hits": [
+                # bm25() is lower-is-better; flip it so a higher score means more relevant
+                {"name": n, "address": a, "phone": p, "city": c, "keyword": k, "score": round(-s, 4) or 0.0}
+                for n, a, p, c, k, s in rows
+            ],
+            "facets": {
+                column: [{"value": value, "count": count} for value, count in counts[:facet_limit]]
+                for column, counts in facet_counts.items()
+            },
+            "facets_exact": facets_exact,
+            "took_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def count(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        finally:
+            conn.close()
+
+
+_default_index = None
+_default_lock = threading.Lock()
+_last_refresh = 0.0
+
+
+def get_default_index():
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = SearchIndex()
+        return _default_index
+
+
+def refresh_in_background(min_interval=None):
+    """
+    Start an update() of the shared index on a background thread, at most once
+    every JD_SEARCH_REFRESH_SECONDS (default 30), so searches never wait for ingestion.
+    """
+    global _last_refresh
+    if min_interval is None:
+        min_interval = float(os.getenv('JD_SEARCH_REFRESH_SECONDS', '30'))
+    index = get_default_index()
+    with _default_lock:
+        now = time.monotonic()
+        if _last_refresh and now - _last_refresh < min_interval:
+            return
+        _last_refresh = now
+    if index._update_lock.locked():
+        return
+
+    def run():
+        try:
+            index.update(verbose=False)
+        except Exception as e:
+            print(f"⚠ Search index update failed: {e}")
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build / query the full-text index over scraped data")
+    parser.add_argument('query', nargs='?', default='', help='search text; omit to only update the index')
+    parser.add_argument('--db', default=INDEX_PATH)
+    parser.add_argument('--roots', nargs='*', help=f"folders to index (default: {', '.join(INDEX_ROOTS)})")
+    parser.add_argument('--city')
+    parser.add_argument('--keyword')
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--no-update', action='store_true', help='search without ingesting new files first')
+    parser.add_argument('--optimize', action='store_true', help='merge index segments after updating')
+    args = parser.parse_args()
+
+    index = SearchIndex(args.db, roots=args.roots)
+    if not args.no_update:
+        start = time.perf_counter()
+        rows = index.update()
+        print(f"✓ Index up to date ({rows} new rows read, {index.count()} businesses) "
+              f"in {time.perf_counter() - start:.1f}s")
+    if args.optimize:
+        index.optimize()
+    if args.query or args.city or args.keyword:
+        result = index.search(args.query, city=args.city, keyword=args.keyword, limit=args.limit)
+        print(f"{result['total']} matches in {result['took_ms']} ms")
+        for hit in result['hits']:
+            print(f"  {hit['score']:8.3f}  {hit['name']} | {hit['address']} | {hit['phone']} | "
+                  f"{hit['city']} / {hit['keyword']}")
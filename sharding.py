@@ -0,0 +1,185 @@
+# sharding.py
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dedup_index import record_key
+from main import ThreadLocalDrivers, build_search_url, collect_listings
+
+# JD_SHARDING=auto splits cities listed in localities.json into one search per locality.
+LOCALITIES_FILE = os.getenv('JD_LOCALITIES_FILE', 'localities.json')
+SHARD_WORKERS = int(os.getenv('JD_SHARD_WORKERS', '3'))
+
+
+def sharding_mode():
+    """'auto' (shard every city that has localities) or 'off' (default)."""
+    return os.getenv('JD_SHARDING', 'off').lower()
+
+
+def load_localities(filename=None):
+    """{city (lowercase): [locality, ...]} from localities.json."""
+    filename = filename or LOCALITIES_FILE
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON in {filename}: {e}")
+        return {}
+    if isinstance(data, dict) and 'localities' in data:
+        data = data['localities']
+    return {city.lower(): list(localities) for city, localities in data.items()}
+
+
+def localities_for(city, filename=None):
+    return load_localities(filename).get(city.lower(), [])
+
+
+def should_shard(city, shard=None):
+    """shard=True/False forces the choice; None follows JD_SHARDING. Needs localities for the city."""
+    if shard is None:
+        shard = sharding_mode() == 'auto'
+    return bool(shard) and bool(localities_for(city))
+
+
+def shard_urls(city, keyword, localities, include_city=True):
+    """
+    [(locality, url)] for every shard. The plain city search (locality None) is
+    kept as the first shard: it has the top listings, the localities cover
+    what lies beyond its infinite-scroll cap.
+    """
+    shards = [(None, build_search_url(city, keyword))] if include_city else []
+    shards.extend((locality, build_search_url(city, keyword, locality)) for locality in localities)
+    return shards
+
+
+class _AnyEvent:
+    """Looks like a threading.Event to the scroll loop; set when any of its events is."""
+
+    def __init__(self, *events):
+        self.events = [e for e in events if e is not None]
+
+    def is_set(self):
+        return any(e.is_set() for e in self.events)
+
+
+class ShardMerger:
+    """
+    Thread-safe union of shard results, deduplicated on dedup_index.record_key
+    (raw name + address for records it cannot key).
+    """
+
+    def __init__(self, max_results=None):
+        self.records = []
+        self.max_results = max_results
+        self.full = threading.Event()
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def add(self, records):
+        """Keep the records not seen in any shard yet; returns them."""
+        fresh = []
+        with self._lock:
+            for record in records:
+                if self.max_results is not None and len(self.records) >= self.max_results:
+                    break
+                key = record_key(record)
+                if key is None:
+                    # Nothing normalizes to a key: fall back to the raw name + address,
+                    # or every shard that lists the business would add it again
+                    key = ('raw', (record.get('Name') or '').strip().lower(),
+                           ' '.join((record.get('Address') or '').lower().split()))
+                if key in self._seen:
+                    continue
+                self._seen.add(key)
+                self.records.append(record)
+                fresh.append(record)
+            if self.max_results is not None and len(self.records) >= self.max_results:
+                self.full.set()
+        return fresh
+
+
+def scrape_sharded(city, keyword, localities=None, workers=None, on_event=None, cancel_event=None,
+                   max_results=None, deadline=None, include_link=False, drivers=None, snapshot=None):
+    """
+    Scrape a city as one search per locality, `workers` browsers in parallel
+    (JD_SHARD_WORKERS, default 3). Each worker thread keeps its browser for
+    all the shards it runs (pass `drivers`, a main.ThreadLocalDrivers, to supply
+    and close them yourself). Results are merged and deduplicated as they arrive.
+    Returns (records, stop_reason, number of shards).
+
+    Events are forwarded with the shard's "locality" added; "records" events
+    only carry businesses no other shard produced yet, and every finished
+    shard sends "shard_done". With snapshot (see main.collect_listings) every
+    shard's page is saved, its locality added to the metadata.
+    """
+    localities = localities if localities is not None else localities_for(city)
+    shards = shard_urls(city, keyword, localities)
+    workers = max(1, min(workers or SHARD_WORKERS, len(shards)))
+    merger = ShardMerger(max_results)
+    stop = _AnyEvent(cancel_event, merger.full)
+    shard_reasons = []
+
+    own_drivers = drivers is None
+    drivers = drivers or ThreadLocalDrivers()
+
+    def run_shard(locality, url):
+        label = locality or city
+        if stop.is_set():
+            shard_reasons.append("cancelled" if cancel_event is not None and cancel_event.is_set() else "max_results")
+            return
+
+        def shard_events(event, data):
+            if on_event is None:
+                return
+            if event == "records":
+                fresh = merger.add(data["records"])
+                if fresh:
+                    on_event("records", {"locality": locality, "records": fresh})
+            else:
+                on_event(event, {"locality": locality, **data})
+
+        print(f"\n[shard] {city} / {label}: {url}")
+        try:
+            records, reason = collect_listings(drivers.get(), url, on_event=shard_events, cancel_event=stop,
+                                               max_results=max_results, deadline=deadline,
+                                               include_link=include_link,
+                                               snapshot={**snapshot, "locality": label} if snapshot else None)
+        except Exception as e:
+            # A crashed browser shouldn't take the other shards down; the next shard gets a fresh one
+            print(f"✗ Shard {label} failed: {e}")
+            drivers.discard()
+            shard_reasons.append("error")
+            return
+
+        fresh = merger.add(records)
+        if on_event is not None and fresh:
+            on_event("records", {"locality": locality, "records": fresh})
+        shard_reasons.append(reason)
+        print(f"✓ Shard {label}: {len(records)} records, {len(merger.records)} unique so far")
+        if on_event is not None:
+            on_event("shard_done", {"locality": locality, "records": len(records), "stop_reason": reason})
+
+    print(f"Sharding {city} / {keyword} into {len(shards)} searches with {workers} browsers")
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard") as pool:
+            futures = [pool.submit(run_shard, locality, url) for locality, url in shards]
+            for future in futures:
+                future.result()
+    finally:
+        if own_drivers:
+            drivers.close()
+
+    if cancel_event is not None and cancel_event.is_set():
+        stop_reason = "cancelled"
+    elif merger.full.is_set():
+        stop_reason = "max_results"
+    elif "deadline" in shard_reasons:
+        stop_reason = "deadline"
+    else:
+        stop_reason = None
+    print(f"Merged {len(merger.records)} unique records from {len(shards)} shards")
+    return merger.records, stop_reason, len(shards)
@@ -0,0 +1,212 @@
+# snapshot_extract.py
+#
+# Rebuild records from saved page snapshots (JD_SNAPSHOTS=on), without a browser.
+#
+#   python snapshot_extract.py                                  # every snapshot in Scrapped/snapshots
+#   python snapshot_extract.py Scrapped/snapshots/plumbers --out Scrapped/plumbers_reextracted.csv
+#   python snapshot_extract.py --workers 8 --link
+#
+# Uses lxml when it is installed and the standard library's HTML parser
+# otherwise. Extraction follows main.scrape_new_cards, so updating the card
+# selectors below (or adding a field) and re-running this is enough to pick up
+# a JustDial markup change across every snapshot ever saved.
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+from records import FIELDS, Record, RecordBatch
+from snapshots import list_snapshots, read_snapshot
+from writer import atomic_write
+
+try:
+    import lxml.html
+except ImportError:  # optional dependency, the pure Python parser is used without it
+    lxml = None
+
+# Same classes main.scrape_new_cards looks for
+CARD_CLASS = 'resultbox_info'
+FIELD_CLASSES = {'resultbox_title_anchor': 'Name', 'resultbox_address': 'Address', 'callcontent': 'Phone'}
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+def _text(value):
+    return ' '.join(value.split())
+
+
+def _record(fields, link, include_link, base_url=None):
+    """
+    A Record like scrape_new_cards makes, or None for cards without a name.
+    The link is resolved against the page URL, as the browser's href property is.
+    """
+    name = fields.get('Name') or 'N/A'
+    if name == 'N/A':
+        return None
+    if link and base_url:
+        link = urljoin(base_url, link)
+    return Record(name, fields.get('Address', 'N/A'), fields.get('Phone', ''),
+                  (link or '') if include_link else None)
+
+
+def _extract_lxml(html, include_link, base_url=None):
+    records = []
+    document = lxml.html.fromstring(html)
+    for card in document.find_class(CARD_CLASS):
+        fields, link = {}, ''
+        for class_name, field in FIELD_CLASSES.items():
+            found = card.find_class(class_name)
+            if found:
+                fields[field] = _text(found[0].text_content())
+                if field == 'Name':
+                    link = found[0].get('href') or ''
+        record = _record(fields, link, include_link, base_url)
+        if record is not None:
+            records.append(record)
+    return records
+
+
+class _CardParser(HTMLParser):
+    """Collects the card fields with the standard library parser (tracks nesting depth)."""
+
+    def __init__(self, include_link, base_url=None):
+        super().__init__(convert_charrefs=True)
+        self.include_link = include_link
+        self.base_url = base_url
+        self.records = []
+        self.depth = 0
+        self.card_depth = None
+        self.fields = {}
+        self.link = ''
+        self.capture = None  # (field, depth, text parts)
+
+    def handle_starttag(self, tag, attrs):
+        classes = set()
+        href = None
+        for key, value in attrs:
+            if key == 'class' and value:
+                classes.update(value.split())
+            elif key == 'href':
+                href = value
+        if tag not in VOID_TAGS:
+            self.depth += 1
+        if CARD_CLASS in classes and self.card_depth is None:
+            self.card_depth, self.fields, self.link = self.depth, {}, ''
+            return
+        if self.card_depth is None or self.capture is not None:
+            return
+        for class_name, field in FIELD_CLASSES.items():
+            if class_name in classes and field not in self.fields:
+                if field == 'Name':
+                    self.link = href or ''
+                self.capture = (field, self.depth, [])
+                if tag in VOID_TAGS:
+                    self._end_capture()
+                break
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_data(self, data):
+        if self.capture is not None:
+            self.capture[2].append(data)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if self.capture is not None and self.depth == self.capture[1]:
+            self._end_capture()
+        if self.card_depth is not None and self.depth == self.card_depth:
+            record = _record(self.fields, self.link, self.include_link, self.base_url)
+            if record is not None:
+                self.records.append(record)
+            self.card_depth = None
+        self.depth -= 1
+
+    def _end_capture(self):
+        field, _, parts = self.capture
+        self.fields[field] = _text(''.join(parts))
+        self.capture = None
+
+
+def extract_html(html, include_link=False, base_url=None):
+    """
+    Records from a results page's HTML, in page order. include_link adds 'Link'
+    as in the live scraper, made absolute against base_url (the page's URL).
+    """
+    if lxml is not None:
+        return _extract_lxml(html, include_link, base_url)
+    parser = _CardParser(include_link, base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.records
+
+
+def extract_snapshot(path, include_link=False):
+    """(metadata, RecordBatch) for one snapshot file; City/Keyword come from its metadata."""
+    meta, html = read_snapshot(path)
+    records = extract_html(html, include_link, base_url=meta.get('url'))
+    batch = RecordBatch(meta.get('city'), meta.get('keyword'),
+                        columns=FIELDS + (('Link',) if include_link else ()))
+    batch.extend(records)
+    return meta, batch
+
+
+def _extract_job(args):
+    path, include_link = args
+    start = time.perf_counter()
+    meta, batch = extract_snapshot(path, include_link)
+    return path, meta, batch, time.perf_counter() - start
+
+
+def extract_all(paths, out, workers=None, include_link=False):
+    """
+    Extract every snapshot into one CSV (Name, Address, Phone, [Link,] City,
+    Keyword, Locality, Snapshot), in parallel processes. Returns the number of records.
+    Snapshots yielding fewer records than were scraped live are reported, as
+    that usually means the card markup changed.
+    """
+    fieldnames = list(FIELDS) + (['Link'] if include_link else []) + ['City', 'Keyword', 'Locality', 'Snapshot']
+    total = 0
+    start = time.perf_counter()
+    jobs = [(path, include_link) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool, atomic_write(out) as f:
+        header = True
+        for path, meta, batch, seconds in pool.map(_extract_job, jobs, chunksize=4):
+            batch.columns['Locality'] = [meta.get('locality') or ''] * len(batch)
+            batch.columns['Snapshot'] = [path] * len(batch)
+            batch.write_csv(f, fieldnames, header=header)
+            header = False
+            total += len(batch)
+            live = meta.get('records')
+            if live is not None and len(batch) < live:
+                print(f"⚠ {path}: {len(batch)} records, {live} when scraped (markup changed?)")
+    elapsed = time.perf_counter() - start
+    rate = len(paths) / elapsed if elapsed else 0.0
+    print(f"✓ Extracted {total} records from {len(paths)} snapshots in {elapsed:.1f}s "
+          f"({rate:.1f} pages/s, {'lxml' if lxml is not None else 'html.parser'}) -> {out}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-extract records from saved page snapshots')
+    parser.add_argument('paths', nargs='*', help='snapshot files or folders (default: JD_SNAPSHOT_DIR)')
+    parser.add_argument('--out', default=os.path.join('Scrapped', 'reextracted.csv'))
+    parser.add_argument('--workers', type=int, default=None, help='parallel processes (default: CPU count)')
+    parser.add_argument('--link', action='store_true', help="add each listing's detail page URL")
+    args = parser.parse_args()
+
+    paths = list_snapshots(args.paths)
+    if not paths:
+        print("No snapshots found. Scrape with JD_SNAPSHOTS=on to save them.")
+        return
+    extract_all(paths, args.out, workers=args.workers, include_link=args.link)
+
+
+if __name__ == '__main__':
+    main()
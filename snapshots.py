@@ -0,0 +1,75 @@
+# snapshots.py
+
+import gzip
+import json
+import os
+import re
+import time
+
+from writer import atomic_write
+
+# JD_SNAPSHOTS=on saves the fully scrolled results page of every search as gzipped HTML,
+# so records can be re-extracted later without a browser (see snapshot_extract.py).
+SNAPSHOT_DIR = os.getenv('JD_SNAPSHOT_DIR', os.path.join('Scrapped', 'snapshots'))
+SNAPSHOT_SUFFIX = '.html.gz'
+
+# First line of every snapshot: an HTML comment holding its metadata as JSON
+HEADER_PREFIX = '<!-- jd-snapshot '
+HEADER_SUFFIX = ' -->\n'
+
+
+def snapshots_enabled(snapshot=None):
+    """snapshot=True/False forces the choice; None follows JD_SNAPSHOTS (off by default)."""
+    if snapshot is None:
+        return os.getenv('JD_SNAPSHOTS', 'off').lower() in ('on', '1', 'true')
+    return bool(snapshot)
+
+
+def _slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-') or 'unknown'
+
+
+def snapshot_path(meta, directory=None):
+    """<directory>/<keyword>/<city>[-<locality>]-<UTC time, ms>.html.gz"""
+    name = _slug(meta.get('city'))
+    if meta.get('locality'):
+        name += f"-{_slug(meta['locality'])}"
+    captured = meta['captured_at']
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime(captured))}{int(captured % 1 * 1000):03d}"
+    return os.path.join(directory or SNAPSHOT_DIR, _slug(meta.get('keyword')), f"{name}-{stamp}{SNAPSHOT_SUFFIX}")
+
+
+def save_snapshot(html, url, directory=None, **meta):
+    """
+    Save a page's HTML gzipped, with url, capture time and `meta` (city,
+    keyword, locality, records, stop_reason) in its header. Returns the path.
+    """
+    meta = {'url': url, 'captured_at': time.time(), **meta}
+    path = snapshot_path(meta, directory)
+    with atomic_write(path, 'wb') as f:
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6, mtime=int(meta['captured_at'])) as gz:
+            gz.write(f"{HEADER_PREFIX}{json.dumps(meta)}{HEADER_SUFFIX}".encode('utf-8'))
+            gz.write(html.encode('utf-8'))
+    return path
+
+
+def read_snapshot(path):
+    """(metadata dict, HTML) of a snapshot file; metadata is {} for plain gzipped HTML."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        html = f.read()
+    if html.startswith(HEADER_PREFIX):
+        header, _, html = html.partition(HEADER_SUFFIX)
+        return json.loads(header[len(HEADER_PREFIX):]), html
+    return {}, html
+
+
+def list_snapshots(paths=None):
+    """Snapshot files among `paths` (files or folders, searched recursively), sorted."""
+    found = []
+    for path in paths or [SNAPSHOT_DIR]:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                found.extend(os.path.join(root, n) for n in names if n.endswith(SNAPSHOT_SUFFIX))
+        elif os.path.exists(path):
+            found.append(path)
+    return sorted(found)
@@ -0,0 +1,146 @@
+# storage.py
+
+import argparse
+import csv
+import os
+import sqlite3
+import time
+
+from records import field_rows
+from writer import atomic_write
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id         INTEGER PRIMARY KEY,
+    city       TEXT NOT NULL,
+    keyword    TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    address    TEXT NOT NULL DEFAULT '',
+    phone      TEXT NOT NULL DEFAULT '',
+    first_seen REAL NOT NULL,
+    last_seen  REAL NOT NULL,
+    UNIQUE (city, keyword, name, phone)
+);
+CREATE INDEX IF NOT EXISTS idx_records_keyword_city ON records (keyword, city);
+CREATE INDEX IF NOT EXISTS idx_records_name ON records (name);
+CREATE INDEX IF NOT EXISTS idx_records_phone ON records (phone);
+"""
+
+UPSERT_SQL = """
+INSERT INTO records (city, keyword, name, address, phone, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (city, keyword, name, phone) DO UPDATE SET
+    address = excluded.address,
+    last_seen = excluded.last_seen
+"""
+
+
+def get_default_store():
+    """SQLiteStore when JD_STORAGE=sqlite, otherwise None (plain CSV output)."""
+    if os.getenv('JD_STORAGE', 'csv').lower() != 'sqlite':
+        return None
+    return SQLiteStore(os.getenv('JD_SQLITE_PATH', os.path.join('Scrapped', 'justdial.db')))
+
+
+class SQLiteStore:
+    """
+    Single SQLite database for all scraped records.
+
+    Rows are unique on (city, keyword, name, phone); writing the same business
+    again updates its address and last_seen instead of adding a duplicate.
+    A connection is opened per call so one store can be shared across threads.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def upsert_records(self, records, city, keyword):
+        """Insert or update records for one city/keyword in batched transactions. Returns the row count."""
+        now = time.time()
+        rows = [
+            (city, keyword, name or '', address or '', phone or '', now, now)
+            for name, address, phone in field_rows(records)
+        ]
+        conn = self._connect()
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                with conn:  # one transaction per batch
+                    conn.executemany(UPSERT_SQL, rows[start:start + self.batch_size])
+        finally:
+            conn.close()
+        return len(rows)
+
+    @staticmethod
+    def _where(keyword, cities):
+        clauses, params = [], []
+        if keyword is not None:
+            clauses.append("keyword = ?")
+            params.append(keyword)
+        if cities:
+            clauses.append(f"city IN ({','.join('?' * len(cities))})")
+            params.extend(cities)
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def iter_records(self, keyword=None, cities=None):
+        """Yield record dicts (Name, Address, Phone, City, Keyword), optionally filtered."""
+        where, params = self._where(keyword, cities)
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"SELECT name, address, phone, city, keyword FROM records {where} ORDER BY id", params
+            )
+            for name, address, phone, city, kw in cursor:
+                yield {'Name': name, 'Address': address, 'Phone': phone, 'City': city, 'Keyword': kw}
+        finally:
+            conn.close()
+
+    def count(self, keyword=None, cities=None):
+        where, params = self._where(keyword, cities)
+        conn = self._connect()
+        try:
+            return conn.execute(f"SELECT COUNT(*) FROM records {where}", params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def export_csv(self, csv_path, keyword=None, cities=None, include_city=True):
+        """
+        Write records to a CSV in today's layouts:
+        Name,Address,Phone,City (batch files) or Name,Address,Phone (single city files).
+        """
+        fieldnames = ['Name', 'Address', 'Phone'] + (['City'] if include_city else [])
+        os.makedirs(os.path.dirname(csv_path) or '.', exist_ok=True)
+        written = 0
+        with atomic_write(csv_path) as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for record in self.iter_records(keyword, cities):
+                writer.writerow(record)
+                written += 1
+        return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export records from the SQLite store to CSV")
+    parser.add_argument('--db', default=os.getenv('JD_SQLITE_PATH', os.path.join('Scrapped', 'justdial.db')))
+    parser.add_argument('--keyword', help='keyword exactly as scraped, e.g. "plumbers"')
+    parser.add_argument('--cities', nargs='*', help='limit to these cities')
+    parser.add_argument('--no-city', action='store_true', help='omit the City column (single city layout)')
+    parser.add_argument('--out', required=True, help='output CSV path')
+    args = parser.parse_args()
+
+    store = SQLiteStore(args.db)
+    total = store.export_csv(args.out, args.keyword, args.cities, include_city=not args.no_city)
+    print(f"Exported {total} records to {args.out}")
@@ -3,12 +3,13 @@
 import time
 import random
 import os
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 def check_and_click_close_popup(driver):
     """Check for the close popup button and click it if found."""
+    # Selenium is imported here so the in-page scripts below load without it (cdp_engine.py)
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
     try:
         close_popup_button = WebDriverWait(driver, 2).until(
             EC.presence_of_element_located((By.CLASS_NAME, 'jd_modal_close'))
@@ -30,81 +31,132 @@ def countdown_timer(seconds):
     with open('stop.txt', 'w') as f:
         f.write('')
 
+# The scroll patterns run inside the page: each script below is one
+# execute_async_script call that scrolls, pauses, closes popups and watches
+# document.body.scrollHeight on its own, then reports back once. The Python side
+# makes one WebDriver round trip per phase instead of several per step.
+# Scripts must finish within SCRIPT_TIMEOUT (set on every browser by main.launch_driver).
+SCRIPT_TIMEOUT = 60
+PHASE_BUDGET_MS = 20000  # a scroll burst reports back after this long and is resumed from Python
+
+_CLOSE_POPUPS_JS = """
+function closePopups() {
+  var closed = 0;
+  document.querySelectorAll('.jd_modal_close').forEach(function (el) {
+    if (el.getClientRects().length) { el.click(); closed++; }
+  });
+  return closed;
+}
+"""
+
+# args: viewports to scroll, pause ms, settle ms, last height -> {height, position, bottom, popups}
+SCROLL_STEP_JS = _CLOSE_POPUPS_JS + """
+var viewports = arguments[0], pauseMs = arguments[1], settleMs = arguments[2], lastHeight = arguments[3];
+var done = arguments[arguments.length - 1];
+window.scrollBy(0, window.innerHeight * viewports);
+setTimeout(function () {
+  var popups = closePopups(), start = Date.now();
+  (function settle() {
+    var height = document.body.scrollHeight;
+    if (height !== lastHeight || Date.now() - start >= settleMs) {
+      done({height: height, position: window.pageYOffset,
+            bottom: window.pageYOffset + window.innerHeight, popups: popups});
+    } else {
+      setTimeout(settle, 100);
+    }
+  })();
+}, pauseMs);
+"""
+
+# args: direction (1 down, -1 up), steps, min pause ms, max pause ms, last height, budget ms
+#   -> {height, position, new_content, content_position, steps_left, popups, end_reached}
+# Like the Python loop it replaces, new content restarts the step count.
+SCROLL_BURST_JS = _CLOSE_POPUPS_JS + """
+var direction = arguments[0], steps = arguments[1], minPause = arguments[2], maxPause = arguments[3];
+var lastHeight = arguments[4], budgetMs = arguments[5];
+var done = arguments[arguments.length - 1];
+var started = Date.now(), count = 0, newContent = false, contentPosition = null, popups = 0;
+function report() {
+  done({height: lastHeight, position: window.pageYOffset, new_content: newContent,
+        content_position: contentPosition, steps_left: steps - count, popups: popups,
+        end_reached: window.pageYOffset + window.innerHeight >= document.body.scrollHeight - 10});
+}
+(function step() {
+  if (count >= steps || Date.now() - started >= budgetMs) { report(); return; }
+  window.scrollBy(0, direction * window.innerHeight / 2);
+  count++;
+  popups += closePopups();
+  setTimeout(function () {
+    var height = document.body.scrollHeight;
+    if (height !== lastHeight) {
+      lastHeight = height;
+      newContent = true;
+      contentPosition = window.pageYOffset;
+      count = 0;
+    }
+    step();
+  }, minPause + Math.random() * (maxPause - minPause));
+})();
+"""
+
+# args: target position, duration ms -> final position
+SMOOTH_SCROLL_JS = """
+var target = arguments[0], duration = arguments[1];
+var done = arguments[arguments.length - 1];
+var from = window.pageYOffset, start = Date.now();
+(function frame() {
+  var t = duration > 0 ? Math.min(1, (Date.now() - start) / duration) : 1;
+  window.scrollTo(0, from + (target - from) * t);
+  if (t < 1) { setTimeout(frame, 16); } else { done(window.pageYOffset); }
+})();
+"""
+
+def scroll_step(driver, viewports=1, pause=2, settle=2, last_height=None):
+    """
+    Scroll by `viewports` window heights, wait `pause` seconds, close popups and
+    wait up to `settle` more seconds for the page height to change from
+    last_height, all in one WebDriver call. Returns {height, position, bottom, popups}.
+    """
+    return driver.execute_async_script(SCROLL_STEP_JS, viewports, int(pause * 1000), int(settle * 1000),
+                                       last_height)
+
 def smooth_scroll_to(driver, target_position, duration=2):
-    """Smoothly scroll the page to a target position."""
-    start_position = driver.execute_script("return window.pageYOffset")
-    distance = target_position - start_position
-    start_time = time.time()
-    
-    while time.time() - start_time < duration:
-        elapsed_time = time.time() - start_time
-        scroll_position = start_position + (distance * (elapsed_time / duration))
-        driver.execute_script(f"window.scrollTo(0, {scroll_position});")
-        time.sleep(0.1)  # Adjust sleep time for smoother scrolling
-
-    # Ensure we end exactly at the target position
-    driver.execute_script(f"window.scrollTo(0, {target_position});")
+    """Smoothly scroll the page to a target position (animated in the page, one WebDriver call)."""
+    return driver.execute_async_script(SMOOTH_SCROLL_JS, target_position, int(duration * 1000))
 
 def human_like_scroll(driver, min_scroll_down=9, max_scroll_down=10, min_scroll_up=9, max_scroll_up=10, scroll_pause_range=(1, 2), stop_file='stop.txt'):
+    """
+    Scroll down and up in randomized bursts, closing popups, until stop_file
+    appears. Each burst runs in the page (SCROLL_BURST_JS) and reports whether
+    new content loaded. After content_check_interval seconds without any, scroll
+    smoothly to the top and back like a reader would.
+    """
     last_height = driver.execute_script("return document.body.scrollHeight")
     last_position = driver.execute_script("return window.pageYOffset")  # Store the last scroll position
     last_content_check_time = time.time()  # Set to current time
     content_check_interval = 5  # Time in seconds to check if new content is loaded
+    pause_ms = [int(seconds * 1000) for seconds in scroll_pause_range]
 
     while True:  # Infinite loop for continuous scrolling
-        # Scrolling Down Phase
-        total_scroll_down = random.randint(min_scroll_down, max_scroll_down)
-        scroll_down_count = 0
-        while scroll_down_count < total_scroll_down:
-            # Check if stop file exists
-            if os.path.exists(stop_file):
-                print("Stop file detected. Stopping scroll.")
-                return  # Exit the function and stop scrolling
-
-            driver.execute_script("window.scrollBy(0, window.innerHeight / 2);")
-            scroll_down_count += 1
-            print(f"Scrolling down, attempt {scroll_down_count}/{total_scroll_down}")
-
-            # Check and handle the popup button
-            check_and_click_close_popup(driver)
-
-            time.sleep(random.uniform(*scroll_pause_range))
-
-            # Check if new content is loaded
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height != last_height:
-                print("New content detected.")
-                last_height = new_height  # Update last_height if new content is loaded
-                scroll_down_count = 0  # Reset scroll down counter when new content is detected
-                last_content_check_time = time.time()  # Update the content check time
-                last_position = driver.execute_script("return window.pageYOffset")  # Update last known position
-
-        # Scrolling Up Phase (only if new content was detected)
-        total_scroll_up = random.randint(min_scroll_up, max_scroll_up)
-        scroll_up_count = 0
-        while scroll_up_count < total_scroll_up:
-            # Check if stop file exists
-            if os.path.exists(stop_file):
-                print("Stop file detected. Stopping scroll.")
-                return  # Exit the function and stop scrolling
-
-            driver.execute_script("window.scrollBy(0, -window.innerHeight / 2);")
-            scroll_up_count += 1
-            print(f"Scrolling up, attempt {scroll_up_count}/{total_scroll_up}")
-
-            # Check and handle the popup button
-            check_and_click_close_popup(driver)
-
-            time.sleep(random.uniform(*scroll_pause_range))
-
-            # Check if new content is loaded
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height != last_height:
-                print("New content detected.")
-                last_height = new_height  # Update last_height if new content is loaded
-                scroll_up_count = 0  # Reset scroll up counter when new content is detected
-                last_content_check_time = time.time()  # Update the content check time
-                last_position = driver.execute_script("return window.pageYOffset")  # Update last known position
+        for direction, label, low, high in ((1, 'down', min_scroll_down, max_scroll_down),
+                                            (-1, 'up', min_scroll_up, max_scroll_up)):
+            steps = random.randint(low, high)
+            while steps > 0:
+                # Check if stop file exists (between bursts; a burst reports back within PHASE_BUDGET_MS)
+                if os.path.exists(stop_file):
+                    print("Stop file detected. Stopping scroll.")
+                    return  # Exit the function and stop scrolling
+
+                result = driver.execute_async_script(SCROLL_BURST_JS, direction, steps, pause_ms[0], pause_ms[1],
+                                                     last_height, PHASE_BUDGET_MS)
+                print(f"Scrolled {label} {steps - result['steps_left']}/{steps} steps"
+                      + (f", closed {result['popups']} popup(s)" if result['popups'] else ""))
+                steps = result['steps_left']
+                if result['new_content']:
+                    print("New content detected.")
+                    last_height = result['height']  # Update last_height if new content is loaded
+                    last_content_check_time = time.time()  # Update the content check time
+                    last_position = result['content_position']  # Update last known position
 
         # If no new content is detected for a long time, scroll to the top like a human, wait a bit, and scroll back to the older location
         if time.time() - last_content_check_time > content_check_interval:
@@ -116,5 +168,3 @@ def human_like_scroll(driver, min_scroll_down=9, max_scroll_down=10, min_scroll_
             smooth_scroll_to(driver, last_position, duration=3)  # Smoothly scroll back to the last position in 3 seconds
 
             last_content_check_time = time.time()  # Reset the content check timer
-
-
@@ -0,0 +1,272 @@
+# writer.py
+
+import csv
+import os
+import queue
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+# Background CSV writer used by batch_scraper.py
+WRITER_QUEUE = int(os.getenv('JD_WRITER_QUEUE', '64'))  # batches waiting to be written before append() blocks
+FLUSH_ROWS = int(os.getenv('JD_WRITER_FLUSH_ROWS', '5000'))  # buffered rows that trigger a write
+FLUSH_SECONDS = float(os.getenv('JD_WRITER_FLUSH_SECONDS', '2'))  # max age of buffered rows
+PUBLISH_SECONDS = float(os.getenv('JD_WRITER_PUBLISH_SECONDS', '60'))  # snapshot interval, 0 = only at publish()
+
+PART_SUFFIX = '.part'
+
+
+def _temp_path(path):
+    return f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+
+
+def _replace(temp, path):
+    """fsync temp and rename it over path (atomic on the same filesystem)."""
+    with open(temp, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+@contextmanager
+def atomic_write(path, mode='w', **open_kwargs):
+    """
+    Open a temp file next to `path` and rename it over `path` once the block
+    succeeds, so readers see either the old file or the complete new one.
+    On an error the temp file is removed and `path` is left untouched.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temp = _temp_path(path)
+    if 'b' not in mode:
+        open_kwargs.setdefault('newline', '')
+        open_kwargs.setdefault('encoding', 'utf-8')
+    try:
+        with open(temp, mode, **open_kwargs) as f:
+            yield f
+        _replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+class _OpenFile:
+    """
+    Working copy (<path>.part) of one output file, plus the batches not written
+    to it yet. Rows are always written in the columns of the file's own header:
+    the given fieldnames for a new file, the existing header when continuing one.
+    """
+
+    def __init__(self, path, fieldnames, truncate):
+        self.path = path
+        self.part = path + PART_SUFFIX
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fresh = truncate or not os.path.exists(path)
+        self.fieldnames = fieldnames
+        if not fresh:
+            # Appending to a published file: continue from a copy, the original stays readable
+            shutil.copyfile(path, self.part)
+            with open(self.part, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+            if header:
+                self.fieldnames = header
+            else:
+                fresh = True
+        self.handle = open(self.part, 'w' if fresh else 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.handle)
+        if fresh:
+            self.writer.writerow(fieldnames)
+        self.pending = []
+        self.published = time.monotonic()
+        self.changed = fresh
+
+    def write_pending(self):
+        if self.pending:
+            for batch in self.pending:
+                self.writer.writerows(batch.rows(self.fieldnames))
+            self.pending = []
+            self.changed = True
+        self.handle.flush()
+
+    def snapshot(self):
+        """Publish what has been written so far while keeping the working copy open."""
+        self.write_pending()
+        self.published = time.monotonic()
+        if not self.changed:
+            return
+        self.changed = False
+        temp = _temp_path(self.path)
+        shutil.copyfile(self.part, temp)
+        _replace(temp, self.path)
+
+    def publish(self):
+        self.write_pending()
+        os.fsync(self.handle.fileno())
+        self.handle.close()
+        os.replace(self.part, self.path)
+
+
+class BackgroundWriter:
+    """
+    Writes CSV output on its own thread, so scraping never waits on the disk.
+
+    append() puts a batch (records.RecordBatch) on a bounded queue; append()
+    only blocks when WRITER_QUEUE batches are already waiting. The thread
+    buffers rows per file and writes them to <path>.part once FLUSH_ROWS
+    rows are buffered or the oldest is FLUSH_SECONDS old. The real path is
+    only ever replaced by rename: publish(path) (e.g. when a keyword is done)
+    moves the finished working copy into place, and every PUBLISH_SECONDS a
+    snapshot of it is published, so readers such as /download always see a
+    complete file.
+
+    A write error stops the thread; it is raised from the next append(),
+    publish() or close().
+    """
+
+    def __init__(self, max_queue=None, flush_rows=None, flush_seconds=None, publish_seconds=None):
+        self.queue = queue.Queue(maxsize=max_queue or WRITER_QUEUE)
+        self.flush_rows = flush_rows or FLUSH_ROWS
+        self.flush_seconds = FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.publish_seconds = PUBLISH_SECONDS if publish_seconds is None else publish_seconds
+        self.files = {}
+        self.error = None
+        self._buffered = 0
+        self._oldest = None
+        self._thread = threading.Thread(target=self._run, name='csv-writer', daemon=True)
+        self._thread.start()
+
+    def append(self, path, batch, fieldnames, truncate=False):
+        """
+        Queue the batch's rows for `path`. truncate=True starts the file over
+        (fieldnames header + these rows); otherwise rows go after the file's
+        current content in the columns of its header (fieldnames if the file
+        doesn't exist yet).
+        """
+        # Rows are rendered on the writer thread; the batch must not change after this
+        self._put(('append', path, batch, fieldnames, truncate))
+        return len(batch)
+
+    def publish(self, path, wait=True):
+        """Write everything queued for `path` and rename it into place."""
+        self._call('publish', path, wait)
+
+    def flush(self, wait=True):
+        """Write everything queued so far to the working copies."""
+        self._call('flush', None, wait)
+
+    def close(self):
+        """Publish every open file and stop the thread."""
+        if self._thread.is_alive():
+            self._call('close', None, True)
+            self._thread.join()
+        self._check()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _put(self, item):
+        while True:
+            self._check()
+            try:
+                self.queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if not self._thread.is_alive():
+                    self._check()
+                    raise RuntimeError("CSV writer is not running")
+
+    def _call(self, op, path, wait):
+        done = threading.Event()
+        self._put((op, path, done))
+        if wait:
+            while not done.wait(0.5):
+                if not self._thread.is_alive():
+                    break
+            self._check()
+
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError(f"CSV writer failed: {self.error}") from self.error
+
+    def _run(self):
+        running = True
+        while running:
+            timeout = None
+            if self._oldest is not None:
+                timeout = max(0.0, self._oldest + self.flush_seconds - time.monotonic())
+            elif self.publish_seconds and self.files:
+                timeout = self.publish_seconds
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            try:
+                if item is None:
+                    self._write_all()
+                elif item[0] == 'append':
+                    self._append(*item[1:])
+                else:
+                    op, path, done = item
+                    try:
+                        if op == 'publish':
+                            self._publish(path)
+                        elif op == 'flush':
+                            self._write_all()
+                        else:
+                            for path in list(self.files):
+                                self._publish(path)
+                            running = False
+                    finally:
+                        done.set()
+                self._snapshot_due()
+            except Exception as e:
+                print(f"✗ CSV writer error: {e}")
+                self.error = e
+                running = False
+        # Unblock anyone still waiting on a full queue or a publish
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] != 'append':
+                item[2].set()
+
+    def _append(self, path, batch, fieldnames, truncate):
+        open_file = self.files.get(path)
+        if open_file is None or truncate:
+            if open_file is not None:
+                self._buffered -= sum(len(pending) for pending in open_file.pending)
+                open_file.handle.close()
+            open_file = self.files[path] = _OpenFile(path, fieldnames, truncate)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        open_file.pending.append(batch)
+        self._buffered += len(batch)
+        if self._buffered >= self.flush_rows:
+            self._write_all()
+
+    def _write_all(self):
+        for open_file in self.files.values():
+            open_file.write_pending()
+        self._buffered = 0
+        self._oldest = None
+
+    def _publish(self, path):
+        open_file = self.files.pop(path, None)
+        if open_file is not None:
+            self._buffered -= sum(len(batch) for batch in open_file.pending)
+            open_file.publish()
+        if not any(f.pending for f in self.files.values()):
+            self._oldest = None
+
+    def _snapshot_due(self):
+        if not self.publish_seconds:
+            return
+        now = time.monotonic()
+        for open_file in self.files.values():
+            if now - open_file.published >= self.publish_seconds:
+                open_file.snapshot()